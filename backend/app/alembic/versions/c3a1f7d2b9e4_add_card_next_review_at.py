@@ -0,0 +1,84 @@
+"""add card next_review_at and mastered
+
+Revision ID: c3a1f7d2b9e4
+Revises: 9d9d5f40348d
+Create Date: 2026-10-18 10:12:41.318207
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c3a1f7d2b9e4'
+down_revision = '9d9d5f40348d'
+branch_labels = None
+depends_on = None
+
+# cards are backfilled in id ranges of this size, each range in its own
+# transaction so the table is never locked as a whole
+BACKFILL_BATCH = 10000
+
+KNOWN_CARD_VIEWS = 20
+
+# minutes to the next review by count of views, as computed at startup by
+# app.states.user.review_algorithm(last_view, count_of_views, passed=True)
+REVIEW_MINUTES = {
+    1: 20,
+    2: 40,
+    3: 120,
+    4: 240,
+    5: 960,
+    6: 3840,
+    7: 15360,
+    8: 61440,
+    9: 245760,
+    10: 983040,
+}
+
+
+def backfill_statement() -> sa.TextClause:
+    minutes = " ".join(
+        f"WHEN {step} THEN {value}" for step, value in REVIEW_MINUTES.items()
+    )
+    return sa.text(
+        "UPDATE card SET "
+        f"mastered = count_of_views >= {KNOWN_CARD_VIEWS}, "
+        f"next_review_at = CASE WHEN count_of_views >= {KNOWN_CARD_VIEWS} THEN NULL "
+        "ELSE last_view + make_interval(mins => "
+        f"CASE LEAST(GREATEST(count_of_views + 1, 1), 10) {minutes} END) END "
+        "WHERE id >= :first AND id < :last"
+    )
+
+
+def upgrade():
+    op.add_column('card', sa.Column('next_review_at', sa.DateTime(), nullable=True))
+    op.add_column(
+        'card',
+        sa.Column('mastered', sa.Boolean(), server_default=sa.false(), nullable=False),
+    )
+
+    bind = op.get_bind()
+    max_id = bind.execute(sa.text("SELECT max(id) FROM card")).scalar() or 0
+    statement = backfill_statement()
+    with op.get_context().autocommit_block():
+        for first in range(1, max_id + 1, BACKFILL_BATCH):
+            bind.execute(statement, {"first": first, "last": first + BACKFILL_BATCH})
+
+    op.create_index(
+        'ix_card_next_review_at',
+        'card',
+        ['next_review_at'],
+        unique=False,
+        postgresql_where=sa.text('NOT mastered'),
+    )
+
+
+def downgrade():
+    op.drop_index(
+        'ix_card_next_review_at',
+        table_name='card',
+        postgresql_where=sa.text('NOT mastered'),
+    )
+    op.drop_column('card', 'mastered')
+    op.drop_column('card', 'next_review_at')
@@ -0,0 +1,48 @@
+"""add content version
+
+Revision ID: f7c1d9e3a5b8
+Revises: e5b2c8a4d1f6
+Create Date: 2026-10-18 18:02:41.207315
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f7c1d9e3a5b8'
+down_revision = 'e5b2c8a4d1f6'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('contentversion',
+    sa.Column('version', sa.BigInteger(), nullable=False),
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.PrimaryKeyConstraint('id', name=op.f('pk_contentversion'))
+    )
+    op.execute("INSERT INTO contentversion (id, version) VALUES (1, 0)")
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION bump_content_version() RETURNS trigger AS $$
+        BEGIN
+            UPDATE contentversion SET version = version + 1 WHERE id = 1;
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql
+        """
+    )
+    for table in ('word', 'sentence'):
+        op.execute(
+            f"CREATE TRIGGER {table}_content_version"
+            f" AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON {table}"
+            " FOR EACH STATEMENT EXECUTE FUNCTION bump_content_version()"
+        )
+
+
+def downgrade():
+    for table in ('word', 'sentence'):
+        op.execute(f"DROP TRIGGER {table}_content_version ON {table}")
+    op.execute("DROP FUNCTION bump_content_version()")
+    op.drop_table('contentversion')
@@ -0,0 +1,37 @@
+"""
+Bot client shared by the whole process.
+
+aiogram opens an aiohttp session with its own connection pool per `Bot`,
+so a bot created per request pays a TCP and TLS handshake for every call
+to the Bot API and leaks the session. The app owns one bot whose pool
+keeps connections to the Bot API alive between updates.
+"""
+
+from typing import Any
+
+from aiogram import Bot
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import PRODUCTION, TEST, TelegramAPIServer
+
+from app.core.config import settings
+
+
+class KeepAliveSession(AiohttpSession):
+    """Aiohttp session whose idle connections are kept for `keepalive` seconds"""
+
+    def __init__(self, limit: int = 100, keepalive: float = 60.0, **kwargs: Any):
+        super().__init__(limit=limit, **kwargs)
+        # all requests go to one host, let them use the whole pool
+        self._connector_init.update(limit_per_host=limit, keepalive_timeout=keepalive)
+
+
+def create_bot(token: str | None = None, api: TelegramAPIServer | None = None) -> Bot:
+    """Bot on a tuned session, on the test Bot API with TELEGRAM_TESTING"""
+    if api is None:
+        api = TEST if settings.TELEGRAM_TESTING else PRODUCTION
+    session = KeepAliveSession(
+        limit=settings.BOT_CONNECTION_LIMIT,
+        keepalive=settings.BOT_KEEPALIVE_SECONDS,
+        api=api,
+    )
+    return Bot(token=token or settings.BOT_TOKEN, session=session)
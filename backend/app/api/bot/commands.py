@@ -3,15 +3,15 @@ from pathlib import Path
 from typing import cast
 
 import yaml
-from aiogram import Router
+from aiogram import Bot, Router
 from aiogram.filters import Command
-from aiogram.types import Message
+from aiogram.types import Message, ReplyParameters
 
-from app.api.deps import async_session_factory
-from app.common.db.repositories import SettingsRepo, UserRepo
+from app.api.bot.outbox import Outbox, Priority
+from app.common.db import Database
 from app.common.db.repositories.user import NewUser
 from app.core.config import settings
-from app.states.user import build_user_state
+from app.states.user import get_states_creator
 from app.utils.logger import logger
 
 router = Router()
@@ -50,55 +50,61 @@ def markdown_to_html(text: str) -> str:
 
 
 @router.message(Command("start"))
-async def start_command(message: Message) -> None:
+async def start_command(
+    message: Message, db: Database, bot: Bot, outbox: Outbox
+) -> None:
     """Send a message when the command /start is issued."""
+
+    async def reply(text: str) -> None:
+        # answers to the user go ahead of notices and broadcasts
+        await outbox.submit(
+            bot,
+            message.chat.id,
+            text,
+            priority=Priority.HIGH,
+            reply_parameters=ReplyParameters(message_id=message.message_id),
+        )
+
     if not message.from_user:
-        await message.reply("User information not available.")
+        await reply("User information not available.")
         return
 
     from_user = message.from_user
     username = from_user.username or "User"
     user_id = from_user.id
 
-    async with async_session_factory() as session:
-        user_repo = UserRepo(session=session)
-        settings_repo = SettingsRepo(session=session)
-        try:
-            await user_repo.create(user_name=username, telegram_id=user_id)
-        except NewUser:
-            logger.info(
-                "User %s with ID %s registered",
-                username,
-                user_id,
+    try:
+        await db.user.create(user_name=username, telegram_id=user_id)
+    except NewUser:
+        logger.info(
+            "User %s with ID %s registered",
+            username,
+            user_id,
+        )
+        # Notify admin about the new user registration, in the next digest
+
+        if settings.ADMIN_TG_ID:
+            await outbox.notify(
+                bot,
+                settings.ADMIN_TG_ID,
+                f"New user registered: @{username} (ID: {user_id}). "
+                f"Contact: <a href='tg://user?id={user_id}'>Open chat</a>",
+                parse_mode="HTML",
             )
-            # Notify admin about the new user registration
-
-            if settings.ADMIN_TG_ID and message.bot:
-                admin_id = settings.ADMIN_TG_ID
-                bot = message.bot
-                await bot.send_message(
-                    admin_id,
-                    f"New user registered: @{username} (ID: {user_id}). "
-                    f"Contact: <a href='tg://user?id={user_id}'>Open chat</a>",
-                    parse_mode="HTML",
-                )
-            await settings_repo.create_or_update_settings(user_id=user_id)
-
-            start_messages = cast(dict[str, str], messages.get("start", {}))
-            new_user_message = start_messages.get("new_user", "Welcome!")
-            await message.reply(new_user_message.format(username=username))
-            states = await build_user_state()
-            states.add_new_user(user_id=user_id)
-        else:
-            start_messages = cast(dict[str, str], messages.get("start", {}))
-            returning_user_message = start_messages.get(
-                "returning_user", "Welcome back!"
-            )
-            await message.reply(returning_user_message.format(username=username))
+        await db.settings.create_or_update_settings(user_id=user_id)
+
+        start_messages = cast(dict[str, str], messages.get("start", {}))
+        new_user_message = start_messages.get("new_user", "Welcome!")
+        await reply(new_user_message.format(username=username))
+        get_states_creator(db).add_new_user(user_id=user_id)
+    else:
+        start_messages = cast(dict[str, str], messages.get("start", {}))
+        returning_user_message = start_messages.get("returning_user", "Welcome back!")
+        await reply(returning_user_message.format(username=username))
 
 
 @router.message(Command("help"))
-async def help_command(message: Message) -> None:
+async def help_command(message: Message, bot: Bot, outbox: Outbox) -> None:
     """Send a message when the command /help is issued."""
     help_sections = cast(dict[str, dict[str, str]], messages.get("help", {}))
 
@@ -108,4 +114,4 @@ async def help_command(message: Message) -> None:
         if section_text and isinstance(section_text, str):
             # Convert markdown formatting to HTML
             html_text = markdown_to_html(section_text)
-            await message.answer(html_text, parse_mode="HTML")
+            await outbox.submit(bot, message.chat.id, html_text, parse_mode="HTML")
@@ -0,0 +1,196 @@
+"""
+Background processing of webhook updates.
+
+The webhook enqueues an update and acknowledges it at once, so a slow
+handler does not hold Telegram's delivery connection open. Updates are
+sharded by chat over a fixed pool of workers: updates of one chat are
+handled one after another in the order they arrived, while different
+chats are handled in parallel. When the shard of a chat is full, the
+webhook waits for room, which slows Telegram's delivery down instead of
+buffering without bound.
+
+The webhook validates the raw request body into an update in one pass,
+bound to the bot, and can drop updates of types without handlers before
+parsing them at all.
+"""
+
+import asyncio
+import time
+from collections.abc import AsyncIterator, Callable, Iterable
+from contextlib import asynccontextmanager, suppress
+from dataclasses import dataclass
+from typing import Any, Protocol
+
+from aiogram import Bot, Dispatcher
+from aiogram.dispatcher.middlewares.user_context import UserContextMiddleware
+from aiogram.types import Update
+
+from app.utils.logger import logger
+
+
+class UpdateFeeder(Protocol):
+    async def feed_update(self, bot: Bot, update: Update, **kwargs: Any) -> Any: ...
+
+
+@dataclass(slots=True)
+class IngestionStats:
+    """Counters of the update queue since it was created"""
+
+    accepted: int = 0
+    processed: int = 0
+    failed: int = 0
+    max_pending: int = 0
+    blocked: int = 0
+    """Updates the webhook had to wait for room for"""
+    blocked_seconds: float = 0.0
+    """Time the webhook waited for room in total"""
+
+
+QueuedUpdate = tuple[Bot, Update, dict[str, Any]]
+
+
+def chat_key(update: Update) -> int:
+    """Id of the chat, or else of the user, the update belongs to"""
+    context = UserContextMiddleware.resolve_event_context(update)
+    if context.chat is not None:
+        return context.chat.id
+    if context.user is not None:
+        return context.user.id
+    return 0
+
+
+def parse_update(body: bytes, bot: Bot) -> Update:
+    """
+    Validate a raw update straight from JSON.
+
+    The update is bound to the bot, otherwise `feed_update` dumps and
+    validates it again to bind it.
+    """
+    return Update.model_validate_json(body, context={"bot": bot})
+
+
+class UpdateTypeFilter:
+    """
+    Check raw updates for types the dispatcher has handlers for.
+
+    The type of an update is the key of its payload, so an update none of
+    whose handled type names occurs in the body as a quoted key can be
+    dropped unparsed. A name may also occur inside the payload, those
+    updates are passed on and left to the dispatcher.
+    """
+
+    def __init__(self, update_types: Iterable[str]) -> None:
+        self.update_types = tuple(update_types)
+        self._keys = tuple(f'"{name}"'.encode() for name in self.update_types)
+        self.skipped = 0
+
+    @classmethod
+    def from_dispatcher(cls, dispatcher: Dispatcher) -> "UpdateTypeFilter":
+        return cls(dispatcher.resolve_used_update_types())
+
+    def __call__(self, body: bytes) -> bool:
+        """Whether the update may have a handler"""
+        if any(key in body for key in self._keys):
+            return True
+        self.skipped += 1
+        return False
+
+
+class UpdateQueue:
+    """
+    Updates waiting to be fed to the dispatcher by a pool of workers.
+
+    A chat always maps to the same of the `workers` shards, each with room
+    for `max_pending // workers` updates and one worker. This keeps the
+    order within a chat without tracking chats, at a cost: a slow handler
+    holds back every chat sharing its shard, and once that shard is full
+    the webhook waits for it, delaying updates of all chats.
+    """
+
+    def __init__(
+        self,
+        dispatcher: UpdateFeeder,
+        workers: int = 8,
+        max_pending: int = 1000,
+        clock: Callable[[], float] = time.perf_counter,
+    ) -> None:
+        if workers < 1 or max_pending < workers:
+            raise ValueError("Queue needs a worker and room for an update per worker")
+        self.dispatcher = dispatcher
+        self.stats = IngestionStats()
+        self._clock = clock
+        self._shards: list[asyncio.Queue[QueuedUpdate]] = [
+            asyncio.Queue(maxsize=max_pending // workers) for _ in range(workers)
+        ]
+        self._tasks: list[asyncio.Task[None]] = []
+        self._in_flight = 0
+        self._accepting = False
+
+    @property
+    def running(self) -> bool:
+        """Whether updates are accepted, the webhook feeds them inline otherwise"""
+        return self._accepting
+
+    @property
+    def pending(self) -> int:
+        """Updates accepted and not handled yet"""
+        return sum(shard.qsize() for shard in self._shards) + self._in_flight
+
+    async def submit(self, bot: Bot, update: Update, **kwargs: Any) -> None:
+        """Queue an update for its chat's worker, waiting while the shard is full"""
+        if not self._accepting:
+            raise RuntimeError("Update queue is not running")
+        shard = self._shards[chat_key(update) % len(self._shards)]
+        if shard.full():
+            self.stats.blocked += 1
+            started = self._clock()
+            await shard.put((bot, update, kwargs))
+            self.stats.blocked_seconds += self._clock() - started
+        else:
+            shard.put_nowait((bot, update, kwargs))
+        self.stats.accepted += 1
+        self.stats.max_pending = max(self.stats.max_pending, self.pending)
+
+    async def _work(self, shard: asyncio.Queue[QueuedUpdate]) -> None:
+        while True:
+            bot, update, kwargs = await shard.get()
+            self._in_flight += 1
+            try:
+                await self.dispatcher.feed_update(bot, update, **kwargs)
+                self.stats.processed += 1
+            except Exception:
+                self.stats.failed += 1
+                logger.exception("Failed to process update %s", update.update_id)
+            finally:
+                self._in_flight -= 1
+                shard.task_done()
+
+    @asynccontextmanager
+    async def run(self, drain_timeout: float = 10.0) -> AsyncIterator[None]:
+        """
+        Run the workers, draining queued updates on exit.
+
+        Updates still pending after `drain_timeout` seconds are dropped
+        with a warning.
+        """
+        self._tasks = [asyncio.create_task(self._work(shard)) for shard in self._shards]
+        self._accepting = True
+        try:
+            yield
+        finally:
+            self._accepting = False
+            # asyncio.wait reports a timeout without raising, whose exception
+            # class differs between Python 3.10 and 3.11
+            drain = asyncio.ensure_future(
+                asyncio.gather(*(shard.join() for shard in self._shards))
+            )
+            _, not_drained = await asyncio.wait([drain], timeout=drain_timeout)
+            if not_drained:
+                drain.cancel()
+                logger.warning("Dropped %s updates on shutdown", self.pending)
+            for task in self._tasks:
+                task.cancel()
+            for task in self._tasks:
+                with suppress(asyncio.CancelledError):
+                    await task
+            self._tasks = []
@@ -1,6 +1,29 @@
 from aiogram import Dispatcher
 
 from app.api.bot.commands import router as commands_router
+from app.api.bot.ingestion import UpdateQueue, UpdateTypeFilter
+from app.api.bot.middlewares import DatabaseMiddleware
+from app.api.bot.outbox import Outbox
+from app.core.config import settings
+from app.core.db import async_session_factory
 
 dispatcher = Dispatcher()
+dispatcher.update.middleware(DatabaseMiddleware(async_session_factory))
 dispatcher.include_router(commands_router)
+
+outbox = Outbox(
+    rate=settings.BOT_MESSAGES_PER_SECOND,
+    chat_rate=settings.BOT_CHAT_MESSAGES_PER_SECOND,
+    chat_burst=settings.BOT_CHAT_BURST,
+    retries=settings.BOT_SEND_RETRIES,
+    digest_interval=settings.BOT_DIGEST_SECONDS,
+)
+# handlers get it as the `outbox` argument
+dispatcher["outbox"] = outbox
+
+update_queue = UpdateQueue(
+    dispatcher,
+    workers=settings.WEBHOOK_WORKERS,
+    max_pending=settings.WEBHOOK_QUEUE_SIZE,
+)
+update_filter = UpdateTypeFilter.from_dispatcher(dispatcher)
@@ -0,0 +1,33 @@
+"""Middlewares of the bot dispatcher."""
+
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.common.db import Database
+
+
+class DatabaseMiddleware(BaseMiddleware):
+    """
+    Give handlers a `db: Database` on a session from the shared pool.
+
+    The session is closed, and its connection returned to the pool, when
+    the update is handled. It only checks out a connection on its first
+    query, so updates that do not touch the database cost nothing.
+    """
+
+    def __init__(self, session_factory: async_sessionmaker[AsyncSession]) -> None:
+        self.session_factory = session_factory
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: dict[str, Any],
+    ) -> Any:
+        async with self.session_factory() as session:
+            data["db"] = Database(session=session)
+            return await handler(event, data)
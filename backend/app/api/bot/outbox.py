@@ -0,0 +1,346 @@
+"""
+Outbound bot messages sent within Telegram's rate limits.
+
+Telegram accepts about 30 messages a second from a bot and about one a
+second into a chat, and answers a flood with RetryAfter. Handlers queue
+messages and a scheduler sends them as token buckets allow: one bucket
+for the bot and one per chat, refilled at the allowed rate. Messages of a
+chat go out one at a time in priority order, so a chat waiting for its
+bucket does not hold other chats back. When Telegram asks to
+retry, the message is sent again after `retry_after` seconds and the bot
+bucket is paused as long, since flood control throttles the whole bot.
+
+Admin notifications are collected and sent as one digest per interval
+instead of a message each.
+"""
+
+import asyncio
+import heapq
+import itertools
+import time
+from collections.abc import AsyncIterator, Callable
+from contextlib import asynccontextmanager, suppress
+from dataclasses import dataclass, field
+from enum import IntEnum
+from typing import Any
+
+from aiogram import Bot
+from aiogram.exceptions import TelegramRetryAfter
+
+from app.utils.logger import logger
+
+MAX_MESSAGE_LENGTH = 4096
+
+
+class Priority(IntEnum):
+    HIGH = 0
+    NORMAL = 1
+    LOW = 2
+
+
+class TokenBucket:
+    """Allows `burst` sends at once and `rate` sends a second after that"""
+
+    def __init__(self, rate: float, burst: int = 1, now: float = 0.0) -> None:
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = now
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, now: float) -> float:
+        """Seconds until a send is allowed"""
+        self._refill(now)
+        return max(0.0, (1 - self.tokens) / self.rate)
+
+    def take(self, now: float) -> None:
+        self._refill(now)
+        self.tokens -= 1
+
+    def pause(self, until: float) -> None:
+        """Allow no send before `until`"""
+        allowed_at = self.updated + max(0.0, 1 - self.tokens) / self.rate
+        if until > allowed_at:
+            self.tokens, self.updated = 1.0, until
+
+    def full(self, now: float) -> bool:
+        self._refill(now)
+        return self.tokens >= self.burst
+
+
+@dataclass(order=True, slots=True)
+class OutboundMessage:
+    priority: Priority
+    number: int
+    bot: Bot = field(compare=False)
+    text: str = field(compare=False)
+    kwargs: dict[str, Any] = field(compare=False)
+    attempts: int = field(default=0, compare=False)
+
+
+@dataclass(slots=True)
+class OutboxStats:
+    """Counters of the outbox since it was created"""
+
+    queued: int = 0
+    sent: int = 0
+    failed: int = 0
+    retried: int = 0
+    """Sends Telegram asked to retry later"""
+    digests: int = 0
+    notifications: int = 0
+    """Admin notifications coalesced into digests"""
+    max_pending: int = 0
+
+
+def digest_messages(notifications: list[str]) -> list[str]:
+    """Notifications joined into as few messages as fit Telegram's limit"""
+    if len(notifications) == 1:
+        return notifications
+    messages = [f"{len(notifications)} notifications:"]
+    for text in notifications:
+        if len(messages[-1]) + len(text) + 1 > MAX_MESSAGE_LENGTH:
+            messages.append(text)
+        else:
+            messages[-1] += "\n" + text
+    return messages
+
+
+class Outbox:
+    """Messages waiting to be sent by the scheduler"""
+
+    def __init__(
+        self,
+        rate: float = 30.0,
+        chat_rate: float = 1.0,
+        chat_burst: int = 1,
+        retries: int = 3,
+        digest_interval: float = 60.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.rate = rate
+        self.chat_rate = chat_rate
+        self.chat_burst = chat_burst
+        self.retries = retries
+        self.digest_interval = digest_interval
+        self.stats = OutboxStats()
+        self._clock = clock
+        self._bucket = TokenBucket(rate, now=clock())
+        self._chat_buckets: dict[int, TokenBucket] = {}
+        # queued messages of every chat, and chats ready to send or waiting
+        self._chats: dict[int, list[OutboundMessage]] = {}
+        self._ready: list[tuple[Priority, int, int]] = []
+        # (priority, number) of the current `_ready` entry of every ready chat,
+        # entries pushed before a higher priority message arrived are skipped
+        self._ready_keys: dict[int, tuple[Priority, int]] = {}
+        self._waiting: list[tuple[float, int]] = []
+        self._scheduled: set[int] = set()
+        self._sending: set[asyncio.Task[None]] = set()
+        self._in_flight = 0
+        self._digests: dict[tuple[Bot, int, str | None], list[str]] = {}
+        self._numbers = itertools.count()
+        self._wakeup: asyncio.Event | None = None
+        self._idle: asyncio.Event | None = None
+        self._task: asyncio.Task[None] | None = None
+        self._stopping = False
+
+    @property
+    def running(self) -> bool:
+        """Whether messages are queued, they are sent at once otherwise"""
+        return self._task is not None
+
+    @property
+    def pending(self) -> int:
+        """Messages queued or being sent"""
+        return sum(map(len, self._chats.values())) + self._in_flight
+
+    async def submit(
+        self,
+        bot: Bot,
+        chat_id: int,
+        text: str,
+        priority: Priority = Priority.NORMAL,
+        **kwargs: Any,
+    ) -> None:
+        """Queue a message to the chat, `kwargs` are passed to `send_message`"""
+        if not self.running:
+            await bot.send_message(chat_id, text, **kwargs)
+            return
+        message = OutboundMessage(priority, next(self._numbers), bot, text, kwargs)
+        heapq.heappush(self._chats.setdefault(chat_id, []), message)
+        ready_key = self._ready_keys.get(chat_id)
+        if ready_key is not None and (message.priority, message.number) < ready_key:
+            self._mark_ready(chat_id)
+        self.stats.queued += 1
+        if self._idle is not None:
+            self._idle.clear()
+        self.stats.max_pending = max(self.stats.max_pending, self.pending)
+        if chat_id not in self._scheduled:
+            self._schedule(chat_id, self._clock())
+        self._wake()
+
+    async def notify(
+        self, bot: Bot, chat_id: int, text: str, parse_mode: str | None = None
+    ) -> None:
+        """Add a notification to the chat's next digest"""
+        if not self.running:
+            await bot.send_message(chat_id, text, parse_mode=parse_mode)
+            return
+        self._digests.setdefault((bot, chat_id, parse_mode), []).append(text)
+        self.stats.notifications += 1
+
+    async def flush_digests(self) -> None:
+        """Queue collected notifications, the scheduler does it every interval"""
+        digests, self._digests = self._digests, {}
+        for (bot, chat_id, parse_mode), notifications in digests.items():
+            for text in digest_messages(notifications):
+                await self.submit(
+                    bot, chat_id, text, priority=Priority.LOW, parse_mode=parse_mode
+                )
+                self.stats.digests += 1
+
+    def _chat_bucket(self, chat_id: int, now: float) -> TokenBucket:
+        bucket = self._chat_buckets.get(chat_id)
+        if bucket is None:
+            bucket = self._chat_buckets[chat_id] = TokenBucket(
+                self.chat_rate, self.chat_burst, now
+            )
+        return bucket
+
+    def _schedule(self, chat_id: int, now: float, not_before: float = 0.0) -> None:
+        """Mark the chat ready to send its first message, or when it may"""
+        self._scheduled.add(chat_id)
+        ready_at = max(now + self._chat_bucket(chat_id, now).wait_time(now), not_before)
+        if ready_at <= now:
+            self._mark_ready(chat_id)
+        else:
+            heapq.heappush(self._waiting, (ready_at, chat_id))
+
+    def _mark_ready(self, chat_id: int) -> None:
+        """Queue the chat for sending by the priority of its first message"""
+        first = self._chats[chat_id][0]
+        self._ready_keys[chat_id] = (first.priority, first.number)
+        heapq.heappush(self._ready, (first.priority, first.number, chat_id))
+
+    def _drop_stale_ready(self) -> None:
+        while self._ready:
+            priority, number, chat_id = self._ready[0]
+            if self._ready_keys.get(chat_id) == (priority, number):
+                return
+            heapq.heappop(self._ready)
+
+    def _forget_idle_chats(self, now: float) -> None:
+        """Drop buckets of chats without messages which refilled completely"""
+        for chat_id, bucket in list(self._chat_buckets.items()):
+            if chat_id not in self._chats and bucket.full(now):
+                del self._chat_buckets[chat_id]
+
+    async def _send(self, chat_id: int, message: OutboundMessage) -> None:
+        not_before = 0.0
+        try:
+            await message.bot.send_message(chat_id, message.text, **message.kwargs)
+            self.stats.sent += 1
+        except TelegramRetryAfter as error:
+            message.attempts += 1
+            if message.attempts > self.retries:
+                self.stats.failed += 1
+                logger.error("Gave up sending a message to chat %s: %s", chat_id, error)
+            else:
+                self.stats.retried += 1
+                heapq.heappush(self._chats.setdefault(chat_id, []), message)
+                not_before = self._clock() + error.retry_after
+                self._bucket.pause(not_before)
+        except Exception:
+            self.stats.failed += 1
+            logger.exception("Failed to send a message to chat %s", chat_id)
+        finally:
+            self._in_flight -= 1
+            self._scheduled.discard(chat_id)
+            if self._chats.get(chat_id):
+                self._schedule(chat_id, self._clock(), not_before)
+            else:
+                self._chats.pop(chat_id, None)
+            if not self.pending and self._idle is not None:
+                self._idle.set()
+            self._wake()
+
+    def _wake(self) -> None:
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    def _start_send(self, now: float) -> None:
+        _, _, chat_id = heapq.heappop(self._ready)
+        del self._ready_keys[chat_id]
+        self._bucket.take(now)
+        self._chat_bucket(chat_id, now).take(now)
+        # the chat stays scheduled until the send finishes, so its messages
+        # go out one at a time
+        message = heapq.heappop(self._chats[chat_id])
+        self._in_flight += 1
+        task = asyncio.create_task(self._send(chat_id, message))
+        self._sending.add(task)
+        task.add_done_callback(self._sending.discard)
+
+    async def _dispatch(self, wakeup: asyncio.Event) -> None:
+        next_digest = self._clock() + self.digest_interval
+        while not self._stopping:
+            now = self._clock()
+            if now >= next_digest:
+                await self.flush_digests()
+                self._forget_idle_chats(now)
+                next_digest = now + self.digest_interval
+            while self._waiting and self._waiting[0][0] <= now:
+                _, chat_id = heapq.heappop(self._waiting)
+                self._mark_ready(chat_id)
+            self._drop_stale_ready()
+
+            timeout = next_digest - now
+            if self._ready:
+                timeout = min(timeout, self._bucket.wait_time(now))
+                if timeout <= 0:
+                    self._start_send(now)
+                    continue
+            if self._waiting:
+                timeout = min(timeout, self._waiting[0][0] - now)
+            wakeup.clear()
+            with suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(wakeup.wait(), timeout)
+
+    @asynccontextmanager
+    async def run(self, drain_timeout: float = 10.0) -> AsyncIterator[None]:
+        """
+        Run the scheduler, sending queued messages and digests on exit.
+
+        Messages still pending after `drain_timeout` seconds are dropped
+        with a warning.
+        """
+        self._wakeup, self._idle = asyncio.Event(), asyncio.Event()
+        self._idle.set()
+        self._stopping = False
+        self._task = asyncio.create_task(self._dispatch(self._wakeup))
+        try:
+            yield
+        finally:
+            await self.flush_digests()
+            try:
+                await asyncio.wait_for(self._idle.wait(), drain_timeout)
+            except asyncio.TimeoutError:
+                logger.warning("Dropped %s outbound messages on shutdown", self.pending)
+            # stopped rather than cancelled, wait_for may swallow a cancellation
+            # arriving as the scheduler is woken up
+            self._stopping = True
+            self._wake()
+            await self._task
+            self._task = self._wakeup = self._idle = None
+            for task in self._sending:
+                task.cancel()
+            await asyncio.gather(*self._sending, return_exceptions=True)
+            self._in_flight = 0
+            self._chats.clear()
+            self._ready.clear()
+            self._ready_keys.clear()
+            self._waiting.clear()
+            self._scheduled.clear()
@@ -1,43 +1,38 @@
 from collections.abc import AsyncGenerator
 from datetime import datetime
+from functools import cache
 from typing import Annotated
 
 from aiogram import Bot
 from aiogram.utils.web_app import safe_parse_webapp_init_data
-from fastapi import Depends, HTTPException
+from fastapi import Depends, HTTPException, Request, Security
 from fastapi.security import (
     HTTPAuthorizationCredentials,
     HTTPBearer,
     OAuth2PasswordBearer,
 )
-from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.common.cache import users_states
+from app.api.bot.client import create_bot
+from app.common.cache.backend import StatesBackend, memory_states_backend
 from app.common.cache.idempotency import IdempotencyStore
-from app.common.cache.states import UserProfile, idempotency_store
+from app.common.cache.states import idempotency_store
+from app.common.cache.updates import UpdateDeduplicator, WindowDeduplicator
 from app.common.db import Database
 from app.common.db.repositories import SettingsRepo
 from app.core.config import settings
+from app.core.db import async_session_factory
 from app.settings.service import SettingService
 from app.token_service import TokensService
+from app.utils.memory_model import MemoryScheduler
 from app.utils.review_algoritm import review_algorithm
-from app.words import WordCardHandler
+from app.utils.scheduling import DueSmoothing, ReviewScheduler
+from app.words import WordCardHandler, word_catalog
 
 reusable_oauth2 = OAuth2PasswordBearer(
     tokenUrl=f"{settings.API_V1_STR}/login/access-token"
 )
 
-# Create engine once at module level
-engine = create_async_engine(
-    str(settings.ASYNC_SQLALCHEMY_DATABASE_URI),
-    pool_size=10,
-    max_overflow=20,
-)
-
-async_session_factory = async_sessionmaker(
-    engine, class_=AsyncSession, expire_on_commit=False
-)
-
 
 async def get_session() -> AsyncGenerator[AsyncSession, None]:
     async with async_session_factory() as session:
@@ -56,44 +51,20 @@ async def get_db(session: SessionDep) -> Database:
 DbDep = Annotated[Database, Depends(get_db)]
 
 
+@cache
 def get_bot_instance() -> Bot:
-    return Bot(token=settings.BOT_TOKEN)
+    """Bot shared by the webhook and bot handlers, closed by the lifespan"""
+    return create_bot()
 
 
 BotDep = Annotated[Bot, Depends(get_bot_instance)]
 
 
-def get_cache() -> dict[int, UserProfile]:
-    return users_states
-
-
-CacheDep = Annotated[dict[int, UserProfile], Depends(get_cache)]
-
-
 def get_idempotency_store() -> IdempotencyStore:
     return idempotency_store
 
 
-IdempotencyStoreDep = Annotated[IdempotencyStore,
-                                Depends(get_idempotency_store)]
-
-
-def get_word_card_handler(db: DbDep, cache: CacheDep) -> WordCardHandler:
-    """Get an instance of WordCardHandler with database session and cache dependencies."""
-
-    # Create a wrapper to convert the int timestamp to datetime
-    def review_algorithm_wrapper(
-        checks: int, passed: bool = True, review_date: datetime | None = None
-    ) -> datetime:
-        timestamp = review_algorithm(checks, passed, review_date)
-        return datetime.fromtimestamp(timestamp)
-
-    return WordCardHandler(
-        db=db, cache=cache, review_algorithm=review_algorithm_wrapper
-    )
-
-
-WordCardHandlerDep = Annotated[WordCardHandler, Depends(get_word_card_handler)]
+IdempotencyStoreDep = Annotated[IdempotencyStore, Depends(get_idempotency_store)]
 
 
 def get_tokens_service() -> TokensService:
@@ -137,3 +108,96 @@ def verify_token(
             status_code=401,
             detail="Invalid token",
         )
+
+
+def verify_admin(user_id: int = Security(verify_token)) -> int:
+    """Verify the access token belongs to the admin and return the user ID."""
+    if settings.ADMIN_TG_ID is None or user_id != settings.ADMIN_TG_ID:
+        raise HTTPException(status_code=403, detail="Not enough permissions")
+    return user_id
+
+
+def get_states_backend(request: Request) -> StatesBackend:
+    """Return the states backend set up in the lifespan, in memory by default."""
+    backend: StatesBackend = getattr(
+        request.app.state, "states_backend", memory_states_backend
+    )
+    return backend
+
+
+async def get_states(
+    request: Request, db: DbDep, user_id: int = Security(verify_token)
+) -> StatesBackend:
+    """Return users states, loading the current user's state if needed."""
+    states = get_states_backend(request)
+    await states.ensure_user(user_id, db)
+    return states
+
+
+StatesDep = Annotated[StatesBackend, Depends(get_states)]
+
+
+@cache
+def get_memory_deduplicator() -> UpdateDeduplicator:
+    return WindowDeduplicator(settings.WEBHOOK_DEDUP_WINDOW)
+
+
+def get_update_deduplicator(request: Request) -> UpdateDeduplicator:
+    """Return the deduplicator set up in the lifespan, in memory by default."""
+    deduplicator: UpdateDeduplicator | None = getattr(
+        request.app.state, "update_deduplicator", None
+    )
+    return deduplicator or get_memory_deduplicator()
+
+
+DeduplicatorDep = Annotated[UpdateDeduplicator, Depends(get_update_deduplicator)]
+
+
+def table_review_algorithm(
+    checks: int, passed: bool = True, review_date: datetime | None = None
+) -> datetime:
+    """Review algorithm with the int timestamp converted to datetime"""
+    return datetime.fromtimestamp(review_algorithm(checks, passed, review_date))
+
+
+@cache
+def get_memory_scheduler() -> MemoryScheduler:
+    """Memory model with the parameters fitted by the last fitting job run"""
+    if settings.REVIEW_MODEL_PATH is None:
+        return MemoryScheduler(retention=settings.REVIEW_RETENTION)
+    return MemoryScheduler.load(
+        settings.REVIEW_MODEL_PATH, retention=settings.REVIEW_RETENTION
+    )
+
+
+def get_review_scheduler(user_id: int) -> ReviewScheduler:
+    """Review scheduler selected by the REVIEW_SCHEDULER setting"""
+    if settings.REVIEW_SCHEDULER == "memory":
+        return get_memory_scheduler().for_user(user_id)
+    return table_review_algorithm
+
+
+@cache
+def get_due_smoothing() -> DueSmoothing | None:
+    """Due times smoothing configured by REVIEW_FUZZ and REVIEW_DAILY_CAP"""
+    if not settings.REVIEW_FUZZ and settings.REVIEW_DAILY_CAP is None:
+        return None
+    return DueSmoothing(fuzz=settings.REVIEW_FUZZ, daily_cap=settings.REVIEW_DAILY_CAP)
+
+
+def get_word_card_handler(
+    db: DbDep, states: StatesDep, user_id: int = Security(verify_token)
+) -> WordCardHandler:
+    """Get an instance of WordCardHandler with database session and states dependencies."""
+
+    return WordCardHandler(
+        db=db,
+        states=states,
+        review_algorithm=get_review_scheduler(user_id),
+        catalog=word_catalog.current,
+        review_log=settings.REVIEW_LOG,
+        smoothing=get_due_smoothing(),
+    )
+
+
+WordCardHandlerDep = Annotated[WordCardHandler, Depends(get_word_card_handler)]
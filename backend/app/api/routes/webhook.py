@@ -1,14 +1,13 @@
 """Webhook routes for handling Telegram bot updates."""
 
+from dataclasses import asdict
 from typing import TypedDict
 
-from aiogram import types
-from aiogram.client.telegram import TEST
-from fastapi import APIRouter, Request, Response
-from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from fastapi import APIRouter, Request, Response, Security
 
-from app.api.bot.main import dispatcher
-from app.api.deps import BotDep
+from app.api.bot.ingestion import parse_update
+from app.api.bot.main import dispatcher, update_filter, update_queue
+from app.api.deps import BotDep, DeduplicatorDep, verify_admin
 from app.core.config import settings
 from app.utils.logger import logger
 
@@ -20,50 +19,66 @@ class TransferData(TypedDict):
 
     # user: UserEntity
     # admin: AdminEntity
-    engine: AsyncEngine
     redis_url: str
     logger: object
     role: int
 
 
 @router.post("/")
-async def webhook(request: Request, bot: BotDep) -> Response:
+async def webhook(
+    request: Request, bot: BotDep, deduplicator: DeduplicatorDep
+) -> Response:
     """Handle incoming updates from Telegram bot.
 
+    Updates Telegram delivers again, and with WEBHOOK_SKIP_UNHANDLED updates
+    of types without handlers, are acknowledged without handling.
+
     Args:
         request: FastAPI request object containing the update from Telegram
         bot: Bot instance injected via dependency
+        deduplicator: Remembers recently handled update ids
 
     Returns:
         Response with appropriate status code
     """
-    update = await request.json()
-    update = types.Update(**update)
+    body = await request.body()
+    if settings.WEBHOOK_SKIP_UNHANDLED and not update_filter(body):
+        return Response(status_code=200)
+    update = parse_update(body, bot)
+    if await deduplicator.is_duplicate(update.update_id):
+        return Response(status_code=200)
 
-    # Use telegram test environment
-    if settings.TELEGRAM_TESTING:
-        # For local testing, set the bot to TEST mode
-        bot.session.api = TEST
+    data = TransferData(
+        logger=logger,
+        redis_url="redis://localhost:6379/0",  # Providing a value for redis_url
+        role=0,  # Providing a default value for role
+    )
     try:
-        await dispatcher.feed_update(
-            update=update,
-            bot=bot,
-            config=settings,
-            **TransferData(
-                logger=logger,
-                engine=create_async_engine(
-                    url=settings.ASYNC_SQLALCHEMY_DATABASE_URI,
-                    pool_size=10,
-                    max_overflow=5,
-                    pool_timeout=30,
-                    pool_recycle=1800,
-                ),
-                redis_url="redis://localhost:6379/0",  # Providing a value for redis_url
-                role=0,  # Providing a default value for role
-            ),
-        )
+        if update_queue.running:
+            # handled in the background, Telegram gets its answer at once
+            await update_queue.submit(bot, update, config=settings, **data)
+        else:
+            await dispatcher.feed_update(
+                update=update, bot=bot, config=settings, **data
+            )
 
         return Response(status_code=200)
     except Exception as e:
         logger.error(f"Error processing update: {e}")
         return Response(status_code=200)
+
+
+@router.get("/stats", dependencies=[Security(verify_admin)])
+async def webhook_stats(
+    deduplicator: DeduplicatorDep,
+) -> dict[str, int | float | bool]:
+    """Backpressure of the webhook update queue and dropped updates, for the admin."""
+    dedup = deduplicator.stats
+    return {
+        "running": update_queue.running,
+        "pending": update_queue.pending,
+        **asdict(update_queue.stats),
+        "duplicates": dedup.duplicates,
+        "dedup_restarts": dedup.restarts,
+        "skipped": update_filter.skipped,
+    }
@@ -1,22 +1,27 @@
 from venv import logger
 
 # ensure Security is imported
-from fastapi import APIRouter, HTTPException, Security
+from fastapi import APIRouter, HTTPException, Response, Security
 
 from app.api.deps import IdempotencyStoreDep, WordCardHandlerDep, verify_token
 from app.common.shemas.words import (
     NewCardRequest,
     NewCardResponce,
+    NewCardsRequest,
+    NewCardsResponce,
     ReviewRequest,
     ReviewResponse,
-    SentenceResponce,
-    WordResponse,
+    ReviewResult,
+    ReviewsRequest,
+    ReviewsResponse,
     WordsResponse,
 )
 from app.words.words_service import EndWordsInDb, EndWordsToReview
 
 router = APIRouter(prefix="/cards", tags=["utils"])
 
+JSON_MEDIA_TYPE = "application/json"
+
 
 @router.post("/", response_model=NewCardResponce, name="new_card", status_code=201)
 async def new_card(
@@ -37,36 +42,37 @@ async def new_card(
         raise HTTPException(status_code=400, detail=str(e)) from e
 
 
+@router.post(
+    "/batch", response_model=NewCardsResponce, name="new_cards", status_code=201
+)
+async def new_cards(
+    request: NewCardsRequest,
+    word_service: WordCardHandlerDep,
+    user_id: int = Security(verify_token),
+) -> NewCardsResponce:
+    """Create several cards for the user at once, either all of them or none"""
+    try:
+        created_cards = await word_service.create_new_cards(
+            telegram_id=user_id,
+            cards=[(card.word_id, card.known) for card in request.cards],
+        )
+        return NewCardsResponce(
+            cards=[NewCardResponce(**card.__dict__) for card in created_cards]
+        )
+    except ValueError as e:
+        logger.error("Error while creating new cards: %s", e)
+        raise HTTPException(status_code=400, detail=str(e)) from e
+
+
 @router.get("/", response_model=WordsResponse)
 async def get_new_word(
     word_service: WordCardHandlerDep,
     user_id: int = Security(verify_token),
-) -> WordsResponse:
+) -> Response:
     """Get next new word for user to create card"""
     try:
         words = await word_service.get_new_words(user_id=user_id)
-        word_responses = [
-            WordResponse(
-                word_id=word.id,
-                latin_word=word.latin_word,
-                cyrillic_word=word.cyrillic_word,
-                native_word=word.native_word,
-                legend=word.legend,
-                sentences=[
-                    SentenceResponce(
-                        id=sentence.id,
-                        native_text=sentence.native_text,
-                        cyrilic_text=sentence.cyrilic_text,
-                        latin_text=sentence.latin_text,
-                    )
-                    for sentence in word.sentences
-                ]
-                if word.sentences
-                else [],
-            )
-            for word in words
-        ]
-        return WordsResponse(words=word_responses)
+        return Response(word_service.encode_words(words), media_type=JSON_MEDIA_TYPE)
     except EndWordsInDb as e:
         raise HTTPException(status_code=400, detail=str(e)) from e
 
@@ -86,11 +92,15 @@ async def add_review(
         return cached_response
 
     # Process the review
-    await word_service.add_review(
-        user_id=user_id,
-        passed=request.passed,
-        word_id=request.word_id,
-    )
+    try:
+        await word_service.add_review(
+            user_id=user_id,
+            passed=request.passed,
+            word_id=request.word_id,
+        )
+    except ValueError as e:
+        logger.error("Error while adding review: %s", e)
+        raise HTTPException(status_code=400, detail=str(e)) from e
 
     # Create response
     response = ReviewResponse(message="Review added successfully")
@@ -101,35 +111,64 @@ async def add_review(
     return response
 
 
+@router.patch("/review/batch", response_model=ReviewsResponse, status_code=201)
+async def add_reviews(
+    request: ReviewsRequest,
+    word_service: WordCardHandlerDep,
+    idempotency_store: IdempotencyStoreDep,
+    user_id: int = Security(verify_token),
+) -> ReviewsResponse:
+    """Add ordered reviews, each with its own idempotency key"""
+
+    # idempotency key -> status code and message of the review
+    outcomes: dict[str, tuple[int, str]] = {}
+    new_reviews: dict[str, ReviewRequest] = {}
+    for review in request.reviews:
+        key = review.idempotency_key
+        if key in outcomes or key in new_reviews:
+            # a key repeated in the batch is applied once
+            continue
+        cached_response = idempotency_store.check(key, user_id)
+        if cached_response is not None:
+            outcomes[key] = (201, cached_response.message)
+        else:
+            new_reviews[key] = review
+
+    errors = await word_service.add_reviews(
+        user_id=user_id,
+        reviews=[(review.word_id, review.passed) for review in new_reviews.values()],
+    )
+
+    for key, error in zip(new_reviews, errors, strict=True):
+        if error is None:
+            response = ReviewResponse(message="Review added successfully")
+            idempotency_store.store(key, user_id, response)
+            outcomes[key] = (201, response.message)
+        else:
+            logger.error("Error while adding review: %s", error)
+            outcomes[key] = (400, error)
+
+    return ReviewsResponse(
+        results=[
+            ReviewResult(
+                word_id=review.word_id,
+                idempotency_key=review.idempotency_key,
+                status_code=outcomes[review.idempotency_key][0],
+                message=outcomes[review.idempotency_key][1],
+            )
+            for review in request.reviews
+        ]
+    )
+
+
 @router.get("/review/", response_model=WordsResponse)
 async def get_review_words(
     word_service: WordCardHandlerDep,
     user_id: int = Security(verify_token),
-) -> WordsResponse:
+) -> Response | WordsResponse:
     try:
-        db_words = await word_service.get_review_words(user_id=user_id)
-        word_responses = [
-            WordResponse(
-                word_id=word.id,
-                latin_word=word.latin_word,
-                cyrillic_word=word.cyrillic_word,
-                native_word=word.native_word,
-                legend=word.legend,
-                sentences=[
-                    SentenceResponce(
-                        id=sentence.id,
-                        native_text=sentence.native_text,
-                        cyrilic_text=sentence.cyrilic_text,
-                        latin_text=sentence.latin_text,
-                    )
-                    for sentence in word.sentences
-                ]
-                if word.sentences
-                else [],
-            )
-            for word in db_words
-        ]
-        return WordsResponse(words=word_responses)
+        words = await word_service.get_review_words(user_id=user_id)
+        return Response(word_service.encode_words(words), media_type=JSON_MEDIA_TYPE)
 
     except EndWordsToReview:
         return WordsResponse(words=[])
@@ -142,5 +181,5 @@ async def get_review_words_count(
 ) -> int:
     """Get count of words available for review"""
 
-    count = word_service.get_review_words_count(user_id=user_id)
+    count = await word_service.get_review_words_count(user_id=user_id)
     return count
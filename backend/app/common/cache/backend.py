@@ -0,0 +1,386 @@
+"""
+Users states backends.
+
+WordCardHandler talks to users states through card level operations so the
+profiles can live either in the process (`users_states`) or in Redis, where
+every uvicorn worker sees the same cards and review queues.
+"""
+
+import datetime
+from abc import ABC, abstractmethod
+from collections.abc import Mapping, Sequence
+from typing import TYPE_CHECKING, Any, cast
+
+from redis.asyncio import Redis
+from redis.asyncio.client import Pipeline
+from redis.exceptions import WatchError
+
+from .scheduler import DueScheduler, due_scheduler
+from .states import ProfileLoader, UserProfile, UsersStates, users_states
+
+if TYPE_CHECKING:
+    from app.common.db import Database
+
+
+def _now() -> int:
+    return int(datetime.datetime.now().timestamp())
+
+
+def _multi(pipe: Pipeline) -> None:
+    """Start the transaction of a watching pipeline, `multi` is untyped"""
+    cast(Any, pipe).multi()
+
+
+class StatesBackend(ABC):
+    """Card level operations on users states"""
+
+    @abstractmethod
+    async def ensure_user(self, user_id: int, db: "Database") -> None:
+        """Make sure the user's state is available before it is used"""
+
+    @abstractmethod
+    async def is_created(self, user_id: int, word_id: int) -> bool:
+        """Check if the user already has a card for the word"""
+
+    @abstractmethod
+    async def created_among(self, user_id: int, word_ids: Sequence[int]) -> list[int]:
+        """Return the word ids of `word_ids` the user already has cards for"""
+
+    @abstractmethod
+    async def last_created(self, user_id: int) -> int | None:
+        """Return the biggest word id the user has a card for"""
+
+    @abstractmethod
+    async def add_created(self, user_id: int, word_id: int, known: bool) -> None:
+        """Register a new card as known or waiting for the first review"""
+
+    @abstractmethod
+    async def add_created_many(
+        self, user_id: int, cards: Sequence[tuple[int, bool]]
+    ) -> None:
+        """Register new (word_id, known) cards in one change, queued in order"""
+
+    @abstractmethod
+    async def is_queued(self, user_id: int, word_id: int) -> bool:
+        """Check if the word is waiting in the user's review queue"""
+
+    @abstractmethod
+    async def schedule_review(
+        self, user_id: int, word_id: int, review_date: int
+    ) -> None:
+        """Move a reviewed card from the review queue to the schedule"""
+
+    @abstractmethod
+    async def mark_known(self, user_id: int, word_id: int) -> None:
+        """Move a mastered card from the review queue to the known cards"""
+
+    @abstractmethod
+    async def scheduled_dates(self, user_id: int) -> list[int]:
+        """Return due unix times of the user's scheduled cards"""
+
+    @abstractmethod
+    async def requeue_review(self, user_id: int, word_id: int) -> None:
+        """Move a failed card to the end of the review queue"""
+
+    @abstractmethod
+    async def review_words(self, user_id: int, limit: int) -> list[int]:
+        """Return up to `limit` word ids due for review"""
+
+    @abstractmethod
+    async def review_count(self, user_id: int) -> int:
+        """Return count of word ids due for review"""
+
+
+class InMemoryStatesBackend(StatesBackend):
+    """Users states kept in this process, due cards promoted by a DueScheduler"""
+
+    def __init__(
+        self,
+        states: Mapping[int, UserProfile],
+        scheduler: DueScheduler | None = None,
+    ) -> None:
+        self.states = states
+        self.scheduler = DueScheduler(states) if scheduler is None else scheduler
+
+    async def ensure_user(self, user_id: int, db: "Database") -> None:
+        if isinstance(self.states, UsersStates):
+            await self.states.load(user_id, db)
+        # profiles loaded lazily or built outside the backend join the heap
+        self.scheduler.track(user_id)
+
+    async def is_created(self, user_id: int, word_id: int) -> bool:
+        return word_id in self.states[user_id].created_cards
+
+    async def created_among(self, user_id: int, word_ids: Sequence[int]) -> list[int]:
+        created_cards = self.states[user_id].created_cards
+        return [word_id for word_id in word_ids if word_id in created_cards]
+
+    async def last_created(self, user_id: int) -> int | None:
+        created_cards = self.states[user_id].created_cards
+        return created_cards[-1] if len(created_cards) else None
+
+    async def add_created(self, user_id: int, word_id: int, known: bool) -> None:
+        await self.add_created_many(user_id, [(word_id, known)])
+
+    async def add_created_many(
+        self, user_id: int, cards: Sequence[tuple[int, bool]]
+    ) -> None:
+        # no awaits, so requests never see a part of the cards
+        profile = self.states[user_id]
+        for word_id, known in cards:
+            if known:
+                profile.known_cards.add(word_id)
+            else:
+                profile.review_cards.append(word_id)
+            profile.created_cards.add(word_id)
+
+    async def is_queued(self, user_id: int, word_id: int) -> bool:
+        return word_id in self.states[user_id].review_cards
+
+    async def schedule_review(
+        self, user_id: int, word_id: int, review_date: int
+    ) -> None:
+        profile = self.states[user_id]
+        profile.review_cards.remove(word_id)
+        profile.waiting_cards.add(word_id, review_date)
+        self.scheduler.schedule(user_id, review_date)
+
+    async def mark_known(self, user_id: int, word_id: int) -> None:
+        profile = self.states[user_id]
+        profile.review_cards.remove(word_id)
+        profile.known_cards.add(word_id)
+
+    async def scheduled_dates(self, user_id: int) -> list[int]:
+        return self.states[user_id].waiting_cards.dates()
+
+    async def requeue_review(self, user_id: int, word_id: int) -> None:
+        self.states[user_id].review_cards.move_to_end(word_id)
+
+    async def review_words(self, user_id: int, limit: int) -> list[int]:
+        return self.states[user_id].review_cards.first(limit)
+
+    async def review_count(self, user_id: int) -> int:
+        return len(self.states[user_id].review_cards)
+
+
+class RedisStatesBackend(StatesBackend):
+    """
+    Users states shared by all workers through Redis.
+
+    Per user keys, all with the same prefix:
+        created  sorted set, word id scored by itself
+        known    set of word ids
+        master   set of word ids
+        review      sorted set, word id scored by its queue position
+        review_seq  counter handing out queue positions
+        waiting     sorted set, word id scored by its due unix time
+        loaded      marker set once the user was hydrated from the database
+
+    Every change runs in a MULTI transaction, moving due cards from the
+    schedule to the review queue is guarded by WATCH so concurrent workers
+    never queue a card twice. With `ttl` set, users untouched for that many
+    seconds expire and are hydrated again on their next request.
+    """
+
+    FIELDS = ("created", "known", "master", "review", "review_seq", "waiting", "loaded")
+
+    def __init__(
+        self,
+        redis: Redis,
+        loader: ProfileLoader,
+        ttl: int | None = None,
+        prefix: str = "states",
+    ) -> None:
+        self.redis = redis
+        self.loader = loader
+        self.ttl = ttl
+        self.prefix = prefix
+
+    def _key(self, user_id: int, field: str) -> str:
+        return f"{self.prefix}:{user_id}:{field}"
+
+    def _keys(self, user_id: int) -> list[str]:
+        return [self._key(user_id, field) for field in self.FIELDS]
+
+    def _expire(self, pipe: "Redis", user_id: int) -> None:
+        if self.ttl is not None:
+            for key in self._keys(user_id):
+                pipe.expire(key, self.ttl)
+
+    async def ensure_user(self, user_id: int, db: "Database") -> None:
+        loaded = self._key(user_id, "loaded")
+        if not await self.redis.exists(loaded):
+            profile = await self.loader(db, user_id)
+            await self._store_profile(user_id, profile)
+        if self.ttl is not None:
+            async with self.redis.pipeline(transaction=True) as pipe:
+                self._expire(pipe, user_id)
+                await pipe.execute()
+
+    async def _store_profile(self, user_id: int, profile: UserProfile) -> None:
+        loaded = self._key(user_id, "loaded")
+        async with self.redis.pipeline(transaction=True) as pipe:
+            try:
+                await pipe.watch(loaded)
+                if await pipe.exists(loaded):
+                    return
+                _multi(pipe)
+                pipe.delete(*self._keys(user_id))
+                if len(profile.created_cards):
+                    pipe.zadd(
+                        self._key(user_id, "created"),
+                        {str(word_id): word_id for word_id in profile.created_cards},
+                    )
+                if len(profile.known_cards):
+                    pipe.sadd(self._key(user_id, "known"), *profile.known_cards)
+                if len(profile.master_cards):
+                    pipe.sadd(self._key(user_id, "master"), *profile.master_cards)
+                if len(profile.review_cards):
+                    pipe.zadd(
+                        self._key(user_id, "review"),
+                        {
+                            str(word_id): position
+                            for position, word_id in enumerate(profile.review_cards, 1)
+                        },
+                    )
+                pipe.set(self._key(user_id, "review_seq"), len(profile.review_cards))
+                if len(profile.waiting_cards):
+                    pipe.zadd(
+                        self._key(user_id, "waiting"),
+                        {
+                            str(word_id): review_date
+                            for review_date, word_id in profile.waiting_cards
+                        },
+                    )
+                pipe.set(loaded, 1)
+                await pipe.execute()
+            except WatchError:
+                # another worker hydrated the user meanwhile
+                pass
+
+    async def is_created(self, user_id: int, word_id: int) -> bool:
+        score = await self.redis.zscore(self._key(user_id, "created"), word_id)
+        return score is not None
+
+    async def created_among(self, user_id: int, word_ids: Sequence[int]) -> list[int]:
+        if not word_ids:
+            return []
+        scores = await self.redis.zmscore(
+            self._key(user_id, "created"), [str(word_id) for word_id in word_ids]
+        )
+        return [
+            word_id
+            for word_id, score in zip(word_ids, scores, strict=True)
+            if score is not None
+        ]
+
+    async def last_created(self, user_id: int) -> int | None:
+        last = await self.redis.zrange(self._key(user_id, "created"), -1, -1)
+        return int(last[0]) if last else None
+
+    async def _positions(self, user_id: int, count: int) -> int:
+        """Reserve `count` queue positions at the end, return the first one"""
+        last = await self.redis.incrby(self._key(user_id, "review_seq"), count)
+        return int(last) - count + 1
+
+    async def add_created(self, user_id: int, word_id: int, known: bool) -> None:
+        await self.add_created_many(user_id, [(word_id, known)])
+
+    async def add_created_many(
+        self, user_id: int, cards: Sequence[tuple[int, bool]]
+    ) -> None:
+        if not cards:
+            return
+        known = [word_id for word_id, is_known in cards if is_known]
+        queued = [word_id for word_id, is_known in cards if not is_known]
+        first = await self._positions(user_id, len(queued)) if queued else 0
+        async with self.redis.pipeline(transaction=True) as pipe:
+            if known:
+                pipe.sadd(self._key(user_id, "known"), *known)
+            if queued:
+                pipe.zadd(
+                    self._key(user_id, "review"),
+                    {
+                        str(word_id): first + index
+                        for index, word_id in enumerate(queued)
+                    },
+                    nx=True,
+                )
+            pipe.zadd(
+                self._key(user_id, "created"),
+                {str(word_id): word_id for word_id, _ in cards},
+            )
+            self._expire(pipe, user_id)
+            await pipe.execute()
+
+    async def is_queued(self, user_id: int, word_id: int) -> bool:
+        score = await self.redis.zscore(self._key(user_id, "review"), word_id)
+        return score is not None
+
+    async def schedule_review(
+        self, user_id: int, word_id: int, review_date: int
+    ) -> None:
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.zrem(self._key(user_id, "review"), word_id)
+            pipe.zadd(self._key(user_id, "waiting"), {str(word_id): review_date})
+            self._expire(pipe, user_id)
+            await pipe.execute()
+
+    async def mark_known(self, user_id: int, word_id: int) -> None:
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.zrem(self._key(user_id, "review"), word_id)
+            pipe.sadd(self._key(user_id, "known"), word_id)
+            self._expire(pipe, user_id)
+            await pipe.execute()
+
+    async def scheduled_dates(self, user_id: int) -> list[int]:
+        entries = await self.redis.zrange(
+            self._key(user_id, "waiting"), 0, -1, withscores=True
+        )
+        return [int(score) for _, score in entries]
+
+    async def requeue_review(self, user_id: int, word_id: int) -> None:
+        position = await self._positions(user_id, 1)
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.zadd(self._key(user_id, "review"), {str(word_id): position}, xx=True)
+            self._expire(pipe, user_id)
+            await pipe.execute()
+
+    async def review_words(self, user_id: int, limit: int) -> list[int]:
+        await self._refresh_user_reviews(user_id)
+        if limit <= 0:
+            return []
+        word_ids = await self.redis.zrange(self._key(user_id, "review"), 0, limit - 1)
+        return [int(word_id) for word_id in word_ids]
+
+    async def review_count(self, user_id: int) -> int:
+        await self._refresh_user_reviews(user_id)
+        return int(await self.redis.zcard(self._key(user_id, "review")))
+
+    async def _refresh_user_reviews(self, user_id: int) -> None:
+        waiting = self._key(user_id, "waiting")
+        review = self._key(user_id, "review")
+        async with self.redis.pipeline(transaction=True) as pipe:
+            while True:
+                try:
+                    await pipe.watch(waiting)
+                    due = await pipe.zrangebyscore(waiting, "-inf", f"({_now()}")
+                    if not due:
+                        return
+                    first = await self._positions(user_id, len(due))
+                    _multi(pipe)
+                    pipe.zrem(waiting, *due)
+                    pipe.zadd(
+                        review,
+                        {word_id: first + index for index, word_id in enumerate(due)},
+                        nx=True,
+                    )
+                    self._expire(pipe, user_id)
+                    await pipe.execute()
+                    return
+                except WatchError:
+                    # another worker moved due cards, read the schedule again
+                    continue
+
+
+memory_states_backend = InMemoryStatesBackend(users_states, due_scheduler)
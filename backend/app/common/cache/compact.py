@@ -0,0 +1,293 @@
+"""
+Compact users profiles for large user counts.
+
+Word ids are dense small integers, so sets of them are stored as bitmaps
+and lists/schedules as typed arrays instead of containers of Python ints.
+The classes mirror the parts of the sortedcontainers, list and ReviewSchedule
+APIs used by the states backends, DueScheduler and StatesCreator.
+"""
+
+from array import array
+from bisect import bisect_left
+from collections.abc import Iterable, Iterator
+from typing import Any, cast
+
+from .review_queue import ReviewQueue
+
+_WORD_BITS = 32
+_WORD_MASK = (1 << _WORD_BITS) - 1
+
+# bit index -> word id for every possible byte value
+_BYTE_BITS = tuple(
+    tuple(bit for bit in range(8) if byte >> bit & 1) for byte in range(256)
+)
+
+
+class WordBitmap:
+    """Sorted set of word ids stored as one bit per id"""
+
+    __slots__ = ("_bits", "_count")
+
+    def __init__(self, word_ids: Iterable[int] = ()) -> None:
+        self._bits = bytearray()
+        self._count = 0
+        self.update(word_ids)
+
+    def add(self, word_id: int) -> None:
+        index, mask = word_id >> 3, 1 << (word_id & 7)
+        if index >= len(self._bits):
+            self._bits.extend(bytes(index + 1 - len(self._bits)))
+        if not self._bits[index] & mask:
+            self._bits[index] |= mask
+            self._count += 1
+
+    def discard(self, word_id: int) -> None:
+        index, mask = word_id >> 3, 1 << (word_id & 7)
+        if index < len(self._bits) and self._bits[index] & mask:
+            self._bits[index] &= ~mask
+            self._count -= 1
+
+    def update(self, word_ids: Iterable[int]) -> None:
+        for word_id in word_ids:
+            self.add(word_id)
+
+    def difference_update(self, word_ids: Iterable[int]) -> None:
+        for word_id in word_ids:
+            self.discard(word_id)
+
+    def __contains__(self, word_id: object) -> bool:
+        if not isinstance(word_id, int) or word_id < 0:
+            return False
+        index = word_id >> 3
+        return index < len(self._bits) and bool(self._bits[index] & 1 << (word_id & 7))
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __iter__(self) -> Iterator[int]:
+        for index, byte in enumerate(self._bits):
+            if byte:
+                base = index << 3
+                for bit in _BYTE_BITS[byte]:
+                    yield base + bit
+
+    def __reversed__(self) -> Iterator[int]:
+        for index in range(len(self._bits) - 1, -1, -1):
+            byte = self._bits[index]
+            if byte:
+                base = index << 3
+                for bit in reversed(_BYTE_BITS[byte]):
+                    yield base + bit
+
+    def __getitem__(self, position: int) -> int:
+        """Positional access; first and last ids are found by a short scan"""
+        if position < 0:
+            position += self._count
+        if not 0 <= position < self._count:
+            raise IndexError("WordBitmap index out of range")
+        ids: Iterator[int]
+        if position >= self._count // 2:
+            ids = reversed(self)
+            position = self._count - 1 - position
+        else:
+            ids = iter(self)
+        for _ in range(position):
+            next(ids)
+        return next(ids)
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, WordBitmap):
+            return self._count == other._count and list(self) == list(other)
+        if isinstance(other, Iterable):
+            return list(self) == sorted(other)
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"WordBitmap({list(self)!r})"
+
+
+class WordArray(array):  # type: ignore[type-arg]
+    """
+    ReviewQueue replacement backed by an unsigned 32 bit array. Membership
+    checks scan the array, trading review speed for memory.
+    """
+
+    def __new__(cls, word_ids: Iterable[int] = ()) -> "WordArray":
+        return cast("WordArray", super().__new__(cls, "I", dict.fromkeys(word_ids)))
+
+    def append(self, word_id: int) -> None:
+        if word_id not in self:
+            super().append(word_id)
+
+    def extend(self, word_ids: Iterable[int]) -> None:
+        for word_id in word_ids:
+            self.append(word_id)
+
+    def discard(self, word_id: int) -> None:
+        if word_id in self:
+            self.remove(word_id)
+
+    def difference_update(self, word_ids: Iterable[int]) -> None:
+        word_ids = set(word_ids)
+        self[:] = [word_id for word_id in self if word_id not in word_ids]
+
+    def move_to_end(self, word_id: int) -> None:
+        self.remove(word_id)
+        super().append(word_id)
+
+    def first(self, count: int) -> list[int]:
+        return self[: max(count, 0)].tolist()
+
+    def __setitem__(self, key: Any, value: Any) -> None:
+        if isinstance(key, slice) and not isinstance(value, array):
+            value = array("I", value)
+        super().__setitem__(key, value)
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, list):
+            return self.tolist() == other
+        if isinstance(other, ReviewQueue):
+            return self.tolist() == list(other)
+        return super().__eq__(other)
+
+    def __repr__(self) -> str:
+        return f"WordArray({self.tolist()!r})"
+
+
+class WordSchedule:
+    """
+    ReviewSchedule replacement keeping (due time, word id) pairs packed as
+    `due << 32 | word` in one sorted unsigned 64 bit array. Lookups by word
+    scan the array, which is fine for the few hundred waiting cards a user
+    usually has.
+    """
+
+    __slots__ = ("_entries",)
+
+    def __init__(self, entries: Iterable[tuple[int, int]] = ()) -> None:
+        self._entries = array("Q")
+        self.update(entries)
+
+    def add(self, word_id: int, review_date: int) -> None:
+        self.discard(word_id)
+        entry = review_date << _WORD_BITS | word_id
+        self._entries.insert(bisect_left(self._entries, entry), entry)
+
+    def update(self, entries: Iterable[tuple[int, int]]) -> None:
+        """Add or move many words at once, sorting the entries once"""
+        packed = {
+            word_id: review_date << _WORD_BITS | word_id
+            for review_date, word_id in entries
+        }
+        if not packed:
+            return
+        kept = (entry for entry in self._entries if entry & _WORD_MASK not in packed)
+        self._entries = array("Q", sorted([*kept, *packed.values()]))
+
+    def _index(self, word_id: int) -> int | None:
+        for index, entry in enumerate(self._entries):
+            if entry & _WORD_MASK == word_id:
+                return index
+        return None
+
+    def discard(self, word_id: int) -> None:
+        index = self._index(word_id)
+        if index is not None:
+            del self._entries[index]
+
+    def remove(self, word_id: int) -> None:
+        index = self._index(word_id)
+        if index is None:
+            raise KeyError(word_id)
+        del self._entries[index]
+
+    def difference_update(self, word_ids: Iterable[int]) -> None:
+        word_ids = set(word_ids)
+        self._entries = array(
+            "Q",
+            (entry for entry in self._entries if entry & _WORD_MASK not in word_ids),
+        )
+
+    def due_date(self, word_id: int) -> int:
+        index = self._index(word_id)
+        if index is None:
+            raise KeyError(word_id)
+        return self._entries[index] >> _WORD_BITS
+
+    def first_due(self) -> int | None:
+        return self._entries[0] >> _WORD_BITS if self._entries else None
+
+    def pop_due(self, now: int) -> list[int]:
+        index = bisect_left(self._entries, now << _WORD_BITS)
+        due = [entry & _WORD_MASK for entry in self._entries[:index]]
+        del self._entries[:index]
+        return due
+
+    def __contains__(self, word_id: object) -> bool:
+        return isinstance(word_id, int) and self._index(word_id) is not None
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __iter__(self) -> Iterator[tuple[int, int]]:
+        for entry in self._entries:
+            yield entry >> _WORD_BITS, entry & _WORD_MASK
+
+    def items(self) -> list[tuple[int, int]]:
+        return list(self)
+
+    def dates(self) -> list[int]:
+        return [entry >> _WORD_BITS for entry in self._entries]
+
+    def values(self) -> list[int]:
+        return [entry & _WORD_MASK for entry in self._entries]
+
+    def __eq__(self, other: object) -> bool:
+        if not hasattr(other, "items"):
+            return NotImplemented
+        return self.items() == list(other.items())
+
+    def __repr__(self) -> str:
+        return f"WordSchedule({self.items()!r})"
+
+
+class CompactUserProfile:
+    """UserProfile replacement storing word ids in bitmaps and arrays"""
+
+    __slots__ = (
+        "created_cards",
+        "known_cards",
+        "master_cards",
+        "review_cards",
+        "waiting_cards",
+    )
+
+    def __init__(
+        self,
+        created_cards: Iterable[int] = (),
+        known_cards: Iterable[int] = (),
+        master_cards: Iterable[int] = (),
+        review_cards: Iterable[int] = (),
+        waiting_cards: Iterable[tuple[int, int]] = (),
+    ) -> None:
+        # store words ids which user passed
+        self.created_cards = WordBitmap(created_cards)
+        # store words ids which user marked as known
+        self.known_cards = WordBitmap(known_cards)
+        # store words ids which user makes 10 right reviews
+        self.master_cards = WordBitmap(master_cards)
+        # store words ids which to review
+        self.review_cards = WordArray(review_cards)
+        # store words ids which user is waiting to review
+        self.waiting_cards = WordSchedule(waiting_cards)
+
+    def __eq__(self, other: object) -> bool:
+        if not hasattr(other, "waiting_cards"):
+            return NotImplemented
+        return all(
+            getattr(self, name) == getattr(other, name) for name in self.__slots__
+        )
+
+    def __repr__(self) -> str:
+        fields = ", ".join(f"{name}={getattr(self, name)!r}" for name in self.__slots__)
+        return f"CompactUserProfile({fields})"
@@ -0,0 +1,43 @@
+"""
+Per user locks for users states changes.
+
+A card change checks the state, writes the database and then updates the
+state, with awaits in between. Requests of one user run those steps one
+after another, while different users never wait for each other. The locks
+live in the process; with the Redis backend and several workers, the
+database unique constraint and the queue checks still reject duplicates.
+"""
+
+import asyncio
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+
+
+class UserLocks:
+    """asyncio locks created on demand and dropped when no request holds them"""
+
+    def __init__(self) -> None:
+        # user id -> lock and count of requests holding or waiting for it
+        self._locks: dict[int, tuple[asyncio.Lock, int]] = {}
+
+    def __len__(self) -> int:
+        return len(self._locks)
+
+    @asynccontextmanager
+    async def __call__(self, user_id: int) -> AsyncIterator[None]:
+        lock, users = self._locks.get(user_id, (None, 0))
+        if lock is None:
+            lock = asyncio.Lock()
+        self._locks[user_id] = (lock, users + 1)
+        try:
+            async with lock:
+                yield
+        finally:
+            lock, users = self._locks[user_id]
+            if users == 1:
+                del self._locks[user_id]
+            else:
+                self._locks[user_id] = (lock, users - 1)
+
+
+user_locks = UserLocks()
@@ -0,0 +1,88 @@
+"""
+Review queue of a user.
+
+Word ids are kept in review order in an insertion ordered dict, so adding,
+removing by id and membership checks are O(1) and a word is queued at most
+once, no matter how many times it is failed.
+"""
+
+from collections.abc import Iterable, Iterator
+from itertools import islice
+from typing import overload
+
+
+class ReviewQueue:
+    """Ordered set of word ids waiting for review"""
+
+    __slots__ = ("_words",)
+
+    def __init__(self, word_ids: Iterable[int] = ()) -> None:
+        self._words: dict[int, None] = dict.fromkeys(word_ids)
+
+    def append(self, word_id: int) -> None:
+        """Queue the word at the end, keeping its place if already queued"""
+        self._words.setdefault(word_id, None)
+
+    def extend(self, word_ids: Iterable[int]) -> None:
+        for word_id in word_ids:
+            self._words.setdefault(word_id, None)
+
+    def remove(self, word_id: int) -> None:
+        """Remove a queued word, ValueError if it is not queued like list"""
+        try:
+            del self._words[word_id]
+        except KeyError:
+            raise ValueError(f"{word_id} is not in review queue") from None
+
+    def discard(self, word_id: int) -> None:
+        self._words.pop(word_id, None)
+
+    def difference_update(self, word_ids: Iterable[int]) -> None:
+        for word_id in word_ids:
+            self._words.pop(word_id, None)
+
+    def move_to_end(self, word_id: int) -> None:
+        """Put a queued word at the end of the queue"""
+        self.remove(word_id)
+        self._words[word_id] = None
+
+    def first(self, count: int) -> list[int]:
+        """Return the first `count` queued word ids"""
+        return list(islice(self._words, max(count, 0)))
+
+    @overload
+    def __getitem__(self, index: int) -> int: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> list[int]: ...
+
+    def __getitem__(self, index: int | slice) -> int | list[int]:
+        if isinstance(index, slice):
+            if index.start in (None, 0) and index.step in (None, 1):
+                if index.stop is None:
+                    return list(self._words)
+                if index.stop >= 0:
+                    return self.first(index.stop)
+            return list(self._words)[index]
+        if 0 <= index < len(self._words):
+            return next(islice(self._words, index, None))
+        return list(self._words)[index]
+
+    def __contains__(self, word_id: object) -> bool:
+        return word_id in self._words
+
+    def __len__(self) -> int:
+        return len(self._words)
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self._words)
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, ReviewQueue):
+            return list(self._words) == list(other._words)
+        if isinstance(other, list):
+            return list(self._words) == other
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"ReviewQueue({list(self._words)!r})"
@@ -0,0 +1,91 @@
+"""
+Waiting cards schedule of a user.
+
+Entries are ordered by (due time, word id), so any number of cards can be
+due in the same second, and each word is scheduled at most once.
+"""
+
+from collections.abc import Iterable, Iterator
+
+from sortedcontainers import SortedSet  # type: ignore
+
+
+class ReviewSchedule:
+    """Word ids ordered by due unix time with O(log n) updates by word"""
+
+    __slots__ = ("_entries", "_due")
+
+    def __init__(self, entries: Iterable[tuple[int, int]] = ()) -> None:
+        # (review date, word id) pairs in due order
+        self._entries = SortedSet()
+        # word id -> review date
+        self._due: dict[int, int] = {}
+        self.update(entries)
+
+    def add(self, word_id: int, review_date: int) -> None:
+        """Schedule the word, replacing its previous due time"""
+        self.discard(word_id)
+        self._entries.add((review_date, word_id))
+        self._due[word_id] = review_date
+
+    def update(self, entries: Iterable[tuple[int, int]]) -> None:
+        for review_date, word_id in entries:
+            self.add(word_id, review_date)
+
+    def discard(self, word_id: int) -> None:
+        review_date = self._due.pop(word_id, None)
+        if review_date is not None:
+            self._entries.remove((review_date, word_id))
+
+    def remove(self, word_id: int) -> None:
+        if word_id not in self._due:
+            raise KeyError(word_id)
+        self.discard(word_id)
+
+    def difference_update(self, word_ids: Iterable[int]) -> None:
+        for word_id in word_ids:
+            self.discard(word_id)
+
+    def due_date(self, word_id: int) -> int:
+        return self._due[word_id]
+
+    def first_due(self) -> int | None:
+        """Due time of the earliest card, None when nothing is scheduled"""
+        return self._entries[0][0] if self._entries else None
+
+    def pop_due(self, now: int) -> list[int]:
+        """Remove and return word ids due before `now` in due order"""
+        index = self._entries.bisect_left((now,))
+        due = [word_id for _, word_id in self._entries[:index]]
+        del self._entries[:index]
+        for word_id in due:
+            del self._due[word_id]
+        return due
+
+    def __contains__(self, word_id: object) -> bool:
+        return word_id in self._due
+
+    def __len__(self) -> int:
+        return len(self._due)
+
+    def __iter__(self) -> Iterator[tuple[int, int]]:
+        return iter(self._entries)
+
+    def items(self) -> list[tuple[int, int]]:
+        """(review date, word id) pairs in due order"""
+        return list(self._entries)
+
+    def dates(self) -> list[int]:
+        return [review_date for review_date, _ in self._entries]
+
+    def values(self) -> list[int]:
+        """Word ids in due order"""
+        return [word_id for _, word_id in self._entries]
+
+    def __eq__(self, other: object) -> bool:
+        if not hasattr(other, "items"):
+            return NotImplemented
+        return self.items() == list(other.items())
+
+    def __repr__(self) -> str:
+        return f"ReviewSchedule({self.items()!r})"
@@ -0,0 +1,95 @@
+"""
+Background promotion of due cards for in-memory users states.
+
+Each profile keeps its waiting cards sorted by due time, so the scheduler
+only needs one heap entry per user: the earliest due time of that user.
+When it passes, all of the user's due cards are moved to the review queue
+and the user is pushed back with their next due time. Request handlers
+then only read `review_cards`.
+"""
+
+import asyncio
+import heapq
+import time
+from collections.abc import Callable, Mapping
+
+from app.utils.logger import logger
+
+from .states import UserProfile, users_states
+
+
+class DueScheduler:
+    """Min-heap of users keyed by the due time of their next waiting card"""
+
+    def __init__(
+        self,
+        states: Mapping[int, UserProfile],
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.states = states
+        self._clock = clock
+        self._heap: list[tuple[int, int]] = []
+        # user id -> due time of the user's valid heap entry
+        self._next_due: dict[int, int] = {}
+        self.promoted = 0
+
+    def __len__(self) -> int:
+        """Count of users with scheduled cards"""
+        return len(self._next_due)
+
+    def next_due(self, user_id: int) -> int | None:
+        return self._next_due.get(user_id)
+
+    def schedule(self, user_id: int, review_date: int) -> None:
+        """Register that the user has a card due at `review_date`"""
+        next_due = self._next_due.get(user_id)
+        if next_due is None or review_date < next_due:
+            self._next_due[user_id] = review_date
+            heapq.heappush(self._heap, (review_date, user_id))
+
+    def track(self, user_id: int) -> None:
+        """Schedule the earliest waiting card of an already built profile"""
+        profile = self.states.get(user_id)
+        if profile is None:
+            return
+        review_date = profile.waiting_cards.first_due()
+        if review_date is not None:
+            self.schedule(user_id, review_date)
+
+    def track_all(self) -> None:
+        for user_id in self.states:
+            self.track(user_id)
+
+    def promote_due(self, now: int | None = None) -> int:
+        """Move every card due before `now` to its user's review queue"""
+        if now is None:
+            now = int(self._clock())
+        promoted = 0
+        while self._heap and self._heap[0][0] < now:
+            review_date, user_id = heapq.heappop(self._heap)
+            # entries replaced by an earlier due time are skipped lazily
+            if self._next_due.get(user_id) != review_date:
+                continue
+            del self._next_due[user_id]
+            profile = self.states.get(user_id)
+            if profile is None:
+                # the profile was evicted, it is tracked again on reload
+                continue
+            due = profile.waiting_cards.pop_due(now)
+            profile.review_cards.extend(due)
+            promoted += len(due)
+            self.track(user_id)
+        self.promoted += promoted
+        return promoted
+
+    async def run(self, interval: float) -> None:
+        """Promote due cards every `interval` seconds until cancelled"""
+        while True:
+            try:
+                self.promote_due()
+            except Exception:
+                logger.exception("Failed to promote due cards")
+            await asyncio.sleep(interval)
+
+
+due_scheduler = DueScheduler(users_states)
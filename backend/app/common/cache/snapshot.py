@@ -0,0 +1,173 @@
+"""
+Binary snapshot of users states used for warm restarts.
+
+Layout (little endian):
+    header: magic, format version, snapshot unix time, users count
+    per user: telegram id, five lengths, then the created/known/master/review
+    word ids as uint32 arrays and the waiting schedule as int64 due
+    timestamps followed by uint32 word ids.
+"""
+
+import asyncio
+import os
+import struct
+import sys
+from array import array
+from collections.abc import Mapping
+from datetime import datetime
+from pathlib import Path
+
+from sortedcontainers import SortedSet  # type: ignore
+
+from app.utils.logger import logger
+
+from .review_queue import ReviewQueue
+from .schedule import ReviewSchedule
+from .states import ProfileFactory, UserProfile
+
+SNAPSHOT_MAGIC = b"USNP"
+SNAPSHOT_VERSION = 1
+
+_HEADER = struct.Struct("<4sHdI")
+_USER = struct.Struct("<q5I")
+
+
+class SnapshotError(Exception):
+    """Snapshot file is missing, truncated or has an unknown format"""
+
+    pass
+
+
+def _pack(typecode: str, values: object) -> bytes:
+    packed = array(typecode, values)  # type: ignore[call-overload]
+    if sys.byteorder != "little":
+        packed.byteswap()
+    data: bytes = packed.tobytes()
+    return data
+
+
+def _unpack(typecode: str, data: bytes) -> array:  # type: ignore[type-arg]
+    unpacked = array(typecode)
+    unpacked.frombytes(data)
+    if sys.byteorder != "little":
+        unpacked.byteswap()
+    return unpacked
+
+
+def dump_states(states: Mapping[int, UserProfile], created_at: datetime) -> bytes:
+    """Serialize users states into the snapshot format"""
+    chunks = [
+        _HEADER.pack(
+            SNAPSHOT_MAGIC, SNAPSHOT_VERSION, created_at.timestamp(), len(states)
+        )
+    ]
+    for telegram_id, profile in states.items():
+        chunks.append(
+            _USER.pack(
+                telegram_id,
+                len(profile.created_cards),
+                len(profile.known_cards),
+                len(profile.master_cards),
+                len(profile.review_cards),
+                len(profile.waiting_cards),
+            )
+        )
+        chunks.append(_pack("I", profile.created_cards))
+        chunks.append(_pack("I", profile.known_cards))
+        chunks.append(_pack("I", profile.master_cards))
+        chunks.append(_pack("I", profile.review_cards))
+        chunks.append(_pack("q", profile.waiting_cards.dates()))
+        chunks.append(_pack("I", profile.waiting_cards.values()))
+    return b"".join(chunks)
+
+
+def load_states(
+    data: bytes, profile_factory: ProfileFactory = UserProfile
+) -> tuple[datetime, dict[int, UserProfile]]:
+    """Deserialize a snapshot, returning its creation time and the states"""
+    view = memoryview(data)
+    try:
+        magic, version, created_at, users_count = _HEADER.unpack_from(view, 0)
+    except struct.error as e:
+        raise SnapshotError("Snapshot header is truncated") from e
+    if magic != SNAPSHOT_MAGIC or version != SNAPSHOT_VERSION:
+        raise SnapshotError(f"Unsupported snapshot format {magic!r} v{version}")
+
+    offset = _HEADER.size
+    states: dict[int, UserProfile] = {}
+
+    def read(typecode: str, count: int) -> array:  # type: ignore[type-arg]
+        nonlocal offset
+        size = count * array(typecode).itemsize
+        if offset + size > len(view):
+            raise SnapshotError("Snapshot body is truncated")
+        values = _unpack(typecode, view[offset : offset + size].tobytes())
+        offset += size
+        return values
+
+    for _ in range(users_count):
+        try:
+            telegram_id, *lengths = _USER.unpack_from(view, offset)
+        except struct.error as e:
+            raise SnapshotError("Snapshot body is truncated") from e
+        offset += _USER.size
+        created, known, master, review, waiting = lengths
+        created_cards = read("I", created)
+        known_cards = read("I", known)
+        master_cards = read("I", master)
+        review_cards = read("I", review)
+        waiting_dates = read("q", waiting)
+        waiting_words = read("I", waiting)
+        states[telegram_id] = profile_factory(
+            created_cards=SortedSet(created_cards),
+            known_cards=SortedSet(known_cards),
+            master_cards=SortedSet(master_cards),
+            review_cards=ReviewQueue(review_cards),
+            waiting_cards=ReviewSchedule(
+                zip(waiting_dates, waiting_words, strict=True)
+            ),
+        )
+
+    return datetime.fromtimestamp(created_at), states
+
+
+def write_snapshot(path: str | Path, data: bytes) -> None:
+    """Atomically replace the snapshot file with the given bytes"""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(path.suffix + ".tmp")
+    with open(tmp_path, "wb") as file:
+        file.write(data)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(tmp_path, path)
+
+
+def read_snapshot(
+    path: str | Path, profile_factory: ProfileFactory = UserProfile
+) -> tuple[datetime, dict[int, UserProfile]]:
+    """Load users states from the snapshot file"""
+    try:
+        data = Path(path).read_bytes()
+    except OSError as e:
+        raise SnapshotError(f"Snapshot {path} can not be read") from e
+    return load_states(data, profile_factory)
+
+
+async def save_snapshot(path: str | Path, states: Mapping[int, UserProfile]) -> None:
+    """Serialize states in the event loop and write the file in a thread"""
+    data = dump_states(states, datetime.now())
+    await asyncio.to_thread(write_snapshot, path, data)
+    logger.info("Saved users states snapshot for %s users", len(states))
+
+
+async def snapshot_periodically(
+    path: str | Path, states: Mapping[int, UserProfile], interval: float
+) -> None:
+    """Save a snapshot every `interval` seconds until cancelled"""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await save_snapshot(path, states)
+        except Exception:
+            logger.exception("Failed to save users states snapshot")
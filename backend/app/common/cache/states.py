@@ -1,9 +1,18 @@
 # mypy: ignore-missing-imports
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable
 from dataclasses import dataclass, field
+from typing import TYPE_CHECKING
 
-from sortedcontainers import SortedDict, SortedList, SortedSet  # type: ignore
+from sortedcontainers import SortedList, SortedSet  # type: ignore
 
 from .idempotency import IdempotencyStore
+from .review_queue import ReviewQueue
+from .schedule import ReviewSchedule
+
+if TYPE_CHECKING:
+    from app.common.db import Database
 
 
 @dataclass
@@ -17,11 +26,97 @@ class UserProfile:
     # store words ids which user makes 10 right reviews
     master_cards: SortedSet = field(default_factory=SortedSet)
     # store words ids which to review
-    review_cards: list[int] = field(default_factory=list)
+    review_cards: ReviewQueue = field(default_factory=ReviewQueue)
     # store words ids which user is waiting to review
-    waiting_cards: SortedDict = field(default_factory=SortedDict)
+    waiting_cards: ReviewSchedule = field(default_factory=ReviewSchedule)
+
+    def __post_init__(self) -> None:
+        if not isinstance(self.review_cards, ReviewQueue):
+            self.review_cards = ReviewQueue(self.review_cards)
+
+
+ProfileLoader = Callable[["Database", int], Awaitable[UserProfile]]
+# UserProfile or an API compatible implementation such as CompactUserProfile
+ProfileFactory = Callable[..., UserProfile]
+
+
+class UsersStates(OrderedDict[int, UserProfile]):
+    """
+    Users profiles kept in least recently used order.
+
+    Without a loader it behaves like a plain dict filled at startup. Once a
+    loader is configured, profiles are hydrated on first access and the
+    least recently used ones are evicted when the cache grows over
+    `max_size` or stays untouched for `max_idle` seconds. Cards are written
+    to the database as they change, so an evicted profile has no pending
+    state and is rebuilt from the database on the next request.
+    """
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic) -> None:
+        super().__init__()
+        self.loader: ProfileLoader | None = None
+        self.max_size: int | None = None
+        self.max_idle: float | None = None
+        self._clock = clock
+        self._last_seen: dict[int, float] = {}
+
+    def configure(
+        self,
+        loader: ProfileLoader,
+        max_size: int | None = None,
+        max_idle: float | None = None,
+    ) -> None:
+        """Switch to on-demand loading with the given eviction limits"""
+        self.loader = loader
+        self.max_size = max_size
+        self.max_idle = max_idle
+
+    def __setitem__(self, user_id: int, profile: UserProfile) -> None:
+        super().__setitem__(user_id, profile)
+        self._touch(user_id)
+
+    def __delitem__(self, user_id: int) -> None:
+        super().__delitem__(user_id)
+        self._last_seen.pop(user_id, None)
+
+    def clear(self) -> None:
+        super().clear()
+        self._last_seen.clear()
+
+    async def load(self, user_id: int, db: "Database") -> None:
+        """Make sure the user's profile is cached when lazy loading is on"""
+        if self.loader is None:
+            return
+
+        if user_id in self:
+            self._touch(user_id)
+        else:
+            profile = await self.loader(db, user_id)
+            # a concurrent request may have loaded the profile meanwhile
+            if user_id not in self:
+                self[user_id] = profile
+        self._evict(keep=user_id)
+
+    def _touch(self, user_id: int) -> None:
+        self.move_to_end(user_id)
+        self._last_seen[user_id] = self._clock()
+
+    def _evict(self, keep: int) -> None:
+        idle_before = None if self.max_idle is None else self._clock() - self.max_idle
+        while len(self) > 1:
+            user_id = next(iter(self))
+            if user_id == keep:
+                break
+            over_size = self.max_size is not None and len(self) > self.max_size
+            idle = (
+                idle_before is not None
+                and self._last_seen.get(user_id, idle_before) <= idle_before
+            )
+            if not (over_size or idle):
+                break
+            del self[user_id]
 
 
-users_states: dict[int, UserProfile] = {}
+users_states = UsersStates()
 
 idempotency_store = IdempotencyStore(ttl_hours=24)
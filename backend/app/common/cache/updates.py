@@ -0,0 +1,100 @@
+"""
+Deduplication of Telegram updates by update_id.
+
+Telegram delivers an update again when the webhook answers slowly, and
+update ids of a bot grow by one with every update. In a single process the
+last `window` ids are kept as a ring of bits indexed by `update_id % window`,
+so memory stays the same however many updates arrive. Workers sharing
+updates behind a load balancer use Redis keys that expire instead.
+
+After a week without updates Telegram picks the next id at random, so an id
+further behind than the window starts the window again rather than being
+dropped.
+"""
+
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+
+from redis.asyncio import Redis
+
+DEFAULT_WINDOW = 4096
+
+
+@dataclass(slots=True)
+class DedupStats:
+    accepted: int = 0
+    duplicates: int = 0
+    """Updates dropped as already seen"""
+    restarts: int = 0
+    """Times the window started again at an id far behind it"""
+
+
+class UpdateDeduplicator(ABC):
+    def __init__(self) -> None:
+        self.stats = DedupStats()
+
+    @abstractmethod
+    async def _seen(self, update_id: int) -> bool:
+        """Remember the update, True if it was seen already"""
+
+    async def is_duplicate(self, update_id: int) -> bool:
+        """Check whether the update should be dropped, and count it"""
+        if await self._seen(update_id):
+            self.stats.duplicates += 1
+            return True
+        self.stats.accepted += 1
+        return False
+
+
+class WindowDeduplicator(UpdateDeduplicator):
+    """Sliding window of the last `window` update ids in a bitset"""
+
+    def __init__(self, window: int = DEFAULT_WINDOW) -> None:
+        if window < 8 or window % 8:
+            raise ValueError("Window must be a positive multiple of 8")
+        super().__init__()
+        self.window = window
+        self._bits = bytearray(window // 8)
+        self._highest: int | None = None
+
+    def _clear(self, start: int, stop: int) -> None:
+        """Forget update ids in [start, stop)"""
+        if stop - start >= self.window:
+            self._bits[:] = bytes(len(self._bits))
+            return
+        for update_id in range(start, stop):
+            index = update_id % self.window
+            self._bits[index >> 3] &= ~(1 << (index & 7)) & 0xFF
+
+    async def _seen(self, update_id: int) -> bool:
+        highest = self._highest
+        if highest is None or update_id <= highest - self.window:
+            if highest is not None:
+                self.stats.restarts += 1
+            self._clear(0, self.window)
+            self._highest = update_id
+        elif update_id > highest:
+            self._clear(highest + 1, update_id + 1)
+            self._highest = update_id
+        index = update_id % self.window
+        byte, bit = index >> 3, 1 << (index & 7)
+        if self._bits[byte] & bit:
+            return True
+        self._bits[byte] |= bit
+        return False
+
+
+class RedisDeduplicator(UpdateDeduplicator):
+    """Update ids shared by workers, each kept for `ttl` seconds"""
+
+    def __init__(self, redis: Redis, ttl: int = 3600, prefix: str = "update") -> None:
+        super().__init__()
+        self.redis = redis
+        self.ttl = ttl
+        self.prefix = prefix
+
+    async def _seen(self, update_id: int) -> bool:
+        added = await self.redis.set(
+            f"{self.prefix}:{update_id}", 1, nx=True, ex=self.ttl
+        )
+        return not added
@@ -3,6 +3,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from .repositories import (
     CardRepo,
     InvoiceRepo,
+    ReviewLogRepo,
     SentenceRepo,
     SettingsRepo,
     StatisticsRepo,
@@ -19,6 +20,7 @@ class Database:
     word: WordRepo
     sentence: SentenceRepo
     settings: SettingsRepo
+    review_log: ReviewLogRepo
 
     session: AsyncSession
 
@@ -34,6 +36,7 @@ class Database:
         invoice: InvoiceRepo | None = None,
         texts: TextsRepo | None = None,
         user_text: UserTextRepo | None = None,
+        review_log: ReviewLogRepo | None = None,
     ):
         """Init database."""
         self.session = session
@@ -46,3 +49,4 @@ class Database:
         self.user_text = user_text or UserTextRepo(session=session)
         self.statistic = statistic or StatisticsRepo(session=session)
         self.invoice = invoice or InvoiceRepo(session=session)
+        self.review_log = review_log or ReviewLogRepo(session=session)
@@ -2,8 +2,10 @@
 
 from .base import Base
 from .card import Card
+from .content_version import ContentVersion
 from .invoice import Invoice
 from .level import Level
+from .review_log import ReviewLog
 from .sentence import Sentence
 from .settings import Settings
 from .statistic import Statistic
@@ -24,4 +26,6 @@ __all__ = (
     "Level",
     "Statistic",
     "Invoice",
+    "ReviewLog",
+    "ContentVersion",
 )
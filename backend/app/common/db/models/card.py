@@ -6,18 +6,27 @@ from typing import TYPE_CHECKING
 if TYPE_CHECKING:
     from .user import User  # noqa: F401
     from .word import Word  # noqa: F401
+from datetime import datetime
+
 from sqlalchemy import (
     BigInteger,
+    Boolean,
     CheckConstraint,
     DateTime,
     ForeignKey,
+    Index,
     Integer,
     UniqueConstraint,
+    false,
+    text,
 )
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from .base import Base
 
+KNOWN_CARD_VIEWS = 20
+"""count_of_views of cards the user marked as known, they are never reviewed"""
+
 
 class Card(Base):
     """
@@ -36,15 +45,29 @@ class Card(Base):
     count_of_views: Mapped[int] = mapped_column(Integer, nullable=False)
     """Count of how many times the card has been viewed"""
 
-    last_view: Mapped[DateTime] = mapped_column(DateTime, nullable=False)
+    last_view: Mapped[datetime] = mapped_column(DateTime, nullable=False)
     """Timestamp of the last view"""
 
+    next_review_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+    """When the card is due for review, None for mastered cards"""
+
+    mastered: Mapped[bool] = mapped_column(
+        Boolean, nullable=False, default=False, server_default=false()
+    )
+    """Card reached KNOWN_CARD_VIEWS and is out of the review rotation"""
+
     # Constrains
     __table_args__ = (
         UniqueConstraint("user_id", "word_id", name="user_word_unique"),
         CheckConstraint(
             "count_of_views >= 0", name="check_count_of_views_non_negative"
         ),
+        # due cards of all users for reminders and analytics
+        Index(
+            "ix_card_next_review_at",
+            "next_review_at",
+            postgresql_where=text("NOT mastered"),
+        ),
     )
 
     # Relationships
@@ -0,0 +1,25 @@
+"""
+Content version model file.
+"""
+
+from sqlalchemy import BigInteger
+from sqlalchemy.orm import Mapped, mapped_column
+
+from .base import Base
+
+
+class ContentVersion(Base):
+    """
+    Single row counting changes of the words content.
+
+    Statement triggers on the word and sentence tables, created by the
+    migration adding the table, bump it, so a copy of the content is checked
+    for staleness by reading one row.
+    """
+
+    # Fields
+    version: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+    """Incremented by every statement changing words or sentences"""
+
+    def __repr__(self) -> str:
+        return f"<ContentVersion(version={self.version})>"
@@ -0,0 +1,41 @@
+"""
+Review log model file.
+"""
+
+from datetime import datetime
+
+from sqlalchemy import BigInteger, Boolean, DateTime, Integer
+from sqlalchemy.orm import Mapped, mapped_column
+
+from .base import Base
+
+
+class ReviewLog(Base):
+    """
+    Outcome of one review, the data review intervals are fitted on.
+
+    Append only: rows are never updated and have no foreign keys, so logging
+    a review is a plain insert.
+    """
+
+    # Fields
+    user_id: Mapped[int] = mapped_column(BigInteger, nullable=False, index=True)
+    """Telegram ID of the user who reviewed the card"""
+
+    word_id: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    """Word id of the reviewed card"""
+
+    count_of_views: Mapped[int] = mapped_column(Integer, nullable=False)
+    """Count of views of the card before the review"""
+
+    elapsed_seconds: Mapped[int] = mapped_column(Integer, nullable=False)
+    """Seconds between the previous view of the card and the review"""
+
+    passed: Mapped[bool] = mapped_column(Boolean, nullable=False)
+    """Whether the user remembered the word"""
+
+    reviewed_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    """Timestamp of the review"""
+
+    def __repr__(self) -> str:
+        return f"<ReviewLog(user_id={self.user_id}, word_id={self.word_id}, count_of_views={self.count_of_views}, passed={self.passed})>"
@@ -3,6 +3,7 @@
 from .abstract import Repository
 from .card import CardRepo, CardRetriever
 from .invoice import InvoiceRepo
+from .review_log import ReviewLogRepo
 from .sentence import SentenceRepo
 from .settings import SettingsRepo
 from .statistics import StatisticsRepo
@@ -21,6 +22,7 @@ __all__ = (
     "CardRetriever",
     "CardRepo",
     "InvoiceRepo",
+    "ReviewLogRepo",
     "SettingsRepo",
     "StatisticsRepo",
     "UserTextRepo",
@@ -1,10 +1,13 @@
 """Repository base file."""
 
-from collections.abc import Sequence
+from collections.abc import AsyncIterator, Callable, Mapping, Sequence
+from operator import itemgetter
 from typing import Any, Generic, TypeVar
 
-from sqlalchemy import delete, select
+from sqlalchemy import Row, Select, delete, select
+from sqlalchemy.dialects.postgresql import Insert, insert
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import InstrumentedAttribute
 from sqlalchemy.sql.elements import BinaryExpression, BooleanClauseList, ColumnElement
 from sqlalchemy.sql.expression import UnaryExpression
 
@@ -14,6 +17,34 @@ AbstractModel = TypeVar("AbstractModel", bound=Base)
 
 WhereClause = ColumnElement[bool] | BinaryExpression[bool] | BooleanClauseList
 
+DEFAULT_PAGE_SIZE = 1000
+# asyncpg allows 32767 bind parameters per statement
+DEFAULT_UPSERT_CHUNK = 1000
+
+
+def upsert_statement(
+    model: type[Base],
+    rows: Sequence[Mapping[str, Any]],
+    conflict_cols: Sequence[str] = (),
+    update_cols: Sequence[str] | None = None,
+) -> Insert:
+    """
+    Multi-row INSERT of `rows` with ON CONFLICT on `conflict_cols`.
+
+    Conflicting rows get `update_cols` from the new values, or are skipped
+    when there are none. Without `conflict_cols` the rows are plainly
+    inserted.
+    """
+    statement = insert(model).values(list(rows))
+    if not conflict_cols:
+        return statement
+    if not update_cols:
+        return statement.on_conflict_do_nothing(index_elements=conflict_cols)
+    return statement.on_conflict_do_update(
+        index_elements=conflict_cols,
+        set_={column: statement.excluded[column] for column in update_cols},
+    )
+
 
 class Repository(Generic[AbstractModel]):
     def __init__(self, type_model: type[AbstractModel], session: AsyncSession):
@@ -55,6 +86,151 @@ class Repository(Generic[AbstractModel]):
         statement = select(self.type_model).where(condition).limit(limit)
         return (await self.session.scalars(statement)).unique().all()
 
+    async def stream(
+        self,
+        condition: WhereClause | None = None,
+        key: InstrumentedAttribute[Any] | None = None,
+        page_size: int = DEFAULT_PAGE_SIZE,
+        options: list[Any] | None = None,
+    ) -> AsyncIterator[AbstractModel]:
+        """Stream every entity that meets the condition, ordered by `key`."""
+        async for page in self.iter_pages(condition, key, page_size, options):
+            for model in page:
+                yield model
+
+    async def iter_pages(
+        self,
+        condition: WhereClause | None = None,
+        key: InstrumentedAttribute[Any] | None = None,
+        page_size: int = DEFAULT_PAGE_SIZE,
+        options: list[Any] | None = None,
+        after: Any = None,
+    ) -> AsyncIterator[Sequence[AbstractModel]]:
+        """
+        Pages of entities that meet the condition, by keyset pagination.
+
+        Every page is a short query for up to `page_size` entities with `key`
+        (the primary key by default, it must be unique) greater than the last
+        one of the previous page. A scan of any size holds one page in memory
+        and no cursor stays open between pages, so eager loaded collections
+        work and the consumer may await other queries. Pass the last key seen
+        as `after` to resume a scan.
+        """
+        key = self._key(key)
+        statement = select(self.type_model)
+        if options:
+            statement = statement.options(*options)
+        async for rows in self._keyset_pages(
+            statement,
+            condition,
+            key,
+            page_size,
+            after,
+            last_key=lambda row: getattr(row[0], key.key),
+        ):
+            yield [row[0] for row in rows]
+
+    async def iter_row_pages(
+        self,
+        *columns: Any,
+        condition: WhereClause | None = None,
+        key: InstrumentedAttribute[Any] | None = None,
+        page_size: int = DEFAULT_PAGE_SIZE,
+        after: Any = None,
+    ) -> AsyncIterator[Sequence[Row[Any]]]:
+        """
+        Pages of raw rows of `columns`, by keyset pagination like `iter_pages`.
+
+        `key` must be one of the columns.
+        """
+        key = self._key(key)
+        positions = [index for index, column in enumerate(columns) if column is key]
+        if not positions:
+            raise ValueError(f"Key {key} must be one of the selected columns")
+        async for rows in self._keyset_pages(
+            select(*columns),
+            condition,
+            key,
+            page_size,
+            after,
+            last_key=itemgetter(positions[0]),
+        ):
+            yield rows
+
+    async def _keyset_pages(
+        self,
+        statement: Select[Any],
+        condition: WhereClause | None,
+        key: InstrumentedAttribute[Any],
+        page_size: int,
+        after: Any,
+        last_key: Callable[[Row[Any]], Any],
+    ) -> AsyncIterator[Sequence[Row[Any]]]:
+        statement = self._ordered(statement, condition, key).limit(page_size)
+        while True:
+            page_statement = statement
+            if after is not None:
+                page_statement = statement.where(key > after)
+            rows = (await self.session.execute(page_statement)).unique().all()
+            if not rows:
+                return
+            yield rows
+            if len(rows) < page_size:
+                return
+            after = last_key(rows[-1])
+
+    def _key(
+        self, key: InstrumentedAttribute[Any] | None
+    ) -> InstrumentedAttribute[Any]:
+        return key if key is not None else self.type_model.id
+
+    def _ordered(
+        self,
+        statement: Select[Any],
+        condition: WhereClause | None,
+        key: InstrumentedAttribute[Any] | None,
+    ) -> Select[Any]:
+        if condition is not None:
+            statement = statement.where(condition)
+        return statement.order_by(self._key(key))
+
+    async def bulk_upsert(
+        self,
+        rows: Sequence[Mapping[str, Any]],
+        conflict_cols: Sequence[str] = (),
+        update_cols: Sequence[str] | None = None,
+        returning: Sequence[Any] | None = None,
+        chunk_size: int = DEFAULT_UPSERT_CHUNK,
+        commit: bool = True,
+    ) -> list[Row[Any]]:
+        """
+        Insert or update many rows with one statement per chunk.
+
+        Unlike `session.merge()` there is no SELECT before the write, the
+        conflict is resolved by PostgreSQL (see `upsert_statement`). Rows
+        must have the same keys.
+
+        :param returning: Columns to return for every written row, rows
+            skipped on conflict are not returned.
+        :return: Rows of the `returning` columns.
+        """
+        returned: list[Row[Any]] = []
+        for start in range(0, len(rows), chunk_size):
+            statement = upsert_statement(
+                self.type_model,
+                rows[start : start + chunk_size],
+                conflict_cols,
+                update_cols,
+            )
+            if returning:
+                result = await self.session.execute(statement.returning(*returning))
+                returned.extend(result.all())
+            else:
+                await self.session.execute(statement)
+        if commit:
+            await self.session.commit()
+        return returned
+
     async def delete(self, condition: WhereClause) -> None:
         """Delete entities that meet the specified condition."""
         statement = delete(self.type_model).where(condition)
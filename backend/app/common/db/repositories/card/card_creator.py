@@ -5,13 +5,24 @@ This module handles the creation of user cards and insertion into the database.
 """
 
 import datetime
+from collections.abc import AsyncIterator, Callable, Sequence
 
+from sqlalchemy import BigInteger, DateTime, Row, column, func, insert, update, values
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 
-from ...models.card import Card
+from ...models.card import KNOWN_CARD_VIEWS, Card
 from ..abstract import Repository
 
+CardRow = Row[tuple[int, int, int, datetime.datetime, datetime.datetime | None]]
+"""Lightweight (user_id, word_id, count_of_views, last_view, next_review_at) card row."""
+
+DueTimeFn = Callable[[int, int], datetime.datetime]
+"""Maps (word_id, count_of_views) of a reviewed card to its next review time."""
+
+DEFAULT_STREAM_BATCH = 5000
+
 
 class NoCards(Exception):
     """Raised when there are no cards in the database"""
@@ -19,6 +30,12 @@ class NoCards(Exception):
     pass
 
 
+class CardsNotCreated(Exception):
+    """Raised when a batch of cards violates a database constraint"""
+
+    pass
+
+
 class CardRepo(Repository[Card]):
     def __init__(self, session: AsyncSession):
         super().__init__(type_model=Card, session=session)
@@ -34,18 +51,67 @@ class CardRepo(Repository[Card]):
         if last_view is None:
             last_view = datetime.datetime.now()
 
+        mastered = count_of_views >= KNOWN_CARD_VIEWS
         card = Card(
             user_id=user_id,
             count_of_views=count_of_views,
             word_id=word_id,
             last_view=last_view,
+            # new cards are due for the first review right away
+            next_review_at=None if mastered else last_view,
+            mastered=mastered,
         )
         self.session.add(card)
         await self.session.commit()
         return card
 
-    async def add_review(self, user_id: int, word_id: int) -> Card:
-        """Add a review for a word."""
+    async def create_cards(
+        self,
+        user_id: int,
+        cards: Sequence[tuple[int, int]],
+        last_view: datetime.datetime | None = None,
+    ) -> list[Card]:
+        """
+        Insert (word_id, count_of_views) cards in one multi-row INSERT.
+
+        The batch is committed as a whole. If any card breaks a constraint,
+        for example an unknown word or an existing card, nothing is inserted
+        and CardsNotCreated is raised.
+        """
+        if last_view is None:
+            last_view = datetime.datetime.now()
+
+        statement = (
+            insert(Card)
+            .values(
+                [
+                    {
+                        "user_id": user_id,
+                        "word_id": word_id,
+                        "count_of_views": count_of_views,
+                        "last_view": last_view,
+                        "next_review_at": (
+                            None if count_of_views >= KNOWN_CARD_VIEWS else last_view
+                        ),
+                        "mastered": count_of_views >= KNOWN_CARD_VIEWS,
+                    }
+                    for word_id, count_of_views in cards
+                ]
+            )
+            .returning(Card)
+        )
+        try:
+            created = list((await self.session.scalars(statement)).all())
+            await self.session.commit()
+        except IntegrityError as e:
+            await self.session.rollback()
+            raise CardsNotCreated(str(e.orig)) from e
+        return created
+
+    async def add_review(
+        self, user_id: int, word_id: int, schedule: DueTimeFn | None = None
+    ) -> Card:
+        """Add a review for a word, `schedule` sets its next review time."""
         result = await self.session.execute(
             select(Card).filter(Card.user_id == user_id, Card.word_id == word_id)
         )
@@ -53,5 +119,126 @@ class CardRepo(Repository[Card]):
         if card is None:
             raise NoCards("No card found for the specified user and word")
         card.count_of_views += 1
+        card.last_view = datetime.datetime.now()
+        card.mastered = card.count_of_views >= KNOWN_CARD_VIEWS
+        if card.mastered:
+            card.next_review_at = None
+        elif schedule is not None:
+            card.next_review_at = schedule(word_id, card.count_of_views)
         await self.session.commit()
         return card
+
+    async def add_reviews(
+        self,
+        user_id: int,
+        word_ids: Sequence[int],
+        schedule: DueTimeFn | None = None,
+    ) -> dict[int, int]:
+        """
+        Add a review for each of the words with one commit.
+
+        Views are counted in one UPDATE. With `schedule`, the next review
+        times, which depend on each card's new count, are written by a
+        second UPDATE joined to a VALUES list.
+
+        :return: word id -> new count of views, missing cards are left out
+        """
+        if not word_ids:
+            return {}
+        statement = (
+            update(Card)
+            .where(Card.user_id == user_id, Card.word_id.in_(word_ids))
+            .values(
+                count_of_views=Card.count_of_views + 1,
+                last_view=datetime.datetime.now(),
+                mastered=Card.count_of_views + 1 >= KNOWN_CARD_VIEWS,
+                next_review_at=None,
+            )
+            .returning(Card.word_id, Card.count_of_views)
+            .execution_options(synchronize_session="fetch")
+        )
+        result = await self.session.execute(statement)
+        counts = dict(result.tuples().all())
+
+        if schedule is not None:
+            scheduled = [
+                (word_id, schedule(word_id, count_of_views))
+                for word_id, count_of_views in counts.items()
+                if count_of_views < KNOWN_CARD_VIEWS
+            ]
+            if scheduled:
+                due = values(
+                    column("word_id", BigInteger),
+                    column("next_review_at", DateTime),
+                    name="due",
+                ).data(scheduled)
+                await self.session.execute(
+                    update(Card)
+                    .where(Card.user_id == user_id, Card.word_id == due.c.word_id)
+                    .values(next_review_at=due.c.next_review_at)
+                    .execution_options(synchronize_session=False)
+                )
+        await self.session.commit()
+        return counts
+
+    async def count_due_cards(self, due_before: datetime.datetime) -> dict[int, int]:
+        """
+        Count cards due before the given time for every user with due cards.
+
+        Served by the partial index on next_review_at of not mastered cards.
+
+        :return: user id -> count of due cards
+        """
+        result = await self.session.execute(
+            select(Card.user_id, func.count())
+            .where(~Card.mastered, Card.next_review_at < due_before)
+            .group_by(Card.user_id)
+        )
+        return dict(result.tuples().all())
+
+    async def stream_cards_by_user(
+        self,
+        batch_size: int = DEFAULT_STREAM_BATCH,
+        viewed_since: datetime.datetime | None = None,
+        user_id: int | None = None,
+    ) -> AsyncIterator[tuple[int, list[CardRow]]]:
+        """
+        Stream every card grouped by user in a single ordered query.
+
+        Rows are fetched through a server-side cursor in batches of
+        `batch_size`, so memory is bounded by the largest user's cards
+        rather than by the whole table. `viewed_since` limits the scan to
+        cards whose last view is not older than the given time and `user_id`
+        to a single user.
+        """
+        statement = (
+            select(
+                Card.user_id,
+                Card.word_id,
+                Card.count_of_views,
+                Card.last_view,
+                Card.next_review_at,
+            )
+            .order_by(Card.user_id, Card.word_id)
+            .execution_options(yield_per=batch_size)
+        )
+        if viewed_since is not None:
+            statement = statement.where(Card.last_view >= viewed_since)
+        if user_id is not None:
+            statement = statement.where(Card.user_id == user_id)
+        connection = await self.session.connection()
+        result = await connection.stream(statement)
+
+        current_user: int | None = None
+        user_cards: list[CardRow] = []
+        async for partition in result.partitions():
+            for row in partition:
+                if row.user_id != current_user:
+                    if current_user is not None:
+                        yield current_user, user_cards
+                    current_user = row.user_id
+                    user_cards = []
+                user_cards.append(row)
+
+        if current_user is not None:
+            yield current_user, user_cards
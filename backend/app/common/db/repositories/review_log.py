@@ -0,0 +1,97 @@
+"""review_log.py
+
+This module contains the repository for the log of review outcomes.
+"""
+
+import datetime
+from collections.abc import Sequence
+
+from sqlalchemy import (
+    BigInteger,
+    Boolean,
+    DateTime,
+    Integer,
+    cast,
+    column,
+    func,
+    insert,
+    literal,
+    select,
+    values,
+)
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..models import Card, ReviewLog
+from .abstract import Repository
+
+ReviewOutcome = tuple[int, int, int, bool]
+"""(user_id, count_of_views, elapsed_seconds, passed) of a logged review."""
+
+
+class ReviewLogRepo(Repository[ReviewLog]):
+    """
+    Repository for the review outcomes log.
+    """
+
+    def __init__(self, session: AsyncSession):
+        super().__init__(type_model=ReviewLog, session=session)
+
+    async def add_reviews(
+        self,
+        user_id: int,
+        reviews: Sequence[tuple[int, bool]],
+        commit: bool = True,
+    ) -> None:
+        """
+        Log (word_id, passed) reviews of the user's cards in one INSERT.
+
+        The count of views and the time since the last view are taken from
+        the cards, so the log must be written before the cards are updated.
+        Without `commit` the rows are committed with the card update.
+        """
+        if not reviews:
+            return
+        now = datetime.datetime.now()
+        outcome = values(
+            column("word_id", BigInteger),
+            column("passed", Boolean),
+            name="outcome",
+        ).data(list(reviews))
+        elapsed = func.extract("epoch", literal(now, DateTime) - Card.last_view)
+        await self.session.execute(
+            insert(ReviewLog).from_select(
+                [
+                    "user_id",
+                    "word_id",
+                    "count_of_views",
+                    "elapsed_seconds",
+                    "passed",
+                    "reviewed_at",
+                ],
+                select(
+                    Card.user_id,
+                    Card.word_id,
+                    Card.count_of_views,
+                    cast(elapsed, Integer),
+                    outcome.c.passed,
+                    literal(now, DateTime),
+                ).where(Card.user_id == user_id, Card.word_id == outcome.c.word_id),
+            )
+        )
+        if commit:
+            await self.session.commit()
+
+    async def get_outcomes(
+        self, since: datetime.datetime | None = None
+    ) -> list[ReviewOutcome]:
+        """Logged reviews, ordered by user, optionally only the recent ones"""
+        statement = select(
+            ReviewLog.user_id,
+            ReviewLog.count_of_views,
+            ReviewLog.elapsed_seconds,
+            ReviewLog.passed,
+        ).order_by(ReviewLog.user_id, ReviewLog.id)
+        if since is not None:
+            statement = statement.where(ReviewLog.reviewed_at >= since)
+        result = await self.session.execute(statement)
+        return list(result.tuples().all())
@@ -6,6 +6,8 @@ and SQL queries related to Sentence.
 """
 
 import logging
+from collections.abc import Mapping, Sequence
+from typing import Any
 
 from sqlalchemy.ext.asyncio import AsyncSession
 
@@ -27,40 +29,54 @@ class SentenceRepo(Repository[Sentence]):
         # Encapsulate session to make it private.
         self._session: AsyncSession = session
 
-    async def create(self, sentence: str, translation: str, word_id: int) -> None:
+    async def create(
+        self,
+        sentence: str,
+        translation: str,
+        word_id: int,
+        cyrillic_sentence: str = "",
+    ) -> None:
         """
         Create a new Sentence entry in the database.
 
         Args:
-            sentence (str): The sentence text.
+            sentence (str): The sentence text in Latin.
             translation (str): The translation of the sentence.
             word_id (int): The ID of the related word.
+            cyrillic_sentence (str): The sentence text in Cyrillic.
         """
-        new_sentence: Sentence = self._build_sentence(sentence, translation, word_id)
-        await self._save_sentence(new_sentence)
+        await self.create_many(
+            [self._build_sentence(sentence, translation, word_id, cyrillic_sentence)]
+        )
 
-    def _build_sentence(
-        self, sentence: str, translation: str, word_id: int
-    ) -> Sentence:
+    async def create_many(self, sentences: Sequence[Mapping[str, Any]]) -> None:
         """
-        Helper method to build a Sentence object.
+        Insert many sentences with one statement per chunk.
 
         Args:
-            sentence (str): The sentence text.
-            translation (str): The translation of the sentence.
-            word_id (int): The ID of the related word.
-
-        Returns:
-            Sentence: The constructed Sentence object.
+            sentences: Values of the Sentence columns of every sentence.
         """
-        return Sentence(sentence=sentence, translation=translation, word_id=word_id)
+        logging.info(f"Saving {len(sentences)} sentences")
+        await self.bulk_upsert(sentences, commit=False)
 
-    async def _save_sentence(self, sentence: Sentence) -> None:
+    def _build_sentence(
+        self, sentence: str, translation: str, word_id: int, cyrillic_sentence: str
+    ) -> dict[str, Any]:
         """
-        Save the sentence to the database using merge.
+        Helper method to build values of a Sentence row.
 
         Args:
-            sentence (Sentence): The sentence object to be saved.
+            sentence (str): The sentence text in Latin.
+            translation (str): The translation of the sentence.
+            word_id (int): The ID of the related word.
+            cyrillic_sentence (str): The sentence text in Cyrillic.
+
+        Returns:
+            dict: Values of the Sentence columns.
         """
-        logging.info(f"Saving sentence: {sentence}")
-        await self._session.merge(sentence)
+        return {
+            "latin_text": sentence,
+            "native_text": translation,
+            "cyrilic_text": cyrillic_sentence,
+            "word_id": word_id,
+        }
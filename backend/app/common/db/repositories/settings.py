@@ -25,18 +25,21 @@ class SettingsRepo(Repository[Settings]):
         :param user_id: The ID of the user whose settings are being updated.
         :param spoiler_value: The new value for the user's spoiler settings.
         """
-        await self._merge_settings(user_id, spoiler_value)
+        await self._upsert_settings(user_id, spoiler_value)
         await self._commit_session()
 
-    async def _merge_settings(self, user_id: int, spoiler_value: int) -> None:
+    async def _upsert_settings(self, user_id: int, spoiler_value: int) -> None:
         """
-        Merges new or updated settings into the session.
+        Inserts the settings or updates the spoiler value of existing ones.
 
-        :param user_id: The ID of the user whose settings are being merged.
+        :param user_id: The ID of the user whose settings are being upserted.
         :param spoiler_value: The value to set for the user's spoiler settings.
         """
-        await self.session.merge(
-            Settings(user_id=user_id, spoiler_settings=spoiler_value)
+        await self.bulk_upsert(
+            [{"user_id": user_id, "spoiler_settings": spoiler_value}],
+            conflict_cols=["user_id"],
+            update_cols=["spoiler_settings"],
+            commit=False,
         )
 
     async def _commit_session(self) -> None:
@@ -43,8 +43,7 @@ class StatisticsRepo(Repository[Statistic]):
         Args:
             user_id (int): The user's unique identifier.
         """
-        await self._session.merge(Statistic(user_id=user_id))
-        await self._session.commit()
+        await self.bulk_upsert([{"user_id": user_id}], conflict_cols=["user_id"])
 
     async def _update_daily_statistic(self, user_id: int, field_name: str) -> None:
         """
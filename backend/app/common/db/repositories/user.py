@@ -91,6 +91,17 @@ class UserRepo(Repository[User]):
             raise NoUsersFound("No users found in the database.")
         return users_list
 
+    async def get_all_user_ids(self) -> list[int]:
+        """
+        Retrieve the Telegram IDs of all users without loading relationships.
+
+        Returns:
+            List[int]: Telegram IDs of all users.
+        """
+        statement = select(self.type_model.telegram_id)
+        result = await self.session.execute(statement)
+        return list(result.scalars().all())
+
     async def _fetch_all_users(self) -> list[User]:
         """
         Helper method to fetch all users from the database.
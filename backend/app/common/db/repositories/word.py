@@ -1,10 +1,11 @@
+from collections.abc import Iterable
 from dataclasses import dataclass
 
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from sqlalchemy.orm import joinedload
+from sqlalchemy.orm import joinedload, selectinload
 
-from ..models import Word
+from ..models import ContentVersion, Word
 from .abstract import Repository
 
 """
@@ -35,27 +36,37 @@ class WordRepo(Repository[Word]):
         """
         Add a new word to the database using the provided WordData.
 
+        An existing word with the same foreign word is updated.
+
         :param word_data: Data required to create a new Word entity
         """
-        word = self._create_word_entity(word_data)
-        await self.session.merge(word)
-        await self.session.commit()
+        await self.create_many([word_data])
 
-    def _create_word_entity(self, word_data: WordData) -> Word:
+    async def create_many(self, words: Iterable[WordData]) -> None:
         """
-        Create and return a Word entity from the given WordData.
+        Add or update many words with one statement per chunk.
 
-        This method encapsulates the creation logic and ensures separation of concerns.
+        :param words: Data of the words, unique by foreign word
+        """
+        await self.bulk_upsert(
+            [self._word_row(word_data) for word_data in words],
+            conflict_cols=["latin_word"],
+            update_cols=["native_word", "image", "cyrillic_word"],
+        )
+
+    def _word_row(self, word_data: WordData) -> dict[str, str | None]:
+        """
+        Map the given WordData to columns of the word table.
 
         :param word_data: The data used to create a new Word entity
-        :return: Word entity
+        :return: Values of the Word columns
         """
-        return Word(
-            native_word=word_data.native_word,
-            foreign_word=word_data.foreign_word,
-            image=word_data.image,
-            cyrillic_word=word_data.cyrillic_representation,
-        )
+        return {
+            "native_word": word_data.native_word,
+            "latin_word": word_data.foreign_word,
+            "image": word_data.image,
+            "cyrillic_word": word_data.cyrillic_representation,
+        }
 
     async def get_new_words(self, last_word_id: int, limit: int = 5) -> list[Word]:
         """
@@ -74,3 +85,27 @@ class WordRepo(Repository[Word]):
             .limit(limit)
         )
         return list(query.unique().scalars().all())
+
+    async def get_all_with_sentences(self) -> list[Word]:
+        """
+        Get every word ordered by id with its sentences loaded in one extra query.
+
+        :return: List of all Word entities with sentences
+        """
+        query = await self.session.execute(
+            select(Word).options(selectinload(Word.sentences)).order_by(Word.id)
+        )
+        return list(query.scalars().all())
+
+    async def get_content_version(self) -> int:
+        """
+        Get the version of the words content.
+
+        Triggers on the words and sentences tables increment it with any
+        insert, update or delete, so a copy of the content is checked for
+        staleness by reading one row.
+
+        :return: Count of statements that changed words or sentences
+        """
+        query = await self.session.execute(select(ContentVersion.version))
+        return query.scalar_one()
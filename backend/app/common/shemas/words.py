@@ -1,11 +1,13 @@
+from collections.abc import Iterable
 from datetime import datetime
 from typing import TYPE_CHECKING
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field, field_validator
 
 if TYPE_CHECKING:
     from app.common.db.models.sentence import Sentence
     from app.common.db.models.word import Word
+    from app.words.catalog import CatalogSentence, CatalogWord
 
 
 class ReviewRequest(BaseModel):
@@ -18,6 +20,39 @@ class ReviewResponse(BaseModel):
     message: str
 
 
+MAX_REVIEWS_BATCH = 100
+
+
+class ReviewsRequest(BaseModel):
+    reviews: list[ReviewRequest] = Field(min_length=1, max_length=MAX_REVIEWS_BATCH)
+
+    @field_validator("reviews")
+    @classmethod
+    def check_idempotency_keys(
+        cls, reviews: list[ReviewRequest]
+    ) -> list[ReviewRequest]:
+        """A key repeated in the batch must repeat the same review"""
+        first_reviews: dict[str, ReviewRequest] = {}
+        for review in reviews:
+            first = first_reviews.setdefault(review.idempotency_key, review)
+            if review != first:
+                raise ValueError(
+                    f"Idempotency key {review.idempotency_key!r} reused for another review"
+                )
+        return reviews
+
+
+class ReviewResult(BaseModel):
+    word_id: int
+    idempotency_key: str
+    status_code: int
+    message: str
+
+
+class ReviewsResponse(BaseModel):
+    results: list[ReviewResult]
+
+
 class SentenceResponce(BaseModel):
     id: int
     native_text: str
@@ -25,7 +60,9 @@ class SentenceResponce(BaseModel):
     latin_text: str
 
     @classmethod
-    def from_db_model(cls, db_sentence: "Sentence") -> "SentenceResponce":
+    def from_db_model(
+        cls, db_sentence: "Sentence | CatalogSentence"
+    ) -> "SentenceResponce":
         """Convert a Sentence DB model to SentenceResponce schema."""
         return cls(
             id=db_sentence.id,
@@ -44,12 +81,12 @@ class WordResponse(BaseModel):
     sentences: list[SentenceResponce] | None = None
 
     @classmethod
-    def from_db_model(cls, db_word: "Word") -> "WordResponse":
+    def from_db_model(cls, db_word: "Word | CatalogWord") -> "WordResponse":
         """Convert a Word DB model to WordResponse schema."""
         return cls(
             word_id=db_word.id,
             latin_word=db_word.latin_word,
-            cyrillic_word=db_word.cyrillic_word,
+            cyrillic_word=db_word.cyrillic_word or "",
             native_word=db_word.native_word,
             legend=db_word.legend,
             sentences=[
@@ -64,6 +101,11 @@ class WordResponse(BaseModel):
 class WordsResponse(BaseModel):
     words: list[WordResponse]
 
+    @staticmethod
+    def join_json(words_json: Iterable[bytes]) -> bytes:
+        """Build WordsResponse JSON from already encoded WordResponse objects."""
+        return b'{"words":[' + b",".join(words_json) + b"]}"
+
 
 class NewCardRequest(BaseModel):
     known: bool
@@ -76,3 +118,15 @@ class NewCardResponce(BaseModel):
     count_of_views: int
     last_view: datetime
     msg: str = "Word card created successfully"
+
+
+MAX_NEW_CARDS_BATCH = 100
+
+
+class NewCardsRequest(BaseModel):
+    cards: list[NewCardRequest] = Field(min_length=1, max_length=MAX_NEW_CARDS_BATCH)
+
+
+class NewCardsResponce(BaseModel):
+    cards: list[NewCardResponce]
+    msg: str = "Word cards created successfully"
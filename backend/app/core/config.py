@@ -83,10 +83,38 @@ class Settings(BaseSettings):
             )
         )
 
+    # Pool of the engine shared by the API, the bot handlers and background tasks
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_RECYCLE_SECONDS: int = 1800
+
     EMAIL_RESET_TOKEN_EXPIRE_HOURS: int = 48
 
     BOT_TOKEN: str
     TELEGRAM_TESTING: bool
+    # Connections to the Bot API kept open by the shared bot
+    BOT_CONNECTION_LIMIT: int = 100
+    BOT_KEEPALIVE_SECONDS: float = 60.0
+    # Acknowledge webhook updates at once and handle them in background
+    # workers, in order within a chat
+    WEBHOOK_QUEUE: bool = False
+    WEBHOOK_WORKERS: int = 8
+    WEBHOOK_QUEUE_SIZE: int = 1000
+    WEBHOOK_DRAIN_SECONDS: float = 10.0
+    # Drop updates of types without handlers before parsing them
+    WEBHOOK_SKIP_UNHANDLED: bool = True
+    # Send bot messages from a queue within Telegram's rate limits, and
+    # admin notifications as a digest per interval
+    BOT_OUTBOX: bool = False
+    BOT_MESSAGES_PER_SECOND: float = 30.0
+    BOT_CHAT_MESSAGES_PER_SECOND: float = 1.0
+    BOT_CHAT_BURST: int = 3
+    BOT_SEND_RETRIES: int = 3
+    BOT_DIGEST_SECONDS: float = 60.0
+    # Drop updates Telegram delivers again, remembering the last update ids
+    # in memory, or for a while in Redis with the redis states backend
+    WEBHOOK_DEDUP_WINDOW: int = 4096
+    WEBHOOK_DEDUP_TTL_SECONDS: int = 60 * 60
     URL_TO_GIT_FILES: AnyUrl | None = None
 
     @computed_field
@@ -102,6 +130,38 @@ class Settings(BaseSettings):
 
     ADMIN_TG_ID: int | None = None
 
+    # Users states snapshot for warm restarts, disabled when no path is set
+    STATES_SNAPSHOT_PATH: str | None = None
+    STATES_SNAPSHOT_INTERVAL_SECONDS: int = 300
+
+    # Load users states on first request instead of at startup and keep
+    # only recently active users in memory
+    USER_STATES_LAZY: bool = False
+    USER_STATES_MAX_SIZE: int = 10000
+    USER_STATES_MAX_IDLE_SECONDS: int = 6 * 60 * 60
+    # Store users states in bitmaps and arrays instead of sorted containers
+    COMPACT_USER_PROFILES: bool = False
+    # How often due cards are moved to users review queues
+    DUE_SCHEDULER_INTERVAL_SECONDS: float = 1.0
+    # Keep users states in Redis so several workers share them
+    STATES_BACKEND: Literal["memory", "redis"] = "memory"
+    REDIS_URL: str = "redis://localhost:6379/0"
+    # Serve words from an in-process catalog, checked for changes periodically
+    WORD_CATALOG: bool = True
+    WORD_CATALOG_REFRESH_SECONDS: float = 60.0
+    # Schedule reviews with the fixed interval table or the memory model,
+    # whose parameters are fitted by app/scripts/fit_memory_model.py
+    REVIEW_SCHEDULER: Literal["table", "memory"] = "table"
+    REVIEW_MODEL_PATH: str | None = None
+    REVIEW_RETENTION: float = 0.9
+    # Log review outcomes the memory model is fitted on, an extra INSERT per
+    # review, so enable it to collect reviews before using the memory model
+    REVIEW_LOG: bool = False
+    # Spread due times of cards reviewed together: jitter intervals by up to
+    # this fraction and limit cards a user has due per day
+    REVIEW_FUZZ: float = 0.0
+    REVIEW_DAILY_CAP: int | None = None
+
     def _check_default_secret(self, var_name: str, value: str | None) -> None:
         if value == "changethis":
             message = (
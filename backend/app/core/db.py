@@ -1,10 +1,21 @@
-from sqlalchemy.ext.asyncio import create_async_engine
+"""
+Engine and session factory shared by the whole process.
+
+Every request, bot update and background task takes its connections from
+this one pool. The FastAPI lifespan disposes the engine on shutdown.
+"""
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 
 from app.core.config import settings
 
 engine = create_async_engine(
     str(settings.ASYNC_SQLALCHEMY_DATABASE_URI),
-    pool_size=20,
-    max_overflow=10,
-    pool_recycle=3600,  # recycle connections after 1 hour
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=settings.DB_MAX_OVERFLOW,
+    pool_recycle=settings.DB_POOL_RECYCLE_SECONDS,
+)
+
+async_session_factory = async_sessionmaker(
+    engine, class_=AsyncSession, expire_on_commit=False
 )
@@ -1,7 +1,8 @@
 """Main FastAPI application."""
 
-from collections.abc import AsyncGenerator
-from contextlib import asynccontextmanager
+import asyncio
+from collections.abc import AsyncGenerator, AsyncIterator, Coroutine
+from contextlib import AsyncExitStack, asynccontextmanager, suppress
 from typing import Any
 
 import sentry_sdk
@@ -10,21 +11,125 @@ from fastapi.openapi.utils import get_openapi
 from fastapi.routing import APIRoute
 from idempotency_header_middleware import IdempotencyHeaderMiddleware
 from idempotency_header_middleware.backends import MemoryBackend
+from redis.asyncio import Redis
 from starlette.middleware.cors import CORSMiddleware
 
+from app.api.bot.main import outbox, update_queue
+from app.api.deps import get_bot_instance
 from app.api.main import api_router
+from app.common.cache import users_states
+from app.common.cache.backend import RedisStatesBackend
+from app.common.cache.scheduler import due_scheduler
+from app.common.cache.snapshot import save_snapshot, snapshot_periodically
+from app.common.cache.updates import RedisDeduplicator
+from app.common.db import Database
 from app.core.config import settings
+from app.core.db import async_session_factory, engine
 from app.scripts.set_up_bot import set_up_bot as set_telegram_bot
-from app.states import get_users_states
+from app.states import get_users_states, load_user_state
 from app.utils.logger import logger
+from app.words import word_catalog
 
 
 @asynccontextmanager
-async def set_up(app: FastAPI) -> AsyncGenerator[None, None]:  # noqa
+async def set_up(app: FastAPI) -> AsyncGenerator[None, None]:
     """Set up user states."""
-    await set_telegram_bot(mode=settings.ENVIRONMENT)
-    await get_users_states()
-    yield
+    bot = get_bot_instance()
+    async with AsyncExitStack() as stack:
+        # run last, after background tasks using them are stopped
+        stack.push_async_callback(engine.dispose)
+        stack.push_async_callback(bot.session.close)
+        await set_telegram_bot(mode=settings.ENVIRONMENT, bot=bot)
+        if settings.WORD_CATALOG:
+            async with async_session_factory() as session:
+                await word_catalog.refresh(Database(session=session))
+            await stack.enter_async_context(
+                run_in_background(
+                    word_catalog.run(
+                        async_session_factory, settings.WORD_CATALOG_REFRESH_SECONDS
+                    )
+                )
+            )
+
+        if settings.STATES_BACKEND == "redis":
+            redis = Redis.from_url(settings.REDIS_URL)
+            stack.push_async_callback(redis.aclose)
+            app.state.states_backend = RedisStatesBackend(
+                redis,
+                loader=load_user_state,
+                ttl=settings.USER_STATES_MAX_IDLE_SECONDS,
+            )
+            app.state.update_deduplicator = RedisDeduplicator(
+                redis, ttl=settings.WEBHOOK_DEDUP_TTL_SECONDS
+            )
+            await start_bot_queues(stack)
+            yield
+            return
+
+        if settings.USER_STATES_LAZY:
+            users_states.configure(
+                loader=load_user_state,
+                max_size=settings.USER_STATES_MAX_SIZE,
+                max_idle=settings.USER_STATES_MAX_IDLE_SECONDS,
+            )
+        else:
+            snapshot_path = settings.STATES_SNAPSHOT_PATH
+            await get_users_states(snapshot_path=snapshot_path)
+            due_scheduler.track_all()
+            if snapshot_path is not None:
+                # callbacks run in reverse, the final snapshot is saved
+                # after the periodic snapshot task is stopped
+                stack.push_async_callback(save_snapshot, snapshot_path, users_states)
+                await stack.enter_async_context(
+                    run_in_background(
+                        snapshot_periodically(
+                            snapshot_path,
+                            users_states,
+                            settings.STATES_SNAPSHOT_INTERVAL_SECONDS,
+                        )
+                    )
+                )
+
+        await stack.enter_async_context(
+            run_in_background(
+                due_scheduler.run(settings.DUE_SCHEDULER_INTERVAL_SECONDS)
+            )
+        )
+        await start_bot_queues(stack)
+        yield
+
+
+async def start_bot_queues(stack: AsyncExitStack) -> None:
+    """
+    Handle webhook updates in background workers when WEBHOOK_QUEUE is set,
+    and send bot messages from the outbox when BOT_OUTBOX is set.
+
+    Entered last, so queued updates are drained before anything their
+    handlers use is closed, and the outbox after the updates which queue
+    messages to it.
+    """
+    if settings.BOT_OUTBOX:
+        await stack.enter_async_context(
+            outbox.run(drain_timeout=settings.WEBHOOK_DRAIN_SECONDS)
+        )
+    if settings.WEBHOOK_QUEUE:
+        await stack.enter_async_context(
+            update_queue.run(drain_timeout=settings.WEBHOOK_DRAIN_SECONDS)
+        )
+
+
+@asynccontextmanager
+async def run_in_background(
+    coroutine: Coroutine[Any, Any, None],
+) -> AsyncIterator[None]:
+    """Run a coroutine as a task and cancel it on exit."""
+    task = asyncio.create_task(coroutine)
+    try:
+        yield
+    finally:
+        task.cancel()
+        with suppress(asyncio.CancelledError):
+            await task
 
 
 def custom_generate_unique_id(route: APIRoute) -> str:
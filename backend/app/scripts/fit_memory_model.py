@@ -0,0 +1,58 @@
+"""Script to fit memory model parameters on logged review outcomes.
+
+Run it periodically, e.g. nightly, and point REVIEW_MODEL_PATH at its output;
+the app loads the parameters when it starts.
+
+    python -m app.scripts.fit_memory_model [output path] [days of reviews]
+"""
+
+import asyncio
+import datetime
+import sys
+
+from app.common.db import Database
+from app.core.config import settings
+from app.core.db import async_session_factory
+from app.utils.logger import setup_logger
+from app.utils.memory_model import MemoryParams, fit_memory_model, save_params
+
+logger = setup_logger(__name__)
+
+DEFAULT_OUTPUT_PATH = "memory_model.json"
+
+
+async def fit_from_database(
+    db: Database, since: datetime.datetime | None = None
+) -> tuple[MemoryParams, dict[int, MemoryParams]]:
+    """Fit global and per user parameters on the review log"""
+    outcomes = await db.review_log.get_outcomes(since=since)
+    logger.info("Fitting memory model on %s reviews", len(outcomes))
+    if not outcomes:
+        return MemoryParams(), {}
+    user_ids, count_of_views, elapsed_seconds, passed = zip(*outcomes, strict=True)
+    return fit_memory_model(user_ids, count_of_views, elapsed_seconds, passed)
+
+
+async def main(output_path: str, days: int | None = None) -> None:
+    since = None
+    if days is not None:
+        since = datetime.datetime.now() - datetime.timedelta(days=days)
+    async with async_session_factory() as session:
+        params, user_params = await fit_from_database(Database(session), since)
+    save_params(output_path, params, user_params)
+    logger.info(
+        "Saved memory model %s with %s users parameters to %s",
+        params,
+        len(user_params),
+        output_path,
+    )
+
+
+if __name__ == "__main__":
+    output_path = (
+        sys.argv[1]
+        if len(sys.argv) > 1
+        else settings.REVIEW_MODEL_PATH or DEFAULT_OUTPUT_PATH
+    )
+    days = int(sys.argv[2]) if len(sys.argv) > 2 else None
+    asyncio.run(main(output_path, days))
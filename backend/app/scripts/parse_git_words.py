@@ -7,6 +7,7 @@ from sqlalchemy.orm import Session, sessionmaker
 
 from app.common.db.models import Word
 from app.common.db.models.sentence import Sentence
+from app.common.db.repositories.abstract import DEFAULT_UPSERT_CHUNK, upsert_statement
 from app.core.config import Settings, settings
 from app.utils.logger import setup_logger
 
@@ -41,21 +42,31 @@ class GitWordParser:
     def save_words_to_db(self) -> None:
         words_text = self.get_words_from_git()
         parsed_data = yaml.safe_load(words_text)
+        rows = [
+            {
+                "id": id,
+                "native_word": item["translation"],
+                "latin_word": item["serbian_word"]["Latin"],
+                "cyrillic_word": item["serbian_word"]["Cyrillic"],
+            }
+            for id, item in parsed_data.items()
+        ]
         Session = self.create_db_connection()
         with Session() as session:
-            for id, item in parsed_data.items():
-                word_data = Word(
-                    id=id,
-                    native_word=item["translation"],
-                    foreign_word=item["serbian_word"]["Latin"],
-                    cyrillic_word=item["serbian_word"]["Cyrillic"],
-                )
-                try:
-                    session.add(word_data)
-                    session.commit()
-                except SQLAlchemyError as e:
-                    logger.error(f"Database error: {e}")
-                    break
+            try:
+                for start in range(0, len(rows), DEFAULT_UPSERT_CHUNK):
+                    session.execute(
+                        upsert_statement(
+                            Word,
+                            rows[start : start + DEFAULT_UPSERT_CHUNK],
+                            conflict_cols=["id"],
+                            update_cols=["native_word", "latin_word", "cyrillic_word"],
+                        )
+                    )
+                session.commit()
+            except SQLAlchemyError as e:
+                logger.error(f"Database error: {e}")
+                session.rollback()
 
     def update_word_in_db(self) -> None:
         words_text = self.get_words_from_git()
@@ -1,9 +1,11 @@
 import asyncio
+from typing import cast
 
 from aiogram import Bot
 from aiogram.client.telegram import TEST
 from aiogram.types import MenuButtonWebApp, WebAppInfo  # added missing imports
 
+from app.api.bot.client import create_bot
 from app.core.config import settings
 from app.utils.logger import setup_logger
 
@@ -90,13 +92,20 @@ async def set_telegram_web_app_mini_url(bot: Bot) -> bool:
     return False
 
 
-async def set_up_bot(mode: str) -> None:
-    bot = Bot(token=settings.BOT_TOKEN)
-    try:
-        if mode == "local":
-            bot.session.api = TEST
+async def set_up_bot(mode: str, bot: Bot | None = None) -> None:
+    """
+    Set the webhook and the menu button.
 
-        else:
+    `bot` is the app's shared bot, which is left open. A bot of its own is
+    created and closed otherwise, and always in local mode, which talks to
+    the test Bot API.
+    """
+    own_bot = bot is None or mode == "local"
+    if own_bot:
+        bot = create_bot(api=TEST if mode == "local" else None)
+    bot = cast(Bot, bot)
+    try:
+        if mode != "local":
             await delete_telegram_webhook(bot)
             await asyncio.sleep(1)
             await set_telegram_webhook(bot)
@@ -107,8 +116,9 @@ async def set_up_bot(mode: str) -> None:
         logger.error(str(e))
 
     finally:
-        await bot.session.close()
-        logger.info("Bot session closed")
+        if own_bot:
+            await bot.session.close()
+            logger.info("Bot session closed")
 
 
 if __name__ == "__main__":
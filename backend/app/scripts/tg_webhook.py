@@ -1,9 +1,9 @@
 import asyncio
 
 from aiogram import Bot
-from aiogram.client.telegram import TEST
 from aiogram.types import MenuButtonWebApp, WebAppInfo  # added missing imports
 
+from app.api.bot.client import create_bot
 from app.core.config import settings
 from app.utils.logger import logger
 
@@ -63,11 +63,8 @@ async def set_telegram_web_app_url(bot: Bot) -> bool:
 
 async def set_up_bot() -> None:
     try:
-        bot = Bot(token=settings.BOT_TOKEN)
-        if settings.TELEGRAM_TESTING:
-            bot.session.api = TEST
-
-        else:
+        bot = create_bot()
+        if not settings.TELEGRAM_TESTING:
             await delete_telegram_webhook(bot)
             await asyncio.sleep(1)
             await set_telegram_webhook(bot)
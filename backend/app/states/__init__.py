@@ -1,3 +1,3 @@
-from .user import get_users_states
+from .user import get_users_states, load_user_state
 
-__all__ = ["get_users_states"]
+__all__ = ["get_users_states", "load_user_state"]
@@ -1,44 +1,30 @@
 from collections.abc import Callable, Sequence
-from datetime import datetime, timedelta
+from datetime import datetime
+from pathlib import Path
+from typing import cast
 
-from sortedcontainers import SortedDict, SortedList  # type: ignore
+from sortedcontainers import SortedSet  # type: ignore
 
-from app.api.deps import async_session_factory
-from app.common.cache.states import UserProfile, users_states
+from app.api.deps import get_due_smoothing
+from app.common.cache.compact import CompactUserProfile
+from app.common.cache.review_queue import ReviewQueue
+from app.common.cache.schedule import ReviewSchedule
+from app.common.cache.snapshot import SnapshotError, read_snapshot
+from app.common.cache.states import ProfileFactory, UserProfile, users_states
 from app.common.db import Database
-from app.common.db.models.card import Card
-from app.common.db.repositories.user import NoUsersFound
+from app.common.db.models.card import KNOWN_CARD_VIEWS, Card
+from app.common.db.repositories.card.card_creator import CardRow
+from app.core.config import settings
+from app.core.db import async_session_factory
+from app.utils.logger import logger
+from app.utils.scheduling import HYDRATION_INTERVALS, DueSmoothing, IntervalTable
 
 
 def review_algorithm(
     review_date: datetime, checks: int, passed: bool = True
 ) -> datetime:
     """Algorithm which define next review date"""
-    # values which define how many minutes should pass before next review
-    values = {
-        1: 20,
-        2: 40,
-        3: 120,
-        4: 240,
-        5: 960,
-        6: 3840,
-        7: 15360,
-        8: 61440,
-        9: 245760,
-        10: 983040,
-    }
-    if passed:
-        if checks > 10:
-            next_review = review_date + timedelta(minutes=values[10])
-        else:
-            next_review = review_date + timedelta(minutes=values[min(checks + 1, 10)])
-    else:
-        if checks < 3:
-            next_review = review_date + timedelta(minutes=values[1])
-        else:
-            next_review = review_date + timedelta(minutes=values[checks - 3])
-
-    return next_review
+    return HYDRATION_INTERVALS.next_review(review_date, checks, passed)
 
 
 class StatesCreator:
@@ -49,82 +35,234 @@ class StatesCreator:
         db: Database,
         review_func: Callable[[datetime, int, bool], datetime],
         cache: dict[int, UserProfile],
+        profile_factory: ProfileFactory = UserProfile,
+        interval_table: IntervalTable | None = None,
+        smoothing: DueSmoothing | None = None,
     ) -> None:
         self.cache = cache
         self.db = db
         self.review_algorithm = review_func
+        self.profile_factory = profile_factory
+        # schedules cards without a stored due time in one vectorized call
+        self.interval_table = interval_table
+        # spreads due times computed for cards without a stored one
+        self.smoothing = smoothing
 
     async def create_states(self) -> dict[int, UserProfile]:
-        try:
-            users = await self.db.user.get_all_users()
-        except NoUsersFound:
+        """Hydrate all users from a single streamed, user-ordered card scan"""
+        user_ids = await self.db.user.get_all_user_ids()
+        if not user_ids:
             return self.cache
 
-        for user in users:
-            telegram_id = user.telegram_id
-            created_cards = await self.db.card.fetch_many(
-                self.db.card.type_model.user_id == telegram_id, limit=10000
-            )
+        # users without cards never show up in the card scan
+        for telegram_id in user_ids:
+            self.add_new_user(telegram_id)
 
-            review_cards, waiting_cards = self._fill_review_waiting_cards(created_cards)
+        async for telegram_id, created_cards in self.db.card.stream_cards_by_user():
+            self.cache[telegram_id] = self._build_user_state(created_cards)
+        return self.cache
 
-            user_state = UserProfile(
-                created_cards=self._fill_created_cards(created_cards),
-                review_cards=review_cards,
-                waiting_cards=waiting_cards,
-            )
+    async def load_user_state(self, telegram_id: int) -> UserProfile:
+        """Build a single user's state from all of their cards"""
+        user_state = self.profile_factory()
+        async for _, cards in self.db.card.stream_cards_by_user(user_id=telegram_id):
+            user_state = self._build_user_state(cards)
+        return user_state
+
+    async def restore_states(self, snapshot_path: str | Path) -> dict[int, UserProfile]:
+        """Load states from a snapshot and replay cards viewed after it"""
+        snapshot_time, states = read_snapshot(snapshot_path, self.profile_factory)
+        self.cache.update(states)
+
+        for telegram_id in await self.db.user.get_all_user_ids():
+            if telegram_id not in self.cache:
+                self.add_new_user(telegram_id)
+
+        replayed = 0
+        async for telegram_id, cards in self.db.card.stream_cards_by_user(
+            viewed_since=snapshot_time
+        ):
+            if telegram_id not in self.cache:
+                self.add_new_user(telegram_id)
+            self._replay_cards(self.cache[telegram_id], cards)
+            replayed += len(cards)
 
-            self.cache[telegram_id] = user_state
+        logger.info(
+            "Restored %s users states from snapshot, replayed %s cards",
+            len(states),
+            replayed,
+        )
         return self.cache
 
-    def _fill_created_cards(self, cards: Sequence[Card]) -> SortedList[int]:
-        created_cards = SortedList()
-        for card in cards:
-            created_cards.add(card.word_id)
-        return created_cards
+    def _replay_cards(
+        self, user_state: UserProfile, cards: Sequence[Card | CardRow]
+    ) -> None:
+        """Replace snapshot data of the given cards with their current state"""
+        word_ids = {card.word_id for card in cards}
+        user_state.known_cards.difference_update(word_ids)
+        user_state.review_cards.difference_update(word_ids)
+        user_state.waiting_cards.difference_update(word_ids)
+
+        fresh_state = self._build_user_state(cards)
+        user_state.created_cards.update(fresh_state.created_cards)
+        user_state.known_cards.update(fresh_state.known_cards)
+        user_state.review_cards.extend(fresh_state.review_cards)
+        user_state.waiting_cards.update(fresh_state.waiting_cards)
+
+    def _build_user_state(self, cards: Sequence[Card | CardRow]) -> UserProfile:
+        review_cards, waiting_cards = self._fill_review_waiting_cards(cards)
+        return self.profile_factory(
+            created_cards=self._fill_created_cards(cards),
+            known_cards=self._fill_known_cards(cards),
+            review_cards=review_cards,
+            waiting_cards=waiting_cards,
+        )
+
+    def _fill_created_cards(self, cards: Sequence[Card | CardRow]) -> SortedSet:
+        return SortedSet(card.word_id for card in cards)
+
+    def _fill_known_cards(self, cards: Sequence[Card | CardRow]) -> SortedSet:
+        return SortedSet(
+            card.word_id for card in cards if card.count_of_views >= KNOWN_CARD_VIEWS
+        )
 
     def _fill_review_waiting_cards(
-        self, cards: Sequence[Card]
-    ) -> tuple[list[int], SortedDict[int, int]]:
-        cards_to_review = []
-        waiting_cards = SortedDict()
-        for card in cards:
-            current_time = datetime.now()
-            # Convert SQLAlchemy's DateTime to Python's datetime
-            last_view_datetime = card.last_view
-            if isinstance(last_view_datetime, datetime):
-                review_date = self.review_algorithm(
-                    last_view_datetime, card.count_of_views, True
-                )
-            else:
-                # Handle the case where last_view might not be a datetime object
+        self, cards: Sequence[Card | CardRow]
+    ) -> tuple[ReviewQueue, ReviewSchedule]:
+        cards_to_review = ReviewQueue()
+        waiting_cards = ReviewSchedule()
+        current_time = datetime.now().timestamp()
+        cards = [card for card in cards if card.count_of_views < KNOWN_CARD_VIEWS]
+        review_times = self._review_times(cards, current_time)
+        for card, review_time in zip(cards, review_times, strict=True):
+            if review_time is None:
                 continue
-
-            if card.count_of_views == 20:
-                pass
-            elif review_date < current_time:
+            if review_time < current_time:
                 cards_to_review.append(card.word_id)
             else:
-                waiting_cards[int(review_date.timestamp())] = card.word_id
+                waiting_cards.add(card.word_id, int(review_time))
 
         return cards_to_review, waiting_cards
 
+    def _review_times(
+        self, cards: Sequence[Card | CardRow], current_time: float
+    ) -> list[float | None]:
+        """Next review timestamps of cards, None for cards never viewed"""
+        review_times = [
+            None if card.next_review_at is None else card.next_review_at.timestamp()
+            for card in cards
+        ]
+        # cards written before the due time was stored
+        unscheduled = [
+            index
+            for index, card in enumerate(cards)
+            if card.next_review_at is None and isinstance(card.last_view, datetime)
+        ]
+        if not unscheduled:
+            return review_times
+
+        last_views = [
+            cast(datetime, cards[index].last_view).timestamp() for index in unscheduled
+        ]
+        if self.interval_table is None:
+            scheduled = [
+                self.review_algorithm(
+                    cast(datetime, cards[index].last_view),
+                    cards[index].count_of_views,
+                    True,
+                ).timestamp()
+                for index in unscheduled
+            ]
+        else:
+            scheduled = self.interval_table.next_review_batch(
+                [cards[index].count_of_views for index in unscheduled], last_views
+            ).tolist()
+
+        if self.smoothing is not None:
+            scheduled = self._smooth(
+                [cards[index] for index in unscheduled],
+                last_views,
+                scheduled,
+                stored=[
+                    review_time
+                    for review_time in review_times
+                    if review_time is not None and review_time >= current_time
+                ],
+                current_time=current_time,
+            )
+
+        for index, review_time in zip(unscheduled, scheduled, strict=True):
+            review_times[index] = review_time
+        return review_times
+
+    def _smooth(
+        self,
+        cards: Sequence[Card | CardRow],
+        last_views: list[float],
+        review_times: list[float],
+        stored: list[float],
+        current_time: float,
+    ) -> list[float]:
+        """
+        Jitter computed review times and cap the ones still in the future.
+
+        Stored review times were smoothed when they were written, they only
+        count towards the daily cap.
+        """
+        smoothing = cast(DueSmoothing, self.smoothing)
+        jittered: list[float] = smoothing.jitter_batch(
+            [card.user_id for card in cards],
+            [card.word_id for card in cards],
+            [card.count_of_views for card in cards],
+            last_views,
+            review_times,
+        ).tolist()
+        day_counts = smoothing.day_counts(stored)
+        if day_counts is None:
+            return jittered
+        # earlier cards keep their day, later ones move past full days
+        for index in sorted(range(len(jittered)), key=jittered.__getitem__):
+            if jittered[index] >= current_time:
+                jittered[index] = smoothing.cap(jittered[index], day_counts)
+        return jittered
+
     def add_new_user(self, user_id: int) -> None:
-        self.cache[user_id] = UserProfile(
-            created_cards=SortedList(), review_cards=[], waiting_cards=SortedDict()
-        )
+        self.cache[user_id] = self.profile_factory()
 
 
-async def build_user_state() -> StatesCreator:
-    async with async_session_factory() as session:
-        db = Database(session=session)
-        states_creator = StatesCreator(db, review_algorithm, cache=users_states)
-        return states_creator
+def get_profile_factory() -> ProfileFactory:
+    """Profile implementation selected by the COMPACT_USER_PROFILES setting"""
+    if settings.COMPACT_USER_PROFILES:
+        return cast(ProfileFactory, CompactUserProfile)
+    return UserProfile
+
+
+def get_states_creator(db: Database) -> StatesCreator:
+    """States creator of the users states cache, reading cards from `db`"""
+    return StatesCreator(
+        db,
+        review_algorithm,
+        cache=users_states,
+        profile_factory=get_profile_factory(),
+        interval_table=HYDRATION_INTERVALS,
+        smoothing=get_due_smoothing(),
+    )
+
+
+async def load_user_state(db: Database, telegram_id: int) -> UserProfile:
+    """Loader used by the users states cache in lazy mode"""
+    return await get_states_creator(db).load_user_state(telegram_id)
 
 
-async def get_users_states() -> dict[int, UserProfile]:
-    """Return users states"""
+async def get_users_states(
+    snapshot_path: str | Path | None = None,
+) -> dict[int, UserProfile]:
+    """Return users states, warm started from a snapshot when one is given"""
     async with async_session_factory() as session:
-        db = Database(session=session)
-        states_creator = StatesCreator(db, review_algorithm, cache=users_states)
+        states_creator = get_states_creator(Database(session=session))
+        if snapshot_path is not None:
+            try:
+                return await states_creator.restore_states(snapshot_path)
+            except SnapshotError as e:
+                logger.warning("Full states hydration, snapshot unusable: %s", e)
         return await states_creator.create_states()
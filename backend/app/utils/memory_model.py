@@ -0,0 +1,293 @@
+"""
+Memory model scheduler, similar to FSRS, with offline parameter fitting.
+
+The probability to recall a word `t` days after the last view follows the
+FSRS power forgetting curve R(t, S) = (1 + FACTOR * t / S) ** DECAY, where
+the stability S is the time after which recall drops to 90%. Cards only
+store their count of views, so stability grows exponentially with it:
+S(n) = exp(initial + growth * (n - 1)). The next review is planned when
+recall falls to the target retention.
+
+`initial` and `growth` are fitted on logged review outcomes by gradient
+descent on the log loss, for all users at once and for every user with
+enough reviews, each user starting from and pulled towards the global
+parameters. Gradients of all users are summed with np.bincount, so one
+step costs the same vectorized passes over the log however many users are
+fitted.
+"""
+
+import json
+from collections.abc import Mapping
+from dataclasses import asdict, dataclass
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import numpy as np
+import numpy.typing as npt
+
+from app.utils.scheduling import ReviewScheduler
+
+DECAY = -0.5
+# recall of a card is 90% when t == S
+FACTOR = 0.9 ** (1 / DECAY) - 1
+SECONDS_IN_DAY = 24 * 60 * 60
+
+MIN_INTERVAL_DAYS = 10 / (24 * 60)
+MAX_INTERVAL_DAYS = 365.0
+# users with fewer logged reviews keep the global parameters
+MIN_USER_REVIEWS = 50
+_EPSILON = 1e-6
+
+
+@dataclass(frozen=True, slots=True)
+class MemoryParams:
+    """Parameters of the stability of a card by its count of views"""
+
+    initial: float = float(np.log(0.5))
+    """Log stability in days after the first view"""
+
+    growth: float = 0.8
+    """Log stability gained with each view"""
+
+
+def stability(
+    count_of_views: npt.ArrayLike, params: npt.NDArray[np.float64]
+) -> npt.NDArray[np.float64]:
+    """Stability in days, `params` are rows of (initial, growth)"""
+    params = np.asarray(params, dtype=np.float64)
+    views = np.maximum(np.asarray(count_of_views, dtype=np.float64) - 1, 0)
+    log_stability: npt.NDArray[np.float64] = params[..., 0] + params[..., 1] * views
+    return np.exp(log_stability)
+
+
+def recall_probability(
+    elapsed_days: npt.ArrayLike, stability_days: npt.ArrayLike
+) -> npt.NDArray[np.float64]:
+    elapsed = np.asarray(elapsed_days, dtype=np.float64)
+    recall: npt.NDArray[np.float64] = (1 + FACTOR * elapsed / stability_days) ** DECAY
+    return recall
+
+
+def interval_days(
+    stability_days: npt.ArrayLike, retention: float = 0.9
+) -> npt.NDArray[np.float64]:
+    """Days after which recall falls to `retention`"""
+    days = np.asarray(stability_days) / FACTOR * (retention ** (1 / DECAY) - 1)
+    clipped: npt.NDArray[np.float64] = np.clip(
+        days, MIN_INTERVAL_DAYS, MAX_INTERVAL_DAYS
+    )
+    return clipped
+
+
+class MemoryScheduler:
+    """
+    Next review times from global and per user memory parameters.
+
+    Only passed cards are scheduled, a failed card is queued again right
+    away, so the interval only depends on the count of views. `passed` is
+    accepted to fit the review algorithm signature and ignored: the review
+    handler passes False, which selects the shorter intervals of the table
+    algorithm.
+    """
+
+    def __init__(
+        self,
+        params: MemoryParams | None = None,
+        user_params: Mapping[int, MemoryParams] | None = None,
+        retention: float = 0.9,
+    ) -> None:
+        if not 0 < retention < 1:
+            raise ValueError("Retention must be between 0 and 1")
+        self.params = params or MemoryParams()
+        self.user_params = dict(user_params or {})
+        self.retention = retention
+
+    def for_user(self, user_id: int) -> ReviewScheduler:
+        """Scheduler of passed cards with the user's fitted parameters if any"""
+        params = self.user_params.get(user_id, self.params)
+
+        def next_review(
+            checks: int,
+            passed: bool = True,  # noqa: ARG001
+            review_date: datetime | None = None,
+        ) -> datetime:
+            return self._next_review(params, checks, review_date)
+
+        return next_review
+
+    def __call__(
+        self, checks: int, passed: bool = True, review_date: datetime | None = None
+    ) -> datetime:
+        """Next review of a passed card, with global parameters"""
+        return self._next_review(self.params, checks, review_date)
+
+    def _next_review(
+        self, params: MemoryParams, checks: int, review_date: datetime | None
+    ) -> datetime:
+        if review_date is None:
+            review_date = datetime.now()
+        days = interval_days(
+            stability(checks, np.array([params.initial, params.growth])),
+            self.retention,
+        )
+        return review_date + timedelta(days=float(days))
+
+    @classmethod
+    def load(cls, path: str | Path, retention: float = 0.9) -> "MemoryScheduler":
+        """Scheduler with parameters saved by `save_params`"""
+        data = json.loads(Path(path).read_text())
+        return cls(
+            params=MemoryParams(**data["global"]),
+            user_params={
+                int(user_id): MemoryParams(**params)
+                for user_id, params in data["users"].items()
+            },
+            retention=retention,
+        )
+
+
+def save_params(
+    path: str | Path,
+    params: MemoryParams,
+    user_params: Mapping[int, MemoryParams],
+) -> None:
+    data = {
+        "global": asdict(params),
+        "users": {
+            str(user_id): asdict(value) for user_id, value in user_params.items()
+        },
+    }
+    Path(path).write_text(json.dumps(data))
+
+
+def log_loss_gradient(
+    params: npt.NDArray[np.float64],
+    groups: npt.NDArray[np.intp],
+    count_of_views: npt.NDArray[np.float64],
+    elapsed_days: npt.NDArray[np.float64],
+    passed: npt.NDArray[np.float64],
+) -> tuple[npt.NDArray[np.float64], npt.NDArray[np.float64]]:
+    """
+    Log loss of every group and its gradient by the group parameters.
+
+    Args:
+        params: (groups, 2) array of (initial, growth) rows.
+        groups: Group of every review, an index into `params`.
+        count_of_views: Count of views of the card before every review.
+        elapsed_days: Days since the previous view of the card.
+        passed: 1.0 for passed reviews and 0.0 for failed ones.
+
+    Returns:
+        Summed loss of each group and the (groups, 2) gradient.
+    """
+    views = np.maximum(count_of_views - 1, 0)
+    initial = params[:, 0].take(groups)
+    growth = params[:, 1].take(groups)
+    stability_days = np.exp(initial + growth * views)
+    base = 1 + FACTOR * elapsed_days / stability_days
+    power = base**DECAY
+    recall = np.clip(power, _EPSILON, 1 - _EPSILON)
+
+    loss = -np.where(passed, np.log(recall), np.log1p(-recall))
+    # d loss / d recall * d recall / d log stability
+    d_recall = (recall - passed) / (recall * (1 - recall))
+    d_log_stability = d_recall * -DECAY * power * (base - 1) / base
+
+    size = len(params)
+    gradient = np.empty_like(params)
+    gradient[:, 0] = np.bincount(groups, weights=d_log_stability, minlength=size)
+    gradient[:, 1] = np.bincount(
+        groups, weights=d_log_stability * views, minlength=size
+    )
+    losses = np.bincount(groups, weights=loss, minlength=size).astype(np.float64)
+    return losses, gradient
+
+
+def fit_params(
+    count_of_views: npt.ArrayLike,
+    elapsed_days: npt.ArrayLike,
+    passed: npt.ArrayLike,
+    groups: npt.ArrayLike | None = None,
+    initial: MemoryParams | None = None,
+    prior_reviews: float = 0.0,
+    steps: int = 500,
+    learning_rate: float = 0.05,
+) -> npt.NDArray[np.float64]:
+    """
+    Fit (initial, growth) of every group of reviews with Adam steps.
+
+    Groups are numbered from 0, all reviews form one group by default.
+    `prior_reviews` adds an L2 penalty towards `initial` weighted like that
+    many reviews, which keeps groups with few reviews close to it.
+
+    Returns:
+        (groups, 2) array of fitted parameters.
+    """
+    views = np.asarray(count_of_views, dtype=np.float64)
+    elapsed = np.asarray(elapsed_days, dtype=np.float64)
+    outcomes = np.asarray(passed, dtype=np.float64)
+    group_index: npt.NDArray[np.intp]
+    if groups is None:
+        group_index = np.zeros(len(views), dtype=np.intp)
+    else:
+        group_index = np.asarray(groups, dtype=np.intp)
+    size = int(group_index.max()) + 1 if len(group_index) else 1
+    reviews = np.maximum(np.bincount(group_index, minlength=size), 1)[:, None]
+
+    start = initial or MemoryParams()
+    prior = np.array([start.initial, start.growth])
+    params = np.tile(prior, (size, 1))
+    first_moment = np.zeros_like(params)
+    second_moment = np.zeros_like(params)
+    for step in range(1, steps + 1):
+        _, gradient = log_loss_gradient(params, group_index, views, elapsed, outcomes)
+        gradient = (gradient + prior_reviews * (params - prior)) / reviews
+        first_moment = 0.9 * first_moment + 0.1 * gradient
+        second_moment = 0.999 * second_moment + 0.001 * gradient**2
+        corrected = first_moment / (1 - 0.9**step)
+        scale = np.sqrt(second_moment / (1 - 0.999**step)) + 1e-8
+        params -= learning_rate * corrected / scale
+    return params
+
+
+def fit_memory_model(
+    user_ids: npt.ArrayLike,
+    count_of_views: npt.ArrayLike,
+    elapsed_seconds: npt.ArrayLike,
+    passed: npt.ArrayLike,
+    min_user_reviews: int = MIN_USER_REVIEWS,
+    prior_reviews: float = 20.0,
+    steps: int = 500,
+) -> tuple[MemoryParams, dict[int, MemoryParams]]:
+    """Global parameters and parameters of users with enough reviews"""
+    users = np.asarray(user_ids, dtype=np.int64)
+    views = np.asarray(count_of_views, dtype=np.float64)
+    elapsed = np.asarray(elapsed_seconds, dtype=np.float64) / SECONDS_IN_DAY
+    outcomes = np.asarray(passed, dtype=np.float64)
+    if not len(users):
+        return MemoryParams(), {}
+
+    initial, growth = fit_params(views, elapsed, outcomes, steps=steps)[0].tolist()
+    global_params = MemoryParams(initial, growth)
+
+    fitted_users, groups, reviews = np.unique(
+        users, return_inverse=True, return_counts=True
+    )
+    selected = reviews[groups] >= min_user_reviews
+    if not selected.any():
+        return global_params, {}
+    # renumber groups of the selected users from 0
+    kept, kept_groups = np.unique(groups[selected], return_inverse=True)
+    user_params = fit_params(
+        views[selected],
+        elapsed[selected],
+        outcomes[selected],
+        groups=kept_groups,
+        initial=global_params,
+        prior_reviews=prior_reviews,
+        steps=steps,
+    )
+    return global_params, {
+        int(fitted_users[group]): MemoryParams(initial, growth)
+        for group, (initial, growth) in zip(kept, user_params.tolist(), strict=True)
+    }
@@ -1,4 +1,6 @@
-from datetime import datetime, timedelta
+from datetime import datetime
+
+from app.utils.scheduling import REVIEW_INTERVALS
 
 
 def review_algorithm(
@@ -20,31 +22,5 @@ def review_algorithm(
     if review_date is None:
         review_date = datetime.now()
 
-    # Constants for review intervals in minutes
-    REVIEW_INTERVALS = {
-        1: 20,  # 20 minutes
-        2: 60,  # 1 hour
-        3: 120,  # 2 hours
-        4: 240,  # 4 hours
-        5: 480,  # 8 hours
-        6: 960,  # 16 hours
-        7: 1920,  # 32 hours (1.33 days)
-        8: 3840,  # 64 hours (2.67 days)
-        9: 7680,  # 128 hours (5.33 days)
-        10: 15360,  # 256 hours (10.67 days)
-    }
-
-    values = REVIEW_INTERVALS
-
-    if passed:
-        if checks > 10:
-            next_review = review_date + timedelta(minutes=values[10])
-        else:
-            next_review = review_date + timedelta(minutes=values[min(checks + 1, 10)])
-    else:
-        if checks < 3:
-            next_review = review_date + timedelta(minutes=values[1])
-        else:
-            next_review = review_date + timedelta(minutes=values[max(checks - 3, 1)])
-
+    next_review = REVIEW_INTERVALS.next_review(review_date, checks, passed)
     return int(next_review.timestamp())
@@ -0,0 +1,243 @@
+"""
+Review intervals precomputed into lookup tables.
+
+The next review of a card only depends on its count of views and whether the
+review was passed, so the minutes for every count are computed once into
+NumPy arrays. A single card is scheduled by an array lookup and a whole
+column of cards (hydration, bulk rescheduling) by one vectorized call
+instead of a Python loop over datetimes.
+
+`DueSmoothing` spreads due times of cards reviewed together (e.g. created in
+one onboarding burst) with a deterministic per card jitter and optional per
+user daily caps, so review traffic does not come in peaks.
+"""
+
+from collections import Counter
+from collections.abc import Iterable, Mapping
+from datetime import datetime, timedelta
+from typing import Protocol
+
+import numpy as np
+import numpy.typing as npt
+
+SECONDS_IN_MINUTE = 60
+
+
+class ReviewScheduler(Protocol):
+    """Next review time of a card reviewed with `checks` views"""
+
+    def __call__(
+        self, checks: int, passed: bool = True, review_date: datetime | None = None
+    ) -> datetime: ...
+
+
+class IntervalTable:
+    """Seconds to the next review by count of views, for passed and failed"""
+
+    __slots__ = ("levels", "_passed", "_failed")
+
+    def __init__(self, minutes: Mapping[int, int]) -> None:
+        levels = len(minutes)
+        if sorted(minutes) != list(range(1, levels + 1)):
+            raise ValueError("Interval levels must be numbered from 1")
+        self.levels = levels
+        seconds = np.array(
+            [0]
+            + [minutes[level] * SECONDS_IN_MINUTE for level in range(1, levels + 1)],
+            dtype=np.int64,
+        )
+        # counts are clipped to the first count where both rules stop growing:
+        # passed moves one level up, failed moves three levels down
+        checks = np.arange(levels + 4)
+        self._passed = seconds[np.clip(checks + 1, 1, levels)]
+        self._failed = seconds[np.clip(checks - 3, 1, levels)]
+
+    def _index(self, checks: int) -> int:
+        return min(max(checks, 0), len(self._passed) - 1)
+
+    def seconds(self, checks: int, passed: bool = True) -> int:
+        """Seconds between a review and the next one"""
+        table = self._passed if passed else self._failed
+        return int(table[self._index(checks)])
+
+    def next_review(
+        self, review_date: datetime, checks: int, passed: bool = True
+    ) -> datetime:
+        return review_date + timedelta(seconds=self.seconds(checks, passed))
+
+    def next_review_batch(
+        self,
+        count_of_views: npt.ArrayLike,
+        last_view: npt.ArrayLike,
+        passed: npt.ArrayLike = True,
+    ) -> npt.NDArray[np.number]:
+        """
+        Next review timestamps of many cards in one call.
+
+        Args:
+            count_of_views: Count of views of every card.
+            last_view: Timestamps (seconds since epoch) of the last reviews.
+            passed: Whether each review was passed, or one flag for all cards.
+
+        Returns:
+            Timestamps (seconds since epoch) of the next reviews, in the
+            dtype of `last_view`.
+        """
+        index = np.clip(np.asarray(count_of_views), 0, len(self._passed) - 1)
+        delay = np.where(passed, self._passed[index], self._failed[index])
+        review_times: npt.NDArray[np.number] = np.asarray(last_view) + delay
+        return review_times
+
+
+# intervals of reviews made in the bot
+REVIEW_INTERVALS = IntervalTable(
+    {
+        1: 20,  # 20 minutes
+        2: 60,  # 1 hour
+        3: 120,  # 2 hours
+        4: 240,  # 4 hours
+        5: 480,  # 8 hours
+        6: 960,  # 16 hours
+        7: 1920,  # 32 hours (1.33 days)
+        8: 3840,  # 64 hours (2.67 days)
+        9: 7680,  # 128 hours (5.33 days)
+        10: 15360,  # 256 hours (10.67 days)
+    }
+)
+
+# intervals of cards without a stored due time when users states are built
+HYDRATION_INTERVALS = IntervalTable(
+    {
+        1: 20,
+        2: 40,
+        3: 120,
+        4: 240,
+        5: 960,
+        6: 3840,
+        7: 15360,
+        8: 61440,
+        9: 245760,
+        10: 983040,
+    }
+)
+
+
+SECONDS_IN_DAY = 24 * 60 * 60
+
+
+def card_fractions(
+    user_ids: npt.ArrayLike, word_ids: npt.ArrayLike, count_of_views: npt.ArrayLike
+) -> npt.NDArray[np.float64]:
+    """
+    Uniform numbers in [0, 1) fixed for each (user, word, count of views).
+
+    The ids are mixed by the splitmix64 finalizer, so cards reviewed at the
+    same time get unrelated numbers while one card always gets the same.
+    """
+    with np.errstate(over="ignore"):
+        mixed = (
+            np.asarray(user_ids, dtype=np.uint64) * np.uint64(0x9E3779B97F4A7C15)
+            + np.asarray(word_ids, dtype=np.uint64) * np.uint64(0xBF58476D1CE4E5B9)
+            + np.asarray(count_of_views, dtype=np.uint64)
+        )
+        mixed = (mixed ^ (mixed >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+        mixed = (mixed ^ (mixed >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+        mixed ^= mixed >> np.uint64(31)
+    fractions: npt.NDArray[np.float64] = (mixed >> np.uint64(11)) / float(2**53)
+    return fractions
+
+
+def _day(timestamp: float) -> int:
+    return datetime.fromtimestamp(timestamp).toordinal()
+
+
+class DueSmoothing:
+    """
+    Spreads due times of cards reviewed together.
+
+    Every interval is stretched or shrunk by up to `fuzz` of its length, by
+    a fraction fixed for the card and its count of views, so the result
+    does not change when it is computed again. With `daily_cap`, a card due
+    on a day that already has that many scheduled cards of the user moves
+    to the same time of the first following day with room for it.
+    """
+
+    def __init__(
+        self,
+        fuzz: float = 0.05,
+        daily_cap: int | None = None,
+        max_shift_days: int = 30,
+    ) -> None:
+        if not 0 <= fuzz < 1:
+            raise ValueError("Fuzz must be between 0 and 1")
+        if daily_cap is not None and daily_cap < 1:
+            raise ValueError("Daily cap must be positive")
+        self.fuzz = fuzz
+        self.daily_cap = daily_cap
+        self.max_shift_days = max_shift_days
+
+    def jitter(
+        self,
+        user_id: int,
+        word_id: int,
+        count_of_views: int,
+        review_date: datetime,
+        due: datetime,
+    ) -> datetime:
+        if not self.fuzz:
+            return due
+        fraction = float(card_fractions(user_id, word_id, count_of_views))
+        return review_date + (due - review_date) * (1 + self.fuzz * (2 * fraction - 1))
+
+    def jitter_batch(
+        self,
+        user_ids: npt.ArrayLike,
+        word_ids: npt.ArrayLike,
+        count_of_views: npt.ArrayLike,
+        review_dates: npt.ArrayLike,
+        due: npt.ArrayLike,
+    ) -> npt.NDArray[np.float64]:
+        """Vectorized `jitter` of unix times"""
+        review_times = np.asarray(review_dates, dtype=np.float64)
+        due_times = np.asarray(due, dtype=np.float64)
+        if not self.fuzz:
+            return due_times
+        fractions = card_fractions(user_ids, word_ids, count_of_views)
+        jittered: npt.NDArray[np.float64] = review_times + (
+            due_times - review_times
+        ) * (1 + self.fuzz * (2 * fractions - 1))
+        return jittered
+
+    def day_counts(self, scheduled: Iterable[float]) -> Counter[int] | None:
+        """Scheduled cards by day for `cap`, None when there is no cap"""
+        if self.daily_cap is None:
+            return None
+        return Counter(_day(timestamp) for timestamp in scheduled)
+
+    def cap(self, due: float, day_counts: Counter[int] | None) -> float:
+        """Move a due unix time past full days and count it in `day_counts`"""
+        if day_counts is None or self.daily_cap is None:
+            return due
+        day = _day(due)
+        for _ in range(self.max_shift_days):
+            if day_counts[day] < self.daily_cap:
+                break
+            due += SECONDS_IN_DAY
+            day = _day(due)
+        day_counts[day] += 1
+        return due
+
+    def smooth(
+        self,
+        user_id: int,
+        word_id: int,
+        count_of_views: int,
+        review_date: datetime,
+        due: datetime,
+        day_counts: Counter[int] | None = None,
+    ) -> datetime:
+        """Jittered and capped next review of a card"""
+        due = self.jitter(user_id, word_id, count_of_views, review_date, due)
+        if day_counts is None:
+            return due
+        return datetime.fromtimestamp(self.cap(due.timestamp(), day_counts))
@@ -1,3 +1,4 @@
+from .catalog import WordCatalog, word_catalog
 from .words_service import WordCardHandler
 
-__all__ = ["WordCardHandler"]
+__all__ = ["WordCardHandler", "WordCatalog", "word_catalog"]
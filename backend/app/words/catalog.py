@@ -0,0 +1,163 @@
+"""
+In-process catalog of words and sentences.
+
+Words content only changes when new words are imported, while every new
+words and review page reads it. The catalog loads all words with their
+sentences once into frozen objects indexed by id, so these pages are served
+without database queries. Each word is encoded as `WordResponse` JSON the
+first time it is served and responses are joined from those bytes. A
+refresh builds a whole new catalog, with empty encoded words, and replaces
+the reference in one assignment: requests keep using the catalog they got
+and never see a half updated one.
+"""
+
+import asyncio
+import sys
+from array import array
+from bisect import bisect_right
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass
+from types import MappingProxyType
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.common.db.database import Database
+from app.common.db.models import Word
+from app.common.shemas.words import WordResponse, WordsResponse
+from app.utils.logger import logger
+
+
+def _intern(value: str | None) -> str | None:
+    return None if value is None else sys.intern(value)
+
+
+@dataclass(frozen=True, slots=True)
+class CatalogSentence:
+    id: int
+    native_text: str
+    cyrilic_text: str
+    latin_text: str
+
+
+@dataclass(frozen=True, slots=True)
+class CatalogWord:
+    """Read only copy of a `Word` with the attributes responses use"""
+
+    id: int
+    latin_word: str
+    native_word: str
+    cyrillic_word: str | None
+    legend: str | None
+    image: str | None
+    transcription: str | None
+    voice_id: str | None
+    sentences: tuple[CatalogSentence, ...]
+
+    @classmethod
+    def from_db_model(cls, word: Word) -> "CatalogWord":
+        sentences = sorted(word.sentences or (), key=lambda sentence: sentence.id)
+        return cls(
+            id=word.id,
+            latin_word=sys.intern(word.latin_word),
+            native_word=sys.intern(word.native_word),
+            cyrillic_word=_intern(word.cyrillic_word),
+            legend=_intern(word.legend),
+            image=_intern(word.image),
+            transcription=_intern(word.transcription),
+            voice_id=_intern(word.voice_id),
+            sentences=tuple(
+                CatalogSentence(
+                    id=sentence.id,
+                    native_text=sys.intern(sentence.native_text),
+                    cyrilic_text=sys.intern(sentence.cyrilic_text),
+                    latin_text=sys.intern(sentence.latin_text),
+                )
+                for sentence in sentences
+            ),
+        )
+
+
+class WordCatalog:
+    """Immutable id ordered words with lookups by id"""
+
+    __slots__ = ("_words", "_ids", "_by_id", "_json", "version")
+
+    def __init__(
+        self, words: Iterable[CatalogWord], version: int | None = None
+    ) -> None:
+        self._words = tuple(sorted(words, key=lambda word: word.id))
+        self._ids = array("q", (word.id for word in self._words))
+        self._by_id = MappingProxyType({word.id: word for word in self._words})
+        # word id -> encoded WordResponse, filled on first use
+        self._json: dict[int, bytes] = {}
+        # version of the database content the catalog was built from
+        self.version = version
+
+    @classmethod
+    def from_db_models(
+        cls, words: Iterable[Word], version: int | None = None
+    ) -> "WordCatalog":
+        return cls((CatalogWord.from_db_model(word) for word in words), version)
+
+    def __len__(self) -> int:
+        return len(self._words)
+
+    def __contains__(self, word_id: object) -> bool:
+        return word_id in self._by_id
+
+    def get(self, word_id: int) -> CatalogWord | None:
+        return self._by_id.get(word_id)
+
+    def get_new_words(self, last_word_id: int, limit: int = 5) -> list[CatalogWord]:
+        """Words with id greater than `last_word_id`, ordered by id"""
+        start = bisect_right(self._ids, last_word_id)
+        return list(self._words[start : start + max(limit, 0)])
+
+    def get_many(self, word_ids: Iterable[int]) -> list[CatalogWord]:
+        """Words in the order of `word_ids`, unknown ids are skipped"""
+        by_id = self._by_id
+        return [by_id[word_id] for word_id in word_ids if word_id in by_id]
+
+    def encode(self, word_ids: Iterable[int]) -> bytes:
+        """WordsResponse JSON of the words, joined from the encoded words"""
+        return WordsResponse.join_json(self._encode_word(word) for word in word_ids)
+
+    def _encode_word(self, word_id: int) -> bytes:
+        encoded = self._json.get(word_id)
+        if encoded is None:
+            word = WordResponse.from_db_model(self._by_id[word_id])
+            encoded = self._json[word_id] = word.model_dump_json().encode()
+        return encoded
+
+
+class WordCatalogService:
+    """Holds the current catalog and rebuilds it when the content changes"""
+
+    def __init__(self) -> None:
+        self.current: WordCatalog | None = None
+
+    async def refresh(self, db: Database) -> bool:
+        """Load a new catalog if the words content changed, True if swapped"""
+        version = await db.word.get_content_version()
+        current = self.current
+        if current is not None and current.version == version:
+            return False
+        words = await db.word.get_all_with_sentences()
+        self.current = WordCatalog.from_db_models(words, version)
+        logger.info("Loaded words catalog with %s words", len(self.current))
+        return True
+
+    async def run(
+        self, session_factory: Callable[[], AsyncSession], interval: float
+    ) -> None:
+        """Refresh the catalog every `interval` seconds until cancelled"""
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                async with session_factory() as session:
+                    await self.refresh(Database(session=session))
+            except Exception:
+                logger.exception("Failed to refresh words catalog")
+
+
+word_catalog = WordCatalogService()
@@ -1,12 +1,21 @@
 import datetime
-from collections.abc import Callable
+from collections.abc import Sequence
 
 from sqlalchemy.orm import joinedload
 
-from app.common.cache.states import UserProfile
+from app.common.cache.backend import StatesBackend
+from app.common.cache.locks import UserLocks, user_locks
 from app.common.db.database import Database
 from app.common.db.models import Word
-from app.common.db.models.card import Card
+from app.common.db.models.card import KNOWN_CARD_VIEWS, Card
+from app.common.db.repositories.card.card_creator import (
+    CardsNotCreated,
+    DueTimeFn,
+)
+from app.common.shemas.words import WordResponse, WordsResponse
+from app.utils.scheduling import DueSmoothing, ReviewScheduler
+
+from .catalog import CatalogWord, WordCatalog
 
 
 class EndWordsInDb(Exception):
@@ -21,59 +30,141 @@ class EndWordsToReview(Exception):
     pass
 
 
+def count_of_views(known: bool) -> int:
+    """Views a new card starts with, known words skip the first reviews"""
+    return KNOWN_CARD_VIEWS if known is True else 1
+
+
 class WordCardHandler:
     def __init__(
         self,
         db: Database,
-        cache: dict[int, UserProfile],
-        review_algorithm: Callable[
-            [int, bool, datetime.datetime | None], datetime.datetime
-        ],
+        states: StatesBackend,
+        review_algorithm: ReviewScheduler,
+        locks: UserLocks = user_locks,
+        catalog: WordCatalog | None = None,
+        review_log: bool = False,
+        smoothing: DueSmoothing | None = None,
     ):
         self.db = db
-        self.cache = cache
+        self.states = states
         self.review_algorithm = review_algorithm
+        # serializes card changes of each user across awaits
+        self.locks = locks
+        # words are read from the database when no catalog is loaded
+        self.catalog = catalog
+        # log outcomes of reviews for fitting the memory model
+        self.review_log = review_log
+        # spreads due times of cards reviewed together
+        self.smoothing = smoothing
 
     async def create_new_card(
         self, telegram_id: int, known: bool, word_id: int
     ) -> Card:
         """Create a new word card for user"""
 
-        if word_id in self.cache[telegram_id].created_cards:
-            raise ValueError("Word card already created")
+        async with self.locks(telegram_id):
+            if await self.states.is_created(telegram_id, word_id):
+                raise ValueError("Word card already created")
 
-        if word_id != 1 and len(self.cache[telegram_id].created_cards) == 0:
-            if word_id != self.cache[telegram_id].created_cards[-1] + 1:
+            latest_word_id = await self.states.last_created(telegram_id)
+            if word_id != 1 and latest_word_id is None:
                 raise ValueError("Word card not in sequence")
 
-        if known is True:
-            count_of_views = 20
-            self.cache[telegram_id].known_cards.add(word_id)
-        else:
-            count_of_views = 1
-            self.cache[telegram_id].review_cards.append(word_id)
+            created_card = await self.db.card.create_card(
+                word_id=word_id,
+                user_id=telegram_id,
+                count_of_views=count_of_views(known),
+            )
 
-        created_card = await self.db.card.create_card(
-            word_id=word_id,
-            user_id=telegram_id,
-            count_of_views=count_of_views,
-        )
-
-        self.cache[telegram_id].created_cards.add(word_id)
+            await self.states.add_created(telegram_id, word_id, known=known is True)
 
         return created_card
 
-    async def get_new_words(self, user_id: int, limit: int = 20) -> list[Word]:
+    async def create_new_cards(
+        self, telegram_id: int, cards: Sequence[tuple[int, bool]]
+    ) -> list[Card]:
+        """
+        Create (word_id, known) word cards for user, all of them or none.
+
+        The batch is checked as a whole before anything is written: a
+        repeated word, an already created card or a first card out of
+        sequence rejects the entire batch. The cards are then inserted in
+        one statement and added to the user's state in one change, so on
+        any error neither the database nor the state has part of the batch.
+        """
+
+        word_ids = [word_id for word_id, _ in cards]
+        if len(set(word_ids)) != len(word_ids):
+            raise ValueError("Word card repeated in batch")
+
+        async with self.locks(telegram_id):
+            created = await self.states.created_among(telegram_id, word_ids)
+            if created:
+                raise ValueError(f"Word card already created: {created[0]}")
+
+            latest_word_id = await self.states.last_created(telegram_id)
+            if word_ids and word_ids[0] != 1 and latest_word_id is None:
+                raise ValueError("Word card not in sequence")
+
+            try:
+                created_cards = await self.db.card.create_cards(
+                    user_id=telegram_id,
+                    cards=[
+                        (word_id, count_of_views(known)) for word_id, known in cards
+                    ],
+                )
+            except CardsNotCreated as e:
+                raise ValueError("Word cards not created") from e
+
+            await self.states.add_created_many(telegram_id, cards)
+
+        return created_cards
+
+    async def _review_schedule(
+        self, user_id: int
+    ) -> tuple[DueTimeFn, dict[int, datetime.datetime]]:
+        """
+        Next review times of the user's passed cards and the times it gave.
+
+        With `smoothing` the times are jittered, and with its daily cap the
+        user's scheduled cards are counted by day once for all the cards
+        scheduled by the returned function.
+        """
+        smoothing = self.smoothing
+        day_counts = None
+        if smoothing is not None and smoothing.daily_cap is not None:
+            day_counts = smoothing.day_counts(
+                await self.states.scheduled_dates(user_id)
+            )
+        due_dates: dict[int, datetime.datetime] = {}
+
+        def schedule(word_id: int, count_of_views: int) -> datetime.datetime:
+            review_date = datetime.datetime.now()
+            due = self.review_algorithm(count_of_views, False, review_date)
+            if smoothing is not None:
+                due = smoothing.smooth(
+                    user_id, word_id, count_of_views, review_date, due, day_counts
+                )
+            due_dates[word_id] = due
+            return due
+
+        return schedule, due_dates
+
+    async def get_new_words(
+        self, user_id: int, limit: int = 20
+    ) -> list[Word] | list[CatalogWord]:
         """Get new words for user"""
 
-        if len(self.cache[user_id].created_cards) == 0:
-            latest_word_id = 0
-        else:
-            latest_word_id = self.cache[user_id].created_cards[-1]
+        latest_word_id = await self.states.last_created(user_id) or 0
 
-        words = await self.db.word.get_new_words(
-            limit=limit, last_word_id=latest_word_id
-        )
+        words: list[Word] | list[CatalogWord]
+        if self.catalog is not None:
+            words = self.catalog.get_new_words(limit=limit, last_word_id=latest_word_id)
+        else:
+            words = await self.db.word.get_new_words(
+                limit=limit, last_word_id=latest_word_id
+            )
         if not words:
             raise EndWordsInDb("No more words in database")
         return words
@@ -81,47 +172,123 @@ class WordCardHandler:
     async def add_review(self, user_id: int, passed: bool, word_id: int) -> None:
         """Add review for word"""
 
-        self.cache[user_id].review_cards.remove(word_id)
-
-        if passed:
-            card = await self.db.card.add_review(user_id=user_id, word_id=word_id)
-            self.cache[user_id].waiting_cards[
-                self.review_algorithm(card.count_of_views, False, None)
-            ] = word_id
+        async with self.locks(user_id):
+            if not await self.states.is_queued(user_id, word_id):
+                raise ValueError("Word card is not waiting for review")
+
+            if self.review_log:
+                # a passed review is committed with the card update
+                await self.db.review_log.add_reviews(
+                    user_id, [(word_id, passed)], commit=not passed
+                )
+
+            if passed:
+                schedule, due_dates = await self._review_schedule(user_id)
+                card = await self.db.card.add_review(
+                    user_id=user_id, word_id=word_id, schedule=schedule
+                )
+                # mastered cards are known and never reviewed again
+                if card.mastered:
+                    await self.states.mark_known(user_id, word_id)
+                else:
+                    await self.states.schedule_review(
+                        user_id, word_id, int(due_dates[word_id].timestamp())
+                    )
 
-        else:
-            self.cache[user_id].review_cards.append(word_id)
-
-    async def get_review_words(self, user_id: int, limit: int = 20) -> list[Word]:
+            else:
+                await self.states.requeue_review(user_id, word_id)
+
+    async def add_reviews(
+        self, user_id: int, reviews: Sequence[tuple[int, bool]]
+    ) -> list[str | None]:
+        """
+        Add ordered (word_id, passed) reviews, return an error or None for each.
+
+        Reviews are checked in order as if they were sent one by one, so a
+        card passed earlier in the batch is no longer waiting for review. A
+        rejected review does not stop the others. The views of all passed
+        cards are counted in one UPDATE and commit, then each review is
+        applied to the user's state in order.
+        """
+
+        errors: list[str | None] = []
+        passed_ids: list[int] = []
+        async with self.locks(user_id):
+            for word_id, passed in reviews:
+                if word_id in passed_ids or not await self.states.is_queued(
+                    user_id, word_id
+                ):
+                    errors.append("Word card is not waiting for review")
+                    continue
+                errors.append(None)
+                if passed:
+                    passed_ids.append(word_id)
+
+            if self.review_log:
+                accepted = [
+                    review
+                    for review, error in zip(reviews, errors, strict=True)
+                    if error is None
+                ]
+                await self.db.review_log.add_reviews(
+                    user_id, accepted, commit=not passed_ids
+                )
+
+            schedule, due_dates = await self._review_schedule(user_id)
+            counts = await self.db.card.add_reviews(
+                user_id, passed_ids, schedule=schedule
+            )
+
+            for index, (word_id, passed) in enumerate(reviews):
+                if errors[index] is not None:
+                    continue
+                if not passed:
+                    await self.states.requeue_review(user_id, word_id)
+                elif word_id not in counts:
+                    errors[index] = "No card found for the specified user and word"
+                elif counts[word_id] >= KNOWN_CARD_VIEWS:
+                    await self.states.mark_known(user_id, word_id)
+                else:
+                    await self.states.schedule_review(
+                        user_id, word_id, int(due_dates[word_id].timestamp())
+                    )
+
+        return errors
+
+    async def get_review_words(
+        self, user_id: int, limit: int = 20
+    ) -> list[Word] | list[CatalogWord]:
         """Get words for review"""
 
-        self._refresh_user_reviews(user_id)
-
-        if len(self.cache[user_id].review_cards) < limit:
-            limit = len(self.cache[user_id].review_cards)
+        review_words_ids = await self.states.review_words(user_id, limit)
 
-        review_words_ids = self.cache[user_id].review_cards[0:limit]
-
-        words = await self.db.word.get_many(
-            condition=Word.id.in_(review_words_ids),
-            options=[joinedload(Word.sentences)],
-        )
+        words: list[Word] | list[CatalogWord]
+        if self.catalog is not None:
+            words = self.catalog.get_many(review_words_ids)
+        else:
+            words = list(
+                await self.db.word.get_many(
+                    condition=Word.id.in_(review_words_ids),
+                    limit=len(review_words_ids),
+                    options=[joinedload(Word.sentences)],
+                )
+            )
 
         if not words:
             raise EndWordsToReview("No words to review")
-        return list(words)
+        return words
 
-    def get_review_words_count(self, user_id: int) -> int:
-        """Get count of words for review"""
-        self._refresh_user_reviews(user_id)
+    def encode_words(self, words: list[Word] | list[CatalogWord]) -> bytes:
+        """Encode words as WordsResponse JSON"""
+
+        if self.catalog is not None:
+            return self.catalog.encode(word.id for word in words)
+        response = WordsResponse(
+            words=[WordResponse.from_db_model(word) for word in words]
+        )
+        return response.model_dump_json().encode()
 
-        return len(self.cache[user_id].review_cards)
+    async def get_review_words_count(self, user_id: int) -> int:
+        """Get count of words for review"""
 
-    def _refresh_user_reviews(self, user_id: int) -> None:
-        current_time = int(datetime.datetime.now().timestamp())
-        for date_review, word_id in self.cache[user_id].waiting_cards.items():
-            if date_review < current_time:
-                self.cache[user_id].review_cards.append(word_id)
-                del self.cache[user_id].waiting_cards[date_review]
-            else:
-                break
+        return await self.states.review_count(user_id)
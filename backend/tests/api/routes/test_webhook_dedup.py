@@ -0,0 +1,72 @@
+"""Tests for dropping redelivered and unhandled updates."""
+
+from typing import Any
+
+import pytest
+from httpx import AsyncClient
+
+from app.api.bot.main import update_filter
+from app.api.deps import get_bot_instance, get_update_deduplicator
+from app.common.cache.updates import WindowDeduplicator
+
+ADMIN = {"Authorization": "Bearer admin_token"}
+
+
+def start_update(update_id: int) -> dict[str, Any]:
+    return {
+        "update_id": update_id,
+        "message": {
+            "message_id": update_id,
+            "from": {"id": 123456789, "is_bot": False, "first_name": "Test"},
+            "chat": {"id": 123456789, "first_name": "Test", "type": "private"},
+            "date": 1234567890,
+            "text": "/help",
+        },
+    }
+
+
+@pytest.mark.asyncio
+@pytest.mark.usefixtures("admin_user")
+async def test_webhook_drops_redelivered_updates(
+    client: AsyncClient, test_app: Any, mock_bot: Any
+):
+    deduplicator = WindowDeduplicator()
+    test_app.dependency_overrides[get_bot_instance] = lambda: mock_bot
+    test_app.dependency_overrides[get_update_deduplicator] = lambda: deduplicator
+
+    for update_id in (10, 11, 10, 10):
+        response = await client.post("/api/v1/webhook/", json=start_update(update_id))
+        assert response.status_code == 200
+
+    assert (deduplicator.stats.accepted, deduplicator.stats.duplicates) == (2, 2)
+    stats = (await client.get("/api/v1/webhook/stats", headers=ADMIN)).json()
+    assert stats["duplicates"] == 2
+
+
+@pytest.mark.asyncio
+@pytest.mark.usefixtures("admin_user")
+async def test_webhook_skips_unhandled_update_types(
+    client: AsyncClient, test_app: Any, mock_bot: Any
+):
+    deduplicator = WindowDeduplicator()
+    test_app.dependency_overrides[get_bot_instance] = lambda: mock_bot
+    test_app.dependency_overrides[get_update_deduplicator] = lambda: deduplicator
+    skipped = update_filter.skipped
+    update = start_update(20)
+    update["edited_message"] = update.pop("message")
+
+    response = await client.post("/api/v1/webhook/", json=update)
+
+    assert response.status_code == 200
+    # dropped before parsing, so the deduplicator never saw it
+    assert deduplicator.stats.accepted == 0
+    stats = (await client.get("/api/v1/webhook/stats", headers=ADMIN)).json()
+    assert stats["skipped"] == skipped + 1
+
+
+@pytest.mark.asyncio
+@pytest.mark.usefixtures("mock_tokens_service")
+async def test_webhook_stats_are_for_the_admin(client: AsyncClient):
+    assert (await client.get("/api/v1/webhook/stats")).status_code in (401, 403)
+    response = await client.get("/api/v1/webhook/stats", headers=ADMIN)
+    assert response.status_code == 403
@@ -0,0 +1,52 @@
+"""Tests for the webhook in queue mode."""
+
+from typing import Any
+
+import pytest
+from httpx import AsyncClient
+
+from app.api.bot.main import update_queue
+from app.api.deps import get_bot_instance, get_update_deduplicator
+from app.common.cache.updates import WindowDeduplicator
+
+ADMIN = {"Authorization": "Bearer admin_token"}
+
+
+def help_update(update_id: int) -> dict[str, Any]:
+    return {
+        "update_id": update_id,
+        "message": {
+            "message_id": update_id,
+            "from": {"id": 123456789, "is_bot": False, "first_name": "Test"},
+            "chat": {"id": 123456789, "first_name": "Test", "type": "private"},
+            "date": 1234567890,
+            "text": "/help",
+        },
+    }
+
+
+@pytest.mark.asyncio
+@pytest.mark.usefixtures("admin_user")
+async def test_webhook_enqueues_updates(
+    client: AsyncClient, test_app: Any, mock_bot: Any
+):
+    test_app.dependency_overrides[get_bot_instance] = lambda: mock_bot
+    deduplicator = WindowDeduplicator()
+    test_app.dependency_overrides[get_update_deduplicator] = lambda: deduplicator
+    accepted = update_queue.stats.accepted
+    handled = update_queue.stats.processed + update_queue.stats.failed
+
+    async with update_queue.run():
+        for update_id in range(3):
+            response = await client.post(
+                "/api/v1/webhook/", json=help_update(update_id)
+            )
+            assert response.status_code == 200
+        stats = (await client.get("/api/v1/webhook/stats", headers=ADMIN)).json()
+        assert stats["running"] is True
+
+    assert update_queue.stats.accepted == accepted + 3
+    # drained on exit
+    assert update_queue.stats.processed + update_queue.stats.failed == handled + 3
+    stats = (await client.get("/api/v1/webhook/stats", headers=ADMIN)).json()
+    assert (stats["running"], stats["pending"]) == (False, 0)
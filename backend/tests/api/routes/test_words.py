@@ -4,7 +4,9 @@ import pytest
 from sqlalchemy.orm.session import Session
 
 from app.common.cache.states import idempotency_store, users_states
+from app.common.db import Database
 from app.common.db.models import Card
+from app.words import word_catalog
 
 
 @pytest.mark.asyncio
@@ -85,6 +87,63 @@ async def test_new_card_unknown_create(
     assert users_states[test_user.telegram_id].created_cards[0] == cards[0].word_id
 
 
+@pytest.mark.asyncio
+async def test_new_cards_batch_create(
+    client,
+    db_session,  # noqa
+    test_user,  # noqa
+    db_with_words,  # noqa
+    set_up_cache,  # noqa
+    mock_tokens_service,  # noqa
+):
+    """Test creating several cards in one request"""
+
+    response = await client.post(
+        "/api/v1/cards/batch",
+        json={
+            "cards": [
+                {"known": True, "word_id": db_with_words[0].id},
+                {"known": False, "word_id": db_with_words[1].id},
+            ]
+        },
+        headers={"Authorization": "Bearer some_token"},
+    )
+
+    assert response.status_code == 201
+    assert [card["count_of_views"] for card in response.json()["cards"]] == [20, 1]
+    assert len(db_session.query(Card).all()) == 2
+    assert len(users_states[test_user.telegram_id].known_cards) == 1
+    assert users_states[test_user.telegram_id].review_cards == [db_with_words[1].id]
+
+
+@pytest.mark.asyncio
+async def test_new_cards_batch_rejected_as_whole(
+    client,
+    db_session,  # noqa
+    test_user,  # noqa
+    db_with_words,  # noqa
+    set_up_cache,  # noqa
+    mock_tokens_service,  # noqa
+):
+    """Test that one invalid card rejects the whole batch"""
+
+    response = await client.post(
+        "/api/v1/cards/batch",
+        json={
+            "cards": [
+                {"known": True, "word_id": db_with_words[0].id},
+                {"known": False, "word_id": db_with_words[0].id},
+            ]
+        },
+        headers={"Authorization": "Bearer some_token"},
+    )
+
+    assert response.status_code == 400
+    assert response.json() == {"detail": "Word card repeated in batch"}
+    assert db_session.query(Card).all() == []
+    assert len(users_states[test_user.telegram_id].created_cards) == 0
+
+
 @pytest.mark.asyncio
 async def test_get_new_word(
     client,
@@ -530,3 +589,106 @@ async def test_review_idempotency_failed_review(
     review_cards_count_after_second = len(
         users_states[test_user.telegram_id].review_cards)
     assert review_cards_count_after_second == review_cards_count_after_first
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("url", ["api/v1/cards/", "api/v1/cards/review/"])
+async def test_catalog_responses_match_database(
+    client,
+    test_user,  # noqa
+    db_with_words,  # noqa
+    db_with_sentences,  # noqa
+    async_db_session,  # noqa
+    set_up_cache,  # noqa
+    mock_tokens_service,  # noqa
+    url,
+):
+    """Words served from the catalog are byte equal to database responses"""
+    users_states[test_user.telegram_id].created_cards.update([1, 2])
+    users_states[test_user.telegram_id].review_cards.extend([1, 2])
+    headers = {"Authorization": "Bearer some_token"}
+
+    database_response = await client.get(url, headers=headers)
+    await word_catalog.refresh(Database(session=async_db_session))
+    try:
+        catalog_response = await client.get(url, headers=headers)
+    finally:
+        word_catalog.current = None
+
+    assert database_response.status_code == catalog_response.status_code == 200
+    assert len(catalog_response.json()["words"]) == (2 if "review" in url else 8)
+    assert catalog_response.content == database_response.content
+
+
+@pytest.mark.asyncio
+async def test_review_batch_idempotency(
+    client,
+    test_user,  # noqa
+    db_with_cards,
+    db_session,  # noqa
+    cache_with_created_cards,  # noqa
+    mock_tokens_service,  # noqa
+):
+    """Test batch reviews apply each idempotency key once"""
+    idempotency_store.clear()
+    first, second = db_with_cards[0].word_id, db_with_cards[1].word_id
+    reviews = [
+        {"passed": True, "word_id": first, "idempotency_key": "first"},
+        {"passed": False, "word_id": second, "idempotency_key": "second"},
+        {"passed": True, "word_id": first, "idempotency_key": "first"},
+        {"passed": True, "word_id": 999, "idempotency_key": "unknown"},
+    ]
+    headers = {"Authorization": "Bearer some_token"}
+
+    response = await client.patch(
+        "api/v1/cards/review/batch", json={"reviews": reviews}, headers=headers
+    )
+    repeated = await client.patch(
+        "api/v1/cards/review/batch", json={"reviews": reviews[:2]}, headers=headers
+    )
+
+    assert response.status_code == 201
+    assert [result["status_code"] for result in response.json()["results"]] == [
+        201,
+        201,
+        201,
+        400,
+    ]
+    assert repeated.json()["results"] == response.json()["results"][:2]
+    db_session.expire_all()
+    views = {card.word_id: card.count_of_views for card in db_session.query(Card)}
+    assert views[first] == 2
+    assert views[second] == 1
+    review_cards = users_states[test_user.telegram_id].review_cards
+    assert first not in review_cards
+    assert review_cards[-1] == second
+    idempotency_store.clear()
+
+
+@pytest.mark.asyncio
+async def test_review_batch_rejects_reused_idempotency_key(
+    client,
+    db_with_cards,
+    db_session,  # noqa
+    cache_with_created_cards,  # noqa
+    mock_tokens_service,  # noqa
+):
+    """Test a key repeated in a batch for another review rejects the batch"""
+    idempotency_store.clear()
+    first, second = db_with_cards[0].word_id, db_with_cards[1].word_id
+    reviews = [
+        {"passed": True, "word_id": first, "idempotency_key": "same"},
+        {"passed": True, "word_id": second, "idempotency_key": "same"},
+    ]
+
+    response = await client.patch(
+        "api/v1/cards/review/batch",
+        json={"reviews": reviews},
+        headers={"Authorization": "Bearer some_token"},
+    )
+
+    assert response.status_code == 422
+    assert "reused for another review" in response.json()["detail"][0]["msg"]
+    db_session.expire_all()
+    assert {card.count_of_views for card in db_session.query(Card)} == {1}
+    assert idempotency_store.size() == 0
@@ -9,7 +9,7 @@ import pytest_asyncio
 from aiogram import Bot
 from faker import Faker
 from httpx import ASGITransport, AsyncClient
-from sqlalchemy import Engine, create_engine
+from sqlalchemy import Engine, create_engine, text
 from sqlalchemy.ext.asyncio import (
     AsyncEngine,
     AsyncSession,
@@ -88,12 +88,34 @@ async def async_engine() -> AsyncGenerator[AsyncEngine, None]:
     await async_engine.dispose()
 
 
+# the content version row and triggers, as added by the migration
+CONTENT_VERSION_DDL = [
+    "INSERT INTO contentversion (id, version) VALUES (1, 0)",
+    """
+    CREATE OR REPLACE FUNCTION bump_content_version() RETURNS trigger AS $$
+    BEGIN
+        UPDATE contentversion SET version = version + 1 WHERE id = 1;
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    *(
+        f"CREATE TRIGGER {table}_content_version"
+        f" AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON {table}"
+        " FOR EACH STATEMENT EXECUTE FUNCTION bump_content_version()"
+        for table in ("word", "sentence")
+    ),
+]
+
+
 @pytest.fixture(scope="function", autouse=True)
 def clean_tables(engine: Engine) -> Generator[None, None, None]:
     """Create and drop all tables for each test function."""
     with engine.begin() as conn:
         Base.metadata.drop_all(conn)
         Base.metadata.create_all(conn)
+        for statement in CONTENT_VERSION_DDL:
+            conn.execute(text(statement))
     yield
 
 
@@ -247,6 +269,13 @@ def mock_tokens_service(test_user: User, test_app: Any, db_session: Session) ->
     test_app.dependency_overrides = {}
 
 
+@pytest.fixture(scope="function")
+def admin_user(test_user: User, mock_tokens_service: None, monkeypatch: pytest.MonkeyPatch) -> User:  # noqa F811
+    """Authenticated requests come from the admin"""
+    monkeypatch.setattr(settings, "ADMIN_TG_ID", test_user.telegram_id)
+    return test_user
+
+
 @pytest.fixture(scope="function")
 def override_app_session(test_app: Any, async_db_session: AsyncSession) -> Generator[None, None, None]:
     test_app.dependency_overrides[get_session] = lambda: async_db_session
@@ -0,0 +1,53 @@
+import datetime
+
+import pytest
+from aiogram import Dispatcher, Router
+from aiogram.filters import Command
+from aiogram.types import Chat, Message, Update, User
+
+from app.api.bot.middlewares import DatabaseMiddleware
+from app.common.db import Database
+
+
+def command_update(update_id: int, telegram_id: int, text: str) -> Update:
+    return Update(
+        update_id=update_id,
+        message=Message(
+            message_id=update_id,
+            date=datetime.datetime.now(),
+            chat=Chat(id=telegram_id, type="private"),
+            from_user=User(id=telegram_id, is_bot=False, first_name="Test"),
+            text=text,
+        ),
+    )
+
+
+@pytest.mark.asyncio
+async def test_handlers_get_pooled_database(
+    test_user, async_db_session_factory, mock_bot
+):
+    seen: list[Database] = []
+    router = Router()
+
+    @router.message(Command("me"))
+    async def me(message: Message, db: Database) -> None:
+        seen.append(db)
+        user = await db.user.get_by_condition(
+            db.user.type_model.telegram_id == message.chat.id
+        )
+        assert user is not None
+        assert db.session.in_transaction()
+
+    dispatcher = Dispatcher()
+    dispatcher.update.middleware(DatabaseMiddleware(async_db_session_factory))
+    dispatcher.include_router(router)
+
+    for update_id in range(1, 4):
+        await dispatcher.feed_update(
+            mock_bot, command_update(update_id, test_user.telegram_id, "/me")
+        )
+
+    assert len(seen) == 3
+    # a session per update, each closed when the update is handled
+    assert len({id(db.session) for db in seen}) == 3
+    assert not any(db.session.in_transaction() for db in seen)
@@ -0,0 +1,129 @@
+import pytest
+from sqlalchemy import event, func, select
+from sqlalchemy.exc import IntegrityError
+
+from app.common.db import Database
+from app.common.db.models import Sentence, Settings, Statistic, Word
+from app.common.db.repositories.word import WordData
+
+
+def word_data(index: int, native_word: str = "native") -> WordData:
+    return WordData(native_word=f"{native_word} {index}", foreign_word=f"word {index}")
+
+
+@pytest.mark.asyncio
+async def test_words_upserted_one_statement_per_chunk(async_db_session, async_engine):
+    db = Database(session=async_db_session)
+    await db.word.create_many([word_data(index) for index in range(3)])
+
+    statements: list[str] = []
+
+    def record(_conn, _cursor, statement, *_):
+        statements.append(statement)
+
+    event.listen(async_engine.sync_engine, "before_cursor_execute", record)
+    try:
+        returned = await db.word.bulk_upsert(
+            [
+                {"latin_word": f"word {index}", "native_word": f"new {index}"}
+                for index in range(1, 5)
+            ],
+            conflict_cols=["latin_word"],
+            update_cols=["native_word"],
+            returning=[Word.latin_word, Word.native_word],
+            chunk_size=2,
+        )
+    finally:
+        event.remove(async_engine.sync_engine, "before_cursor_execute", record)
+
+    assert sum("INSERT INTO word" in statement for statement in statements) == 2
+    assert not any(statement.startswith("SELECT") for statement in statements)
+    assert sorted(tuple(row) for row in returned) == [
+        (f"word {index}", f"new {index}") for index in range(1, 5)
+    ]
+    result = await async_db_session.execute(
+        select(Word.latin_word, Word.native_word).order_by(Word.latin_word)
+    )
+    assert [tuple(row) for row in result] == [
+        ("word 0", "native 0"),
+        *[(f"word {index}", f"new {index}") for index in range(1, 5)],
+    ]
+
+
+@pytest.mark.asyncio
+async def test_upsert_without_update_skips_conflicts(async_db_session):
+    db = Database(session=async_db_session)
+    await db.word.create(word_data(1))
+
+    returned = await db.word.bulk_upsert(
+        [{"latin_word": "word 1", "native_word": "skipped"}]
+        + [{"latin_word": "word 2", "native_word": "added"}],
+        conflict_cols=["latin_word"],
+        returning=[Word.latin_word],
+    )
+
+    assert [row.latin_word for row in returned] == ["word 2"]
+    native_words = await async_db_session.scalars(
+        select(Word.native_word).order_by(Word.latin_word)
+    )
+    assert list(native_words) == ["native 1", "added"]
+
+
+@pytest.mark.asyncio
+async def test_create_or_update_settings(test_user, async_db_session):
+    db = Database(session=async_db_session)
+
+    await db.settings.create_or_update_settings(test_user.telegram_id)
+    await db.settings.create_or_update_settings(test_user.telegram_id, spoiler_value=3)
+
+    settings = (await async_db_session.scalars(select(Settings))).all()
+    assert [(row.spoiler_settings, row.alphabet_settings) for row in settings] == [
+        (3, 3)
+    ]
+
+
+@pytest.mark.asyncio
+async def test_settings_of_missing_user_are_not_written(async_db_session):
+    db = Database(session=async_db_session)
+
+    with pytest.raises(IntegrityError):
+        await db.settings.create_or_update_settings(404)
+
+
+@pytest.mark.asyncio
+async def test_initialize_statistic_once(test_user, async_db_session):
+    db = Database(session=async_db_session)
+
+    await db.statistic.initialize_statistic(test_user.telegram_id)
+    await db.statistic.add_statistic(test_user.telegram_id, "create_card")
+    await db.statistic.initialize_statistic(test_user.telegram_id)
+
+    assert await async_db_session.scalar(select(func.count(Statistic.id))) == 1
+    assert await db.statistic.get_created_cards_today(test_user.telegram_id) == 1
+
+
+@pytest.mark.asyncio
+async def test_create_sentences(db_with_words, async_db_session):
+    db = Database(session=async_db_session)
+    word_id = db_with_words[0].id
+
+    await db.sentence.create("Imam psa.", "У меня собака.", word_id, "Имам пса.")
+    await db.sentence.create_many(
+        [
+            {
+                "latin_text": f"Sentence {index}",
+                "native_text": "translation",
+                "cyrilic_text": "",
+                "word_id": word_id,
+            }
+            for index in range(3)
+        ]
+    )
+    await async_db_session.commit()
+
+    result = await async_db_session.scalars(
+        select(Sentence.latin_text)
+        .where(Sentence.word_id == word_id)
+        .order_by(Sentence.id)
+    )
+    assert list(result) == ["Imam psa.", "Sentence 0", "Sentence 1", "Sentence 2"]
@@ -0,0 +1,189 @@
+import datetime
+
+import pytest
+from sqlalchemy import select, update
+
+from app.api.deps import table_review_algorithm
+from app.common.cache.backend import InMemoryStatesBackend
+from app.common.cache.states import UserProfile
+from app.common.db import Database
+from app.common.db.models import Card
+from app.common.db.models.card import KNOWN_CARD_VIEWS
+from app.states.user import StatesCreator, review_algorithm
+from app.utils.scheduling import DueSmoothing
+from app.words import WordCardHandler
+
+DAY = datetime.timedelta(days=1)
+
+
+@pytest.mark.asyncio
+@pytest.mark.usefixtures("db_with_words")
+async def test_card_due_time_maintained(test_user, async_db_session):
+    db = Database(session=async_db_session)
+    now = datetime.datetime.now()
+
+    known = await db.card.create_card(test_user.telegram_id, KNOWN_CARD_VIEWS, 1)
+    new = await db.card.create_card(test_user.telegram_id, 1, 2, last_view=now)
+    assert (known.mastered, known.next_review_at) == (True, None)
+    assert (new.mastered, new.next_review_at) == (False, now)
+
+    reviewed = await db.card.add_review(
+        test_user.telegram_id, 2, schedule=lambda _, views: now + views * DAY
+    )
+    assert reviewed.count_of_views == 2
+    assert reviewed.next_review_at == now + 2 * DAY
+
+    assert await db.card.count_due_cards(now + DAY) == {}
+    assert await db.card.count_due_cards(now + 3 * DAY) == {test_user.telegram_id: 1}
+
+
+@pytest.mark.asyncio
+@pytest.mark.usefixtures("db_with_words")
+async def test_card_stays_mastered_past_known_views(test_user, async_db_session):
+    db = Database(session=async_db_session)
+    await db.card.create_card(test_user.telegram_id, KNOWN_CARD_VIEWS, 1)
+    await db.card.create_card(test_user.telegram_id, KNOWN_CARD_VIEWS, 2)
+
+    reviewed = await db.card.add_review(test_user.telegram_id, 1)
+    await db.card.add_reviews(test_user.telegram_id, [2])
+
+    result = await async_db_session.execute(
+        select(Card.count_of_views, Card.mastered, Card.next_review_at)
+    )
+    assert reviewed.mastered
+    assert sorted(result.tuples()) == [(KNOWN_CARD_VIEWS + 1, True, None)] * 2
+
+
+@pytest.mark.asyncio
+@pytest.mark.usefixtures("db_with_words")
+async def test_hydration_uses_stored_due_time(test_user, async_db_session):
+    db = Database(session=async_db_session)
+    long_ago = datetime.datetime.now() - 30 * DAY
+    # both cards are long overdue by the algorithm, the reviewed one is stored
+    # as due tomorrow
+    await db.card.create_card(test_user.telegram_id, 1, 1, last_view=long_ago)
+    await db.card.create_card(test_user.telegram_id, 1, 2, last_view=long_ago)
+    await db.card.add_review(
+        test_user.telegram_id, 1, schedule=lambda *_: datetime.datetime.now() + DAY
+    )
+
+    creator = StatesCreator(db, review_algorithm, cache={})
+    profile = await creator.load_user_state(test_user.telegram_id)
+
+    assert list(profile.review_cards) == [2]
+    assert profile.waiting_cards.values() == [1]
+
+
+@pytest.mark.asyncio
+async def test_daily_cap_spreads_reviewed_cards(
+    test_user, db_with_cards, async_db_session
+):
+    profile = UserProfile()
+    profile.created_cards.update(card.word_id for card in db_with_cards)
+    profile.review_cards.extend([1, 2, 3])
+    handler = WordCardHandler(
+        db=Database(session=async_db_session),
+        states=InMemoryStatesBackend({test_user.telegram_id: profile}),
+        review_algorithm=table_review_algorithm,
+        smoothing=DueSmoothing(fuzz=0, daily_cap=1),
+    )
+
+    await handler.add_reviews(test_user.telegram_id, [(1, True), (2, True)])
+    await handler.add_review(test_user.telegram_id, True, 3)
+
+    result = await async_db_session.execute(
+        select(Card.next_review_at).where(Card.word_id.in_([1, 2, 3]))
+    )
+    due_dates = sorted(row.next_review_at for row in result)
+    assert [due.date() for due in due_dates] == [
+        due_dates[0].date() + days * DAY for days in range(3)
+    ]
+    # the cache schedules cards at the stored times
+    assert profile.waiting_cards.dates() == [int(due.timestamp()) for due in due_dates]
+
+
+@pytest.mark.asyncio
+async def test_passed_review_is_scheduled_once(
+    test_user, db_with_cards, async_db_session
+):
+    profile = UserProfile()
+    profile.created_cards.update(card.word_id for card in db_with_cards)
+    profile.review_cards.extend([1, 2, 3])
+    calls: list[int] = []
+
+    def algorithm(checks, passed, review_date):
+        calls.append(checks)
+        return table_review_algorithm(checks, passed, review_date)
+
+    handler = WordCardHandler(
+        db=Database(session=async_db_session),
+        states=InMemoryStatesBackend({test_user.telegram_id: profile}),
+        review_algorithm=algorithm,
+    )
+
+    await handler.add_reviews(test_user.telegram_id, [(1, True), (2, True)])
+    await handler.add_review(test_user.telegram_id, True, 3)
+
+    assert len(calls) == 3
+    result = await async_db_session.execute(
+        select(Card.next_review_at).where(Card.word_id.in_([1, 2, 3]))
+    )
+    stored = sorted(int(row.next_review_at.timestamp()) for row in result)
+    assert profile.waiting_cards.dates() == stored
+
+
+@pytest.mark.asyncio
+@pytest.mark.usefixtures("db_with_words")
+@pytest.mark.parametrize("batch", [False, True])
+async def test_mastered_card_becomes_known(test_user, async_db_session, batch):
+    db = Database(session=async_db_session)
+    await db.card.create_card(test_user.telegram_id, KNOWN_CARD_VIEWS - 1, 1)
+    profile = UserProfile()
+    profile.created_cards.add(1)
+    profile.review_cards.append(1)
+    handler = WordCardHandler(
+        db=db,
+        states=InMemoryStatesBackend({test_user.telegram_id: profile}),
+        review_algorithm=table_review_algorithm,
+    )
+
+    if batch:
+        await handler.add_reviews(test_user.telegram_id, [(1, True)])
+    else:
+        await handler.add_review(test_user.telegram_id, True, 1)
+
+    assert 1 not in profile.review_cards
+    assert len(profile.waiting_cards) == 0
+    assert 1 in profile.known_cards
+    # a restarted process builds the same state
+    loaded = await StatesCreator(db, review_algorithm, cache={}).load_user_state(
+        test_user.telegram_id
+    )
+    assert (list(loaded.known_cards), len(loaded.waiting_cards)) == ([1], 0)
+
+
+@pytest.mark.asyncio
+@pytest.mark.usefixtures("db_with_words")
+async def test_hydration_smooths_computed_due_times(test_user, async_db_session):
+    db = Database(session=async_db_session)
+    now = datetime.datetime.now()
+    for word_id in range(1, 4):
+        await db.card.create_card(test_user.telegram_id, 5, word_id, last_view=now)
+    # cards written before due times were stored
+    await async_db_session.execute(update(Card).values(next_review_at=None))
+    await async_db_session.commit()
+
+    plain = await StatesCreator(db, review_algorithm, cache={}).load_user_state(
+        test_user.telegram_id
+    )
+    smoothed = await StatesCreator(
+        db,
+        review_algorithm,
+        cache={},
+        smoothing=DueSmoothing(fuzz=0.1, daily_cap=1),
+    ).load_user_state(test_user.telegram_id)
+
+    plain_dates = plain.waiting_cards.dates()
+    smoothed_dates = smoothed.waiting_cards.dates()
+    assert len(set(plain_dates)) == 1
+    assert len({datetime.date.fromtimestamp(due) for due in smoothed_dates}) == 3
@@ -0,0 +1,93 @@
+import pytest
+from sqlalchemy.orm import selectinload
+
+from app.common.db import Database
+from app.common.db.models import Card, Word
+
+
+async def collect(pages) -> list:
+    return [page async for page in pages]
+
+
+@pytest.mark.asyncio
+async def test_stream_yields_every_entity_in_key_order(db_with_words, async_db_session):
+    db = Database(session=async_db_session)
+
+    words = [word async for word in db.word.stream(page_size=3)]
+
+    assert [word.id for word in words] == sorted(word.id for word in db_with_words)
+
+
+@pytest.mark.asyncio
+async def test_iter_pages_by_primary_key(db_with_words, async_db_session):
+    db = Database(session=async_db_session)
+    ids = sorted(word.id for word in db_with_words)
+
+    pages = await collect(db.word.iter_pages(page_size=4))
+
+    assert [[word.id for word in page] for page in pages] == [
+        ids[:4],
+        ids[4:8],
+        ids[8:],
+    ]
+
+
+@pytest.mark.asyncio
+async def test_iter_pages_condition_options_and_resume(db_with_words, async_db_session):
+    db = Database(session=async_db_session)
+    ids = sorted(word.id for word in db_with_words)
+
+    pages = await collect(
+        db.word.iter_pages(
+            condition=Word.id != ids[5],
+            page_size=5,
+            options=[selectinload(Word.sentences)],
+            after=ids[2],
+        )
+    )
+
+    assert [[word.id for word in page] for page in pages] == [
+        ids[3:5] + ids[6:9],
+        ids[9:],
+    ]
+    assert all(page[0].sentences == [] for page in pages)
+
+
+@pytest.mark.asyncio
+@pytest.mark.usefixtures("db_with_words")
+async def test_iter_pages_exact_multiple_of_page_size(async_db_session):
+    db = Database(session=async_db_session)
+
+    pages = await collect(db.word.iter_pages(page_size=5))
+
+    assert [len(page) for page in pages] == [5, 5]
+
+
+@pytest.mark.asyncio
+async def test_iter_row_pages_by_column(test_user, db_with_cards, async_db_session):
+    db = Database(session=async_db_session)
+
+    pages = await collect(
+        db.card.iter_row_pages(
+            Card.word_id,
+            Card.count_of_views,
+            condition=Card.user_id == test_user.telegram_id,
+            key=Card.word_id,
+            page_size=6,
+        )
+    )
+
+    assert [len(page) for page in pages] == [6, 4]
+    rows = [row for page in pages for row in page]
+    assert [row.word_id for row in rows] == sorted(
+        card.word_id for card in db_with_cards
+    )
+    assert {row.count_of_views for row in rows} == {1}
+
+
+@pytest.mark.asyncio
+async def test_iter_row_pages_requires_key_column(async_db_session):
+    db = Database(session=async_db_session)
+
+    with pytest.raises(ValueError):
+        await collect(db.card.iter_row_pages(Card.word_id))
@@ -0,0 +1,97 @@
+import datetime
+
+import pytest
+from sqlalchemy import select, update
+
+from app.common.cache.backend import InMemoryStatesBackend
+from app.common.cache.states import UserProfile
+from app.common.db import Database
+from app.common.db.models import Card, ReviewLog
+from app.scripts.fit_memory_model import fit_from_database
+from app.utils.memory_model import MemoryParams, MemoryScheduler
+from app.words import WordCardHandler
+
+
+@pytest.fixture
+def profile(db_with_cards) -> UserProfile:
+    profile = UserProfile()
+    profile.created_cards.update(card.word_id for card in db_with_cards)
+    profile.review_cards.extend([1, 2, 3, 4])
+    return profile
+
+
+@pytest.fixture
+def handler(test_user, profile, async_db_session) -> WordCardHandler:
+    return WordCardHandler(
+        db=Database(session=async_db_session),
+        states=InMemoryStatesBackend({test_user.telegram_id: profile}),
+        review_algorithm=MemoryScheduler(),
+        review_log=True,
+    )
+
+
+async def logged_reviews(session) -> list[tuple[int, int, bool]]:
+    result = await session.execute(
+        select(ReviewLog.word_id, ReviewLog.count_of_views, ReviewLog.passed).order_by(
+            ReviewLog.id
+        )
+    )
+    return [tuple(row) for row in result.all()]
+
+
+@pytest.mark.asyncio
+async def test_add_review_logs_outcomes(test_user, handler, async_db_session):
+    # the first card was viewed an hour ago
+    await async_db_session.execute(
+        update(Card)
+        .where(Card.word_id == 1)
+        .values(last_view=datetime.datetime.now() - datetime.timedelta(hours=1))
+    )
+    await async_db_session.commit()
+
+    await handler.add_review(test_user.telegram_id, True, 1)
+    await handler.add_review(test_user.telegram_id, False, 2)
+
+    assert await logged_reviews(async_db_session) == [(1, 1, True), (2, 1, False)]
+    elapsed = await async_db_session.scalar(
+        select(ReviewLog.elapsed_seconds).where(ReviewLog.word_id == 1)
+    )
+    assert 3590 <= elapsed <= 3610
+
+
+@pytest.mark.asyncio
+async def test_add_reviews_logs_accepted_outcomes(
+    test_user, handler, profile, async_db_session
+):
+    errors = await handler.add_reviews(
+        test_user.telegram_id, [(1, True), (2, False), (1, True), (99, False)]
+    )
+
+    assert errors[2:] == ["Word card is not waiting for review"] * 2
+    assert await logged_reviews(async_db_session) == [(1, 1, True), (2, 1, False)]
+    assert sorted(profile.waiting_cards.values()) == [1]
+
+
+@pytest.mark.asyncio
+async def test_failed_reviews_batch_is_committed(
+    test_user, handler, async_db_session_factory
+):
+    await handler.add_reviews(test_user.telegram_id, [(2, False), (3, False)])
+
+    async with async_db_session_factory() as session:
+        assert await logged_reviews(session) == [(2, 1, False), (3, 1, False)]
+
+
+@pytest.mark.asyncio
+@pytest.mark.usefixtures("profile")
+async def test_fit_from_database(test_user, handler, async_db_session):
+    await handler.add_reviews(test_user.telegram_id, [(1, True), (2, False)])
+
+    params, user_params = await fit_from_database(Database(async_db_session))
+
+    assert isinstance(params, MemoryParams)
+    # too few reviews for parameters of the user
+    assert user_params == {}
+    assert await fit_from_database(
+        Database(async_db_session), since=datetime.datetime.now()
+    ) == (MemoryParams(), {})
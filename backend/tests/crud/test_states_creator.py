@@ -0,0 +1,241 @@
+import datetime
+
+import pytest
+from sortedcontainers import SortedSet
+from sqlalchemy.orm import Session
+
+from app.common.cache.snapshot import dump_states, write_snapshot
+from app.common.cache.states import UserProfile
+from app.common.db import Database
+from app.common.db.models import Card, User, Word
+from app.states.user import (
+    KNOWN_CARD_VIEWS,
+    StatesCreator,
+    load_user_state,
+    review_algorithm,
+)
+from app.utils.scheduling import HYDRATION_INTERVALS
+
+
+@pytest.fixture(scope="function")
+def user_without_cards(db_session: Session) -> User:
+    user = User(telegram_id=987654321, user_name="no_cards")
+    db_session.add(user)
+    db_session.commit()
+    return user
+
+
+@pytest.fixture(scope="function")
+def mixed_cards(
+    db_session: Session, test_user: User, db_with_words: list[Word]
+) -> dict[str, list[int]]:
+    """Known, due and waiting cards for the test user"""
+    now = datetime.datetime.now()
+    groups: dict[str, list[int]] = {"known": [], "review": [], "waiting": []}
+    for index, word in enumerate(db_with_words):
+        if index % 3 == 0:
+            group, views, last_view = "known", KNOWN_CARD_VIEWS, now
+        elif index % 3 == 1:
+            group, views = "review", 1
+            last_view = now - datetime.timedelta(days=2, seconds=index)
+        else:
+            group, views = "waiting", 1
+            last_view = now - datetime.timedelta(seconds=index)
+        db_session.add(
+            Card(
+                user_id=test_user.telegram_id,
+                word_id=word.id,
+                count_of_views=views,
+                last_view=last_view,
+            )
+        )
+        groups[group].append(word.id)
+    db_session.commit()
+    return groups
+
+
+@pytest.mark.asyncio
+async def test_create_states_streams_all_users(
+    async_db_session,
+    test_user,
+    user_without_cards,
+    db_with_words,
+    mixed_cards,
+):
+    """Every user gets a profile built from one ordered card scan"""
+    creator = StatesCreator(
+        Database(session=async_db_session), review_algorithm, cache={}
+    )
+
+    states = await creator.create_states()
+
+    assert set(states) == {test_user.telegram_id, user_without_cards.telegram_id}
+
+    profile = states[test_user.telegram_id]
+    assert list(profile.created_cards) == [word.id for word in db_with_words]
+    assert list(profile.known_cards) == mixed_cards["known"]
+    assert sorted(profile.review_cards) == mixed_cards["review"]
+    assert sorted(profile.waiting_cards.values()) == mixed_cards["waiting"]
+
+    empty_profile = states[user_without_cards.telegram_id]
+    assert len(empty_profile.created_cards) == 0
+    assert empty_profile.review_cards == []
+
+
+@pytest.mark.asyncio
+async def test_create_states_no_users(async_db_session):
+    """Hydration of an empty database leaves the cache untouched"""
+    creator = StatesCreator(
+        Database(session=async_db_session), review_algorithm, cache={}
+    )
+
+    assert await creator.create_states() == {}
+
+
+@pytest.mark.asyncio
+async def test_stream_cards_by_user_small_batches(
+    async_db_session, test_user, user_without_cards, db_with_words, db_session
+):
+    """Groups stay intact when a user's cards span several cursor batches"""
+    now = datetime.datetime.now()
+    for user in (test_user, user_without_cards):
+        for word in db_with_words:
+            db_session.add(
+                Card(
+                    user_id=user.telegram_id,
+                    word_id=word.id,
+                    count_of_views=1,
+                    last_view=now,
+                )
+            )
+    db_session.commit()
+
+    db = Database(session=async_db_session)
+    groups = [
+        (user_id, [row.word_id for row in rows])
+        async for user_id, rows in db.card.stream_cards_by_user(batch_size=3)
+    ]
+
+    word_ids = [word.id for word in db_with_words]
+    assert groups == [
+        (test_user.telegram_id, word_ids),
+        (user_without_cards.telegram_id, word_ids),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_restore_states_replays_delta(
+    async_db_session, tmp_path, test_user, db_with_words, db_session
+):
+    """Snapshot data is kept and only cards viewed after it are replayed"""
+    snapshot_time = datetime.datetime.now() - datetime.timedelta(hours=1)
+    stale_word, reviewed_word, new_word = (word.id for word in db_with_words[:3])
+    snapshot_states = {
+        test_user.telegram_id: UserProfile(
+            created_cards=SortedSet([stale_word, reviewed_word]),
+            review_cards=[stale_word, reviewed_word],
+        )
+    }
+    path = tmp_path / "users.snapshot"
+    write_snapshot(path, dump_states(snapshot_states, snapshot_time))
+
+    old_view = snapshot_time - datetime.timedelta(days=1)
+    db_session.add_all(
+        [
+            # already in the snapshot, must not be touched
+            Card(
+                user_id=test_user.telegram_id,
+                word_id=stale_word,
+                count_of_views=1,
+                last_view=old_view,
+            ),
+            # reviewed after the snapshot, now waiting
+            Card(
+                user_id=test_user.telegram_id,
+                word_id=reviewed_word,
+                count_of_views=2,
+                last_view=datetime.datetime.now(),
+            ),
+            # created after the snapshot as a known word
+            Card(
+                user_id=test_user.telegram_id,
+                word_id=new_word,
+                count_of_views=KNOWN_CARD_VIEWS,
+                last_view=datetime.datetime.now(),
+            ),
+        ]
+    )
+    late_user = User(telegram_id=555, user_name="late")
+    db_session.add(late_user)
+    db_session.commit()
+
+    creator = StatesCreator(
+        Database(session=async_db_session), review_algorithm, cache={}
+    )
+    states = await creator.restore_states(path)
+
+    profile = states[test_user.telegram_id]
+    assert list(profile.created_cards) == [stale_word, reviewed_word, new_word]
+    assert profile.review_cards == [stale_word]
+    assert list(profile.waiting_cards.values()) == [reviewed_word]
+    assert list(profile.known_cards) == [new_word]
+    assert late_user.telegram_id in states
+
+
+@pytest.mark.asyncio
+async def test_load_user_state(async_db_session, test_user, db_with_words, mixed_cards):
+    """A single user's state matches what full hydration builds"""
+    db = Database(session=async_db_session)
+
+    profile = await load_user_state(db, test_user.telegram_id)
+    missing = await load_user_state(db, 42)
+
+    assert list(profile.created_cards) == [word.id for word in db_with_words]
+    assert list(profile.known_cards) == mixed_cards["known"]
+    assert sorted(profile.review_cards) == mixed_cards["review"]
+    assert len(missing.created_cards) == 0
+
+
+@pytest.mark.asyncio
+async def test_create_states_cards_due_same_second(
+    async_db_session, test_user, db_with_words, db_session
+):
+    """Cards reviewed in the same second are all kept in the schedule"""
+    last_view = datetime.datetime.now().replace(microsecond=0)
+    for word in db_with_words:
+        db_session.add(
+            Card(
+                user_id=test_user.telegram_id,
+                word_id=word.id,
+                count_of_views=2,
+                last_view=last_view,
+            )
+        )
+    db_session.commit()
+
+    creator = StatesCreator(
+        Database(session=async_db_session), review_algorithm, cache={}
+    )
+    states = await creator.create_states()
+
+    waiting_cards = states[test_user.telegram_id].waiting_cards
+    assert waiting_cards.values() == [word.id for word in db_with_words]
+    assert len(set(waiting_cards.dates())) == 1
+
+
+@pytest.mark.asyncio
+async def test_create_states_interval_table_matches_scalar(
+    async_db_session, test_user, mixed_cards
+):
+    """Vectorized scheduling of unscheduled cards builds the same profiles"""
+    db = Database(session=async_db_session)
+    scalar_states = await StatesCreator(db, review_algorithm, cache={}).create_states()
+    batch_states = await StatesCreator(
+        db, review_algorithm, cache={}, interval_table=HYDRATION_INTERVALS
+    ).create_states()
+
+    scalar_profile = scalar_states[test_user.telegram_id]
+    batch_profile = batch_states[test_user.telegram_id]
+    assert batch_profile.review_cards == scalar_profile.review_cards
+    assert batch_profile.waiting_cards.items() == scalar_profile.waiting_cards.items()
+    assert list(batch_profile.known_cards) == mixed_cards["known"]
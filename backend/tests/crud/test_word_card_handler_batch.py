@@ -0,0 +1,128 @@
+import pytest
+from sqlalchemy import event, select
+
+from app.api.deps import table_review_algorithm
+from app.common.cache.backend import InMemoryStatesBackend
+from app.common.cache.states import UserProfile
+from app.common.db import Database
+from app.common.db.models import Card
+from app.words import WordCardHandler
+
+
+@pytest.fixture
+def profile() -> UserProfile:
+    return UserProfile()
+
+
+@pytest.fixture
+def handler(test_user, profile, async_db_session) -> WordCardHandler:
+    return WordCardHandler(
+        db=Database(session=async_db_session),
+        states=InMemoryStatesBackend({test_user.telegram_id: profile}),
+        review_algorithm=table_review_algorithm,
+    )
+
+
+async def stored_cards(session) -> list[tuple[int, int]]:
+    result = await session.execute(
+        select(Card.word_id, Card.count_of_views).order_by(Card.word_id)
+    )
+    return [tuple(row) for row in result.all()]
+
+
+@pytest.mark.asyncio
+@pytest.mark.usefixtures("db_with_words")
+async def test_create_cards_batch(test_user, handler, profile, async_db_session):
+    cards = await handler.create_new_cards(
+        test_user.telegram_id, [(1, True), (3, False), (2, False)]
+    )
+
+    assert [card.word_id for card in cards] == [1, 3, 2]
+    assert [card.mastered for card in cards] == [True, False, False]
+    assert [card.next_review_at for card in cards] == [
+        None,
+        cards[1].last_view,
+        cards[2].last_view,
+    ]
+    assert await stored_cards(async_db_session) == [(1, 20), (2, 1), (3, 1)]
+    assert list(profile.created_cards) == [1, 2, 3]
+    assert list(profile.known_cards) == [1]
+    assert profile.review_cards == [3, 2]
+
+
+@pytest.mark.asyncio
+@pytest.mark.usefixtures("db_with_words")
+@pytest.mark.parametrize(
+    ("batch", "error"),
+    [
+        ([(2, False), (3, False)], "Word card not in sequence"),
+        ([(1, False), (1, True)], "Word card repeated in batch"),
+        ([(1, False), (999, False)], "Word cards not created"),
+    ],
+)
+async def test_create_cards_batch_is_all_or_nothing(
+    test_user, handler, profile, async_db_session, batch, error
+):
+    with pytest.raises(ValueError, match=error):
+        await handler.create_new_cards(test_user.telegram_id, batch)
+
+    assert await stored_cards(async_db_session) == []
+    assert len(profile.created_cards) == 0
+    assert len(profile.review_cards) == 0
+
+
+@pytest.mark.asyncio
+@pytest.mark.usefixtures("db_with_words")
+async def test_create_cards_batch_rejects_created_card(
+    test_user, handler, profile, async_db_session
+):
+    await handler.create_new_card(test_user.telegram_id, known=False, word_id=1)
+
+    with pytest.raises(ValueError, match="Word card already created: 1"):
+        await handler.create_new_cards(test_user.telegram_id, [(2, False), (1, True)])
+
+    assert await stored_cards(async_db_session) == [(1, 1)]
+    assert list(profile.created_cards) == [1]
+    assert profile.review_cards == [1]
+
+
+@pytest.mark.asyncio
+async def test_add_reviews_batch(
+    test_user, db_with_cards, handler, profile, async_db_session, async_engine
+):
+    profile.created_cards.update(card.word_id for card in db_with_cards)
+    profile.review_cards.extend([1, 2, 3, 4])
+    statements: list[str] = []
+
+    def record(_conn, _cursor, statement, *_args) -> None:
+        statements.append(statement)
+
+    event.listen(async_engine.sync_engine, "before_cursor_execute", record)
+    try:
+        errors = await handler.add_reviews(
+            test_user.telegram_id,
+            [(1, True), (2, False), (3, True), (1, True), (99, False)],
+        )
+    finally:
+        event.remove(async_engine.sync_engine, "before_cursor_execute", record)
+
+    assert errors == [
+        None,
+        None,
+        None,
+        "Word card is not waiting for review",
+        "Word card is not waiting for review",
+    ]
+    # views counted in one statement, due times written by a second one
+    assert [statement.split()[0] for statement in statements] == ["UPDATE", "UPDATE"]
+    assert await stored_cards(async_db_session) == [
+        (word_id, 2 if word_id in (1, 3) else 1) for word_id in range(1, 11)
+    ]
+    assert profile.review_cards == [4, 2]
+    assert sorted(profile.waiting_cards.values()) == [1, 3]
+    result = await async_db_session.execute(
+        select(Card.word_id, Card.next_review_at).where(Card.word_id.in_([1, 3]))
+    )
+    assert {
+        word_id: int(next_review_at.timestamp()) for word_id, next_review_at in result
+    } == {word_id: profile.waiting_cards.due_date(word_id) for word_id in (1, 3)}
@@ -0,0 +1,129 @@
+import asyncio
+from collections.abc import AsyncIterator, Callable
+from contextlib import asynccontextmanager
+
+import pytest
+from sqlalchemy import select
+
+from app.api.deps import table_review_algorithm
+from app.common.cache.backend import InMemoryStatesBackend
+from app.common.cache.locks import UserLocks
+from app.common.cache.states import UserProfile
+from app.common.db import Database
+from app.common.db.models import Card
+from app.words import WordCardHandler
+
+PARALLEL_REQUESTS = 10
+
+
+@pytest.fixture
+def states(test_user) -> InMemoryStatesBackend:
+    return InMemoryStatesBackend({test_user.telegram_id: UserProfile()})
+
+
+@pytest.fixture
+def handler_factory(
+    async_db_session_factory, states
+) -> Callable[[], AsyncIterator[WordCardHandler]]:
+    """Each call acts as a separate request with its own session"""
+    locks = UserLocks()
+
+    @asynccontextmanager
+    async def request() -> AsyncIterator[WordCardHandler]:
+        async with async_db_session_factory() as session:
+            yield WordCardHandler(
+                db=Database(session=session),
+                states=states,
+                review_algorithm=table_review_algorithm,
+                locks=locks,
+            )
+
+    return request
+
+
+async def run_parallel(handler_factory, calls) -> list[object]:
+    async def run(call):
+        async with handler_factory() as handler:
+            return await call(handler)
+
+    return await asyncio.gather(*(run(call) for call in calls), return_exceptions=True)
+
+
+async def db_cards(async_db_session_factory, user_id: int) -> list[Card]:
+    async with async_db_session_factory() as session:
+        result = await session.execute(
+            select(Card).where(Card.user_id == user_id).order_by(Card.word_id)
+        )
+        return list(result.scalars())
+
+
+@pytest.mark.asyncio
+async def test_parallel_card_creation_keeps_cache_and_db_in_sync(
+    handler_factory, async_db_session_factory, states, test_user, db_with_words
+):
+    user_id = test_user.telegram_id
+    word_ids = [word.id for word in db_with_words]
+    await run_parallel(
+        handler_factory,
+        [
+            lambda handler: handler.create_new_card(user_id, False, word_ids[0])
+            for _ in range(PARALLEL_REQUESTS)
+        ],
+    )
+
+    # double taps of every remaining word, known and unknown mixed
+    results = await run_parallel(
+        handler_factory,
+        [
+            lambda handler, word_id=word_id, known=known: handler.create_new_card(
+                user_id, known, word_id
+            )
+            for word_id in word_ids[1:]
+            for known in (False, True, False)
+        ],
+    )
+
+    errors = [result for result in results if isinstance(result, Exception)]
+    assert all(isinstance(error, ValueError) for error in errors)
+    assert len(errors) == 2 * len(word_ids[1:])
+
+    cards = await db_cards(async_db_session_factory, user_id)
+    profile = states.states[user_id]
+    assert [card.word_id for card in cards] == word_ids
+    assert list(profile.created_cards) == word_ids
+    assert sorted(profile.known_cards) == [
+        card.word_id for card in cards if card.count_of_views == 20
+    ]
+    assert sorted(profile.review_cards) == [
+        card.word_id for card in cards if card.count_of_views == 1
+    ]
+
+
+@pytest.mark.asyncio
+async def test_parallel_reviews_count_once(
+    handler_factory, async_db_session_factory, states, test_user, db_with_words
+):
+    user_id = test_user.telegram_id
+    word_ids = [word.id for word in db_with_words][:3]
+    for word_id in word_ids:
+        async with handler_factory() as handler:
+            await handler.create_new_card(user_id, False, word_id)
+
+    results = await run_parallel(
+        handler_factory,
+        [
+            lambda handler, word_id=word_id: handler.add_review(user_id, True, word_id)
+            for word_id in word_ids
+            for _ in range(PARALLEL_REQUESTS)
+        ],
+    )
+
+    errors = [result for result in results if isinstance(result, Exception)]
+    assert all(isinstance(error, ValueError) for error in errors)
+    assert len(errors) == (PARALLEL_REQUESTS - 1) * len(word_ids)
+
+    cards = await db_cards(async_db_session_factory, user_id)
+    profile = states.states[user_id]
+    assert [card.count_of_views for card in cards] == [2] * len(word_ids)
+    assert len(profile.review_cards) == 0
+    assert sorted(profile.waiting_cards.values()) == word_ids
@@ -0,0 +1,93 @@
+import pytest
+from sqlalchemy import delete
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.common.cache.backend import InMemoryStatesBackend
+from app.common.cache.states import UserProfile
+from app.common.db import Database
+from app.common.db.models import Sentence
+from app.utils.review_algoritm import review_algorithm
+from app.words import WordCardHandler
+from app.words.catalog import WordCatalogService
+
+
+@pytest.mark.asyncio
+@pytest.mark.usefixtures("db_with_sentences")
+async def test_catalog_matches_database(async_db_session):
+    db = Database(session=async_db_session)
+    service = WordCatalogService()
+
+    assert await service.refresh(db) is True
+    assert service.current is not None
+
+    db_words = await db.word.get_new_words(last_word_id=0, limit=20)
+    catalog_words = service.current.get_new_words(last_word_id=0, limit=20)
+    assert len(catalog_words) == len(db_words) == 10
+    for db_word, catalog_word in zip(db_words, catalog_words, strict=True):
+        assert catalog_word.id == db_word.id
+        assert catalog_word.latin_word == db_word.latin_word
+        assert catalog_word.legend == db_word.legend
+        assert sorted(sentence.latin_text for sentence in catalog_word.sentences) == (
+            sorted(sentence.latin_text for sentence in db_word.sentences)
+        )
+
+
+@pytest.mark.asyncio
+async def test_catalog_is_swapped_only_on_change(db_with_words, async_db_session):
+    db = Database(session=async_db_session)
+    service = WordCatalogService()
+    await service.refresh(db)
+    first = service.current
+
+    assert await service.refresh(db) is False
+    assert service.current is first
+
+    word = await db.word.get(db_with_words[0].id)
+    assert word is not None
+    word.legend = "changed legend"
+    await async_db_session.commit()
+
+    assert await service.refresh(db) is True
+    assert service.current is not first
+    assert service.current.get(word.id).legend == "changed legend"
+    # requests holding the old catalog still see consistent content
+    assert first.get(word.id).legend != "changed legend"
+
+
+@pytest.mark.asyncio
+async def test_sentence_change_bumps_content_version(
+    db_with_sentences, async_db_session
+):
+    db = Database(session=async_db_session)
+    version = await db.word.get_content_version()
+
+    await async_db_session.execute(
+        delete(Sentence).where(Sentence.id == db_with_sentences[0].id)
+    )
+    await async_db_session.commit()
+
+    assert await db.word.get_content_version() == version + 1
+
+
+@pytest.mark.asyncio
+@pytest.mark.usefixtures("db_with_sentences")
+async def test_handler_serves_words_without_database(test_user, async_db_session):
+    service = WordCatalogService()
+    await service.refresh(Database(session=async_db_session))
+    profile = UserProfile()
+    profile.created_cards.update([1, 2])
+    profile.review_cards.extend([4, 2])
+    # a session without a bind fails on any query
+    handler = WordCardHandler(
+        db=Database(session=AsyncSession()),
+        states=InMemoryStatesBackend({test_user.telegram_id: profile}),
+        review_algorithm=review_algorithm,  # type: ignore[arg-type]
+        catalog=service.current,
+    )
+
+    new_words = await handler.get_new_words(test_user.telegram_id, limit=3)
+    review_words = await handler.get_review_words(test_user.telegram_id)
+
+    assert [word.id for word in new_words] == [3, 4, 5]
+    assert all(len(word.sentences) == 3 for word in new_words)
+    assert [word.id for word in review_words] == [4, 2]
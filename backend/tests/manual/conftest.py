@@ -0,0 +1,22 @@
+"""
+Conftest for manual benchmarks which are skipped unless RUN_BENCHMARKS is set.
+"""
+
+import os
+
+import pytest
+
+
+def pytest_configure(config):
+    config.addinivalue_line(
+        "markers", "benchmark: slow benchmark, run with RUN_BENCHMARKS=1"
+    )
+
+
+def pytest_collection_modifyitems(config, items):  # noqa: ARG001
+    if os.getenv("RUN_BENCHMARKS"):
+        return
+    skip_benchmark = pytest.mark.skip(reason="set RUN_BENCHMARKS=1 to run")
+    for item in items:
+        if "benchmark" in item.keywords:
+            item.add_marker(skip_benchmark)
@@ -0,0 +1,79 @@
+"""Calls to a local mock Bot API: a bot per call vs the shared bot."""
+
+import asyncio
+import time
+
+import pytest
+from aiogram.client.telegram import TelegramAPIServer
+from aiohttp import web
+
+from app.api.bot.client import create_bot
+
+CALLS = 100
+TOKEN = "42:BENCHMARK"
+
+
+async def send_message(request: web.Request) -> web.Response:
+    request.app["connections"].add(request.transport.get_extra_info("peername"))
+    return web.json_response(
+        {
+            "ok": True,
+            "result": {
+                "message_id": 1,
+                "date": 0,
+                "chat": {"id": 1, "type": "private"},
+                "text": "ok",
+            },
+        }
+    )
+
+
+async def bot_per_call(api: TelegramAPIServer) -> None:
+    for _ in range(CALLS):
+        bot = create_bot(token=TOKEN, api=api)
+        await bot.send_message(1, "ok")
+        await bot.session.close()
+
+
+async def shared_bot(api: TelegramAPIServer) -> None:
+    bot = create_bot(token=TOKEN, api=api)
+    for _ in range(CALLS):
+        await bot.send_message(1, "ok")
+    await bot.session.close()
+
+
+async def shared_bot_concurrent(api: TelegramAPIServer) -> None:
+    bot = create_bot(token=TOKEN, api=api)
+    await asyncio.gather(*(bot.send_message(1, "ok") for _ in range(CALLS)))
+    await bot.session.close()
+
+
+@pytest.mark.benchmark
+@pytest.mark.asyncio
+async def test_bot_session_benchmark():
+    app = web.Application()
+    app["connections"] = set()
+    app.router.add_post("/bot{token}/sendMessage", send_message)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]  # type: ignore[union-attr]
+    api = TelegramAPIServer.from_base(f"http://127.0.0.1:{port}")
+
+    try:
+        for name, run in [
+            ("bot per call", bot_per_call),
+            ("shared bot", shared_bot),
+            ("shared bot, concurrent", shared_bot_concurrent),
+        ]:
+            app["connections"] = set()
+            started = time.perf_counter()
+            await run(api)
+            elapsed = time.perf_counter() - started
+            print(
+                f"\n{name}: {elapsed / CALLS * 1e3:.2f} ms per call, "
+                f"{len(app['connections'])} connections for {CALLS} calls"
+            )
+    finally:
+        await runner.cleanup()
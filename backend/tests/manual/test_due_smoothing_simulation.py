@@ -0,0 +1,76 @@
+"""
+Due load of an onboarding burst with and without due smoothing.
+
+Users join within an hour and create their first cards together, then pass
+every review when it is due. Reviews are counted by hour from the second
+day, after the first learning steps, and the peak hour and day are compared
+to the mean ones.
+"""
+
+from datetime import datetime
+
+import numpy as np
+import pytest
+
+from app.utils.scheduling import HYDRATION_INTERVALS, DueSmoothing
+
+USERS = 200
+CARDS = 50
+HORIZON_DAYS = 60
+HOUR = 60 * 60
+
+
+def simulate(smoothing: DueSmoothing | None) -> tuple[float, float]:
+    rng = np.random.default_rng(0)
+    start = datetime(2024, 1, 1, 9).timestamp()
+    end = start + HORIZON_DAYS * 24 * HOUR
+    user_ids = np.repeat(np.arange(USERS), CARDS)
+    word_ids = np.tile(np.arange(CARDS), USERS)
+    review_times = np.repeat(start + rng.uniform(0, HOUR, USERS), CARDS)
+    counts = np.ones(len(user_ids), dtype=np.int64)
+    day_counts = {
+        user_id: smoothing.day_counts([]) if smoothing else None
+        for user_id in range(USERS)
+    }
+
+    reviews = []
+    active = np.ones(len(user_ids), dtype=bool)
+    while active.any():
+        due = HYDRATION_INTERVALS.next_review_batch(
+            counts[active], review_times[active]
+        ).astype(np.float64)
+        if smoothing is not None:
+            due = smoothing.jitter_batch(
+                user_ids[active],
+                word_ids[active],
+                counts[active],
+                review_times[active],
+                due,
+            )
+            active_users = user_ids[active].tolist()
+            for index in np.argsort(due).tolist():
+                due[index] = smoothing.cap(due[index], day_counts[active_users[index]])
+        review_times[active] = due
+        counts[active] += 1
+        active[active] = due < end
+        reviews.append(review_times[active])
+
+    hours = np.bincount(
+        ((np.concatenate(reviews) - start) // HOUR).astype(np.int64),
+        minlength=HORIZON_DAYS * 24,
+    )[24 : HORIZON_DAYS * 24]
+    days = hours.reshape(-1, 24).sum(axis=1)
+    return float(hours.max() / hours.mean()), float(days.max() / days.mean())
+
+
+@pytest.mark.benchmark
+def test_due_smoothing_simulation():
+    for name, smoothing in [
+        ("no smoothing", None),
+        ("fuzz 5%", DueSmoothing(fuzz=0.05)),
+        ("fuzz 5% + cap 20/day", DueSmoothing(fuzz=0.05, daily_cap=20)),
+    ]:
+        hour_ratio, day_ratio = simulate(smoothing)
+        print(
+            f"\n{name}: peak/mean hour {hour_ratio:.1f}, peak/mean day {day_ratio:.1f}"
+        )
@@ -0,0 +1,76 @@
+"""Startup hydration benchmark: per-user queries vs one streamed scan."""
+
+import time
+
+import pytest
+from sqlalchemy import Engine, text
+
+from app.common.db import Database
+from app.states.user import StatesCreator, review_algorithm
+
+CARDS_PER_USER = 500
+
+
+def fill_cards(engine: Engine, cards: int) -> None:
+    users = cards // CARDS_PER_USER
+    with engine.begin() as conn:
+        conn.execute(
+            text(
+                "INSERT INTO word (latin_word, native_word) "
+                "SELECT 'w' || i, 'n' || i FROM generate_series(1, :words) i"
+            ),
+            {"words": CARDS_PER_USER},
+        )
+        conn.execute(
+            text(
+                'INSERT INTO "user" (telegram_id, is_premium, date_registration, role, paid) '
+                "SELECT u, false, now(), 0, false FROM generate_series(1, :users) u"
+            ),
+            {"users": users},
+        )
+        conn.execute(
+            text(
+                "INSERT INTO card (user_id, word_id, count_of_views, last_view) "
+                "SELECT u, w, 1 + (u + w) % 10, now() - (w || ' minutes')::interval "
+                "FROM generate_series(1, :users) u, generate_series(1, :words) w"
+            ),
+            {"users": users, "words": CARDS_PER_USER},
+        )
+
+
+async def per_user_hydration(creator: StatesCreator) -> int:
+    """The previous strategy: one capped query per user"""
+    db = creator.db
+    loaded = 0
+    for telegram_id in await db.user.get_all_user_ids():
+        cards = await db.card.fetch_many(
+            db.card.type_model.user_id == telegram_id, limit=10000
+        )
+        creator.cache[telegram_id] = creator._build_user_state(cards)
+        loaded += len(cards)
+    return loaded
+
+
+@pytest.mark.benchmark
+@pytest.mark.asyncio
+@pytest.mark.parametrize("cards", [10_000, 100_000, 1_000_000])
+async def test_hydration_benchmark(engine, async_db_session_factory, cards):
+    fill_cards(engine, cards)
+
+    async with async_db_session_factory() as session:
+        creator = StatesCreator(Database(session=session), review_algorithm, cache={})
+        started = time.perf_counter()
+        assert await per_user_hydration(creator) == cards
+        per_user_seconds = time.perf_counter() - started
+
+    async with async_db_session_factory() as session:
+        creator = StatesCreator(Database(session=session), review_algorithm, cache={})
+        started = time.perf_counter()
+        states = await creator.create_states()
+        streamed_seconds = time.perf_counter() - started
+
+    assert sum(len(profile.created_cards) for profile in states.values()) == cards
+    print(
+        f"\n{cards} cards: per-user {per_user_seconds:.2f}s, "
+        f"streamed {streamed_seconds:.2f}s"
+    )
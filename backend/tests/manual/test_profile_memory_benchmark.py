@@ -0,0 +1,48 @@
+"""Memory per user of sorted-container and compact profiles."""
+
+import tracemalloc
+
+import pytest
+
+from app.common.cache.compact import CompactUserProfile
+from app.common.cache.states import UserProfile
+
+USERS = 200
+
+
+def build_profile(factory, cards: int):
+    """Roughly a real user: a third known, a tenth due, the rest waiting"""
+    profile = factory()
+    for word_id in range(1, cards + 1):
+        profile.created_cards.add(word_id)
+        if word_id % 3 == 0:
+            profile.known_cards.add(word_id)
+        elif word_id % 10 == 1:
+            profile.review_cards.append(word_id)
+        else:
+            profile.waiting_cards.add(word_id, 1_700_000_000 + word_id * 60)
+    return profile
+
+
+def bytes_per_user(factory, cards: int) -> float:
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    profiles = [build_profile(factory, cards) for _ in range(USERS)]
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    allocated = sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+    assert len(profiles) == USERS
+    return allocated / USERS
+
+
+@pytest.mark.benchmark
+@pytest.mark.parametrize("cards", [100, 1000, 3800])
+def test_profile_memory_benchmark(cards):
+    regular = bytes_per_user(UserProfile, cards)
+    compact = bytes_per_user(CompactUserProfile, cards)
+
+    print(
+        f"\n{cards} cards: UserProfile {regular:,.0f} B/user, "
+        f"CompactUserProfile {compact:,.0f} B/user ({regular / compact:.1f}x)"
+    )
+    assert compact < regular
@@ -0,0 +1,76 @@
+"""Review throughput benchmark: one request per review vs batched reviews."""
+
+import time
+
+import pytest
+from sqlalchemy import Engine, text
+
+from app.api.deps import table_review_algorithm
+from app.common.cache.backend import InMemoryStatesBackend
+from app.common.cache.states import UserProfile
+from app.common.db import Database
+from app.words import WordCardHandler
+
+SESSION = 20
+SESSIONS = 50
+
+
+def fill_cards(engine: Engine, user_id: int, cards: int) -> None:
+    with engine.begin() as conn:
+        conn.execute(
+            text(
+                "INSERT INTO word (latin_word, native_word) "
+                "SELECT 'w' || i, 'n' || i FROM generate_series(1, :cards) i"
+            ),
+            {"cards": cards},
+        )
+        conn.execute(
+            text(
+                "INSERT INTO card (user_id, word_id, count_of_views, last_view) "
+                "SELECT :user_id, w, 1, now() FROM generate_series(1, :cards) w"
+            ),
+            {"user_id": user_id, "cards": cards},
+        )
+
+
+@pytest.mark.benchmark
+@pytest.mark.asyncio
+async def test_review_batch_benchmark(engine, async_db_session_factory, test_user):
+    user_id = test_user.telegram_id
+    cards = 2 * SESSION * SESSIONS
+    fill_cards(engine, user_id, cards)
+    profile = UserProfile()
+    profile.review_cards.extend(range(1, cards + 1))
+    states = InMemoryStatesBackend({user_id: profile})
+    sessions = [
+        list(range(start, start + SESSION)) for start in range(1, cards + 1, SESSION)
+    ]
+
+    started = time.perf_counter()
+    for word_ids in sessions[:SESSIONS]:
+        for word_id in word_ids:
+            # every review is a request with its own session
+            async with async_db_session_factory() as session:
+                handler = WordCardHandler(
+                    Database(session=session), states, table_review_algorithm
+                )
+                await handler.add_review(user_id, passed=True, word_id=word_id)
+    per_review = SESSION * SESSIONS / (time.perf_counter() - started)
+
+    started = time.perf_counter()
+    for word_ids in sessions[SESSIONS:]:
+        async with async_db_session_factory() as session:
+            handler = WordCardHandler(
+                Database(session=session), states, table_review_algorithm
+            )
+            errors = await handler.add_reviews(
+                user_id, [(word_id, True) for word_id in word_ids]
+            )
+        assert errors == [None] * SESSION
+    batched = SESSION * SESSIONS / (time.perf_counter() - started)
+
+    assert len(profile.review_cards) == 0
+    print(
+        f"\n{SESSION} reviews per session: one by one {per_review:.0f} reviews/s, "
+        f"batched {batched:.0f} reviews/s"
+    )
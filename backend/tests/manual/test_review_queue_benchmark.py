@@ -0,0 +1,53 @@
+"""Review queue operations on a plain list and on ReviewQueue."""
+
+import timeit
+
+import pytest
+
+from app.common.cache.review_queue import ReviewQueue
+
+ROUNDS = 200
+
+
+def review_round(queue, word_ids: list[int]) -> None:
+    """One review session: read a page, pass half of it and fail the rest"""
+    for index, word_id in enumerate(queue[0:20]):
+        queue.remove(word_id)
+        if index % 2:
+            queue.append(word_id)
+    queue.extend(word_ids)
+
+
+def bench(factory, size: int) -> float:
+    word_ids = list(range(size))
+    queue = factory(word_ids)
+    refill = list(range(size, size + 10))
+    return timeit.timeit(lambda: review_round(queue, refill), number=ROUNDS)
+
+
+def bench_remove_last(factory, size: int) -> float:
+    queue = factory(range(size))
+
+    def remove_last() -> None:
+        queue.remove(size - 1)
+        queue.append(size - 1)
+
+    return timeit.timeit(remove_last, number=ROUNDS * 20)
+
+
+@pytest.mark.benchmark
+@pytest.mark.parametrize("size", [100, 1000, 10000])
+def test_review_queue_benchmark(size):
+    list_round = bench(list, size)
+    queue_round = bench(ReviewQueue, size)
+    list_remove = bench_remove_last(list, size)
+    queue_remove = bench_remove_last(ReviewQueue, size)
+
+    print(
+        f"\n{size} queued: review round list {list_round * 1e6 / ROUNDS:.1f} us, "
+        f"ReviewQueue {queue_round * 1e6 / ROUNDS:.1f} us; "
+        f"remove last list {list_remove * 1e6 / (ROUNDS * 20):.2f} us, "
+        f"ReviewQueue {queue_remove * 1e6 / (ROUNDS * 20):.2f} us"
+    )
+    if size >= 1000:
+        assert queue_remove < list_remove
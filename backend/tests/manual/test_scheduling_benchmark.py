@@ -0,0 +1,39 @@
+"""Next review times of many cards: scalar review_algorithm vs the batch API."""
+
+import time
+from datetime import datetime
+
+import numpy as np
+import pytest
+
+from app.states.user import review_algorithm
+from app.utils.scheduling import HYDRATION_INTERVALS
+
+
+@pytest.mark.benchmark
+@pytest.mark.parametrize("cards", [10_000, 100_000, 1_000_000])
+def test_scheduling_benchmark(cards):
+    rng = np.random.default_rng(0)
+    count_of_views = rng.integers(0, 20, cards)
+    last_view = rng.integers(1_700_000_000, 1_710_000_000, cards)
+    passed = rng.random(cards) < 0.8
+
+    views_list = count_of_views.tolist()
+    dates = [datetime.fromtimestamp(timestamp) for timestamp in last_view.tolist()]
+    passed_list = passed.tolist()
+    started = time.perf_counter()
+    scalar = [
+        int(review_algorithm(date, views, flag).timestamp())
+        for date, views, flag in zip(dates, views_list, passed_list, strict=True)
+    ]
+    scalar_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    batch = HYDRATION_INTERVALS.next_review_batch(count_of_views, last_view, passed)
+    batch_seconds = time.perf_counter() - started
+
+    assert batch.tolist() == scalar
+    print(
+        f"\n{cards} cards: scalar {scalar_seconds * 1e3:.1f} ms, "
+        f"batch {batch_seconds * 1e3:.2f} ms"
+    )
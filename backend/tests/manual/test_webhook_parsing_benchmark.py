@@ -0,0 +1,103 @@
+"""Webhook update parsing benchmark: dicts and models vs raw bytes."""
+
+import json
+import time
+from typing import Any
+
+import pytest
+from aiogram import Bot
+from aiogram.types import Update
+
+from app.api.bot.ingestion import UpdateTypeFilter, parse_update
+
+UPDATES = 5000
+BOT = Bot("42:TEST")
+
+
+def user(user_id: int) -> dict[str, Any]:
+    return {
+        "id": user_id,
+        "is_bot": False,
+        "first_name": f"User {user_id}",
+        "username": f"user{user_id}",
+        "language_code": "ru",
+    }
+
+
+def message(update_id: int) -> dict[str, Any]:
+    user_id = update_id % 500
+    return {
+        "message_id": update_id,
+        "from": user(user_id),
+        "chat": {"id": user_id, "first_name": f"User {user_id}", "type": "private"},
+        "date": 1700000000 + update_id,
+        "text": "/start" if update_id % 10 else "Какое-то сообщение от пользователя",
+        "entities": [{"offset": 0, "length": 6, "type": "bot_command"}],
+    }
+
+
+def payload(update_id: int) -> bytes:
+    """Update shaped like the ones Telegram sends a bot with a web app"""
+    kind = update_id % 10
+    update: dict[str, Any] = {"update_id": update_id}
+    if kind < 6:
+        update["message"] = message(update_id)
+    elif kind < 8:
+        update["callback_query"] = {
+            "id": str(update_id),
+            "from": user(update_id % 500),
+            "chat_instance": "-1",
+            "data": "next",
+            "message": message(update_id),
+        }
+    elif kind == 8:
+        update["edited_message"] = message(update_id)
+    else:
+        update["my_chat_member"] = {
+            "chat": message(update_id)["chat"],
+            "from": user(update_id % 500),
+            "date": 1700000000,
+            "old_chat_member": {"user": user(1), "status": "member"},
+            "new_chat_member": {
+                "user": user(1),
+                "status": "kicked",
+                "until_date": 0,
+            },
+        }
+    return json.dumps(update, ensure_ascii=False).encode()
+
+
+def microseconds(started: float) -> float:
+    return (time.perf_counter() - started) / UPDATES * 1_000_000
+
+
+@pytest.mark.benchmark
+def test_webhook_parsing_benchmark():
+    corpus = [payload(update_id) for update_id in range(UPDATES)]
+
+    started = time.perf_counter()
+    for body in corpus:
+        # what the webhook did: json to dicts, dicts to models, and feed_update
+        # dumping and validating the update again to bind it to the bot
+        update = Update(**json.loads(body))
+        dict_update = Update.model_validate(update.model_dump(), context={"bot": BOT})
+    dicts = microseconds(started)
+
+    started = time.perf_counter()
+    for body in corpus:
+        raw_update = parse_update(body, BOT)
+    raw = microseconds(started)
+
+    # only messages have handlers
+    update_filter = UpdateTypeFilter(["message"])
+    started = time.perf_counter()
+    for body in corpus:
+        if update_filter(body):
+            parse_update(body, BOT)
+    filtered = microseconds(started)
+
+    assert raw_update.model_dump() == dict_update.model_dump()
+    print(
+        f"\nper update: dicts and models {dicts:.1f}us, raw bytes {raw:.1f}us, "
+        f"raw bytes filtered {filtered:.1f}us ({update_filter.skipped} skipped)"
+    )
@@ -0,0 +1,88 @@
+"""Word page latency benchmark: per-request SQL vs the in-process catalog."""
+
+import random
+import time
+
+import pytest
+from sqlalchemy import Engine, text
+from sqlalchemy.orm import joinedload
+
+from app.common.db import Database
+from app.common.db.models import Word
+from app.words.catalog import WordCatalogService
+
+WORDS = 5000
+PAGE = 20
+REQUESTS = 500
+
+
+def fill_words(engine: Engine) -> None:
+    with engine.begin() as conn:
+        conn.execute(
+            text(
+                "INSERT INTO word (latin_word, native_word, cyrillic_word, legend) "
+                "SELECT 'w' || i, 'n' || i, 'c' || i, 'legend ' || i "
+                "FROM generate_series(1, :words) i"
+            ),
+            {"words": WORDS},
+        )
+        conn.execute(
+            text(
+                "INSERT INTO sentence (native_text, cyrilic_text, latin_text, word_id) "
+                "SELECT 'native ' || s, 'cyrilic ' || s, 'latin ' || s, w "
+                "FROM generate_series(1, :words) w, generate_series(1, 3) s"
+            ),
+            {"words": WORDS},
+        )
+
+
+def microseconds(started: float) -> float:
+    return (time.perf_counter() - started) / REQUESTS * 1_000_000
+
+
+@pytest.mark.benchmark
+@pytest.mark.asyncio
+async def test_word_catalog_benchmark(engine, async_db_session_factory):
+    fill_words(engine)
+    rng = random.Random(0)
+    last_ids = [rng.randrange(WORDS - PAGE) for _ in range(REQUESTS)]
+    review_ids = [rng.sample(range(1, WORDS + 1), PAGE) for _ in range(REQUESTS)]
+
+    started = time.perf_counter()
+    for last_id in last_ids:
+        async with async_db_session_factory() as session:
+            await Database(session=session).word.get_new_words(last_id, limit=PAGE)
+    db_new = microseconds(started)
+
+    started = time.perf_counter()
+    for word_ids in review_ids:
+        async with async_db_session_factory() as session:
+            await Database(session=session).word.get_many(
+                condition=Word.id.in_(word_ids),
+                options=[joinedload(Word.sentences)],
+            )
+    db_review = microseconds(started)
+
+    service = WordCatalogService()
+    async with async_db_session_factory() as session:
+        started = time.perf_counter()
+        await service.refresh(Database(session=session))
+        load_seconds = time.perf_counter() - started
+    catalog = service.current
+    assert catalog is not None and len(catalog) == WORDS
+
+    started = time.perf_counter()
+    for last_id in last_ids:
+        assert len(catalog.get_new_words(last_id, limit=PAGE)) == PAGE
+    catalog_new = microseconds(started)
+
+    started = time.perf_counter()
+    for word_ids in review_ids:
+        assert len(catalog.get_many(word_ids)) == PAGE
+    catalog_review = microseconds(started)
+
+    print(
+        f"\n{WORDS} words, catalog loaded in {load_seconds:.2f}s"
+        f"\nnew words page: sql {db_new:.0f}us, catalog {catalog_new:.1f}us"
+        f"\nreview page: sql {db_review:.0f}us, catalog {catalog_review:.1f}us"
+    )
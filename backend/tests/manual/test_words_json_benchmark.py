@@ -0,0 +1,72 @@
+"""WordsResponse serialization benchmark: schema objects vs encoded words."""
+
+import time
+
+import pytest
+from fastapi.responses import JSONResponse
+
+from app.common.shemas.words import WordResponse, WordsResponse
+from app.words.catalog import CatalogSentence, CatalogWord, WordCatalog
+
+WORDS = 5000
+PAGE = 20
+REQUESTS = 2000
+
+
+def make_word(word_id: int) -> CatalogWord:
+    return CatalogWord(
+        id=word_id,
+        latin_word=f"latin {word_id}",
+        native_word=f"родной {word_id}",
+        cyrillic_word=f"кириллица {word_id}",
+        legend=f"legend of the word number {word_id}",
+        image=None,
+        transcription=None,
+        voice_id=None,
+        sentences=tuple(
+            CatalogSentence(
+                id=word_id * 3 + number,
+                native_text=f"Предложение номер {number} для слова {word_id}.",
+                cyrilic_text=f"Кириллическое предложение {number}.",
+                latin_text=f"Latin sentence number {number} for word {word_id}.",
+            )
+            for number in range(3)
+        ),
+    )
+
+
+def microseconds(started: float) -> float:
+    return (time.perf_counter() - started) / REQUESTS * 1_000_000
+
+
+@pytest.mark.benchmark
+def test_words_json_benchmark():
+    catalog = WordCatalog(make_word(word_id) for word_id in range(1, WORDS + 1))
+    pages = [
+        catalog.get_new_words(request * PAGE % (WORDS - PAGE), limit=PAGE)
+        for request in range(REQUESTS)
+    ]
+
+    started = time.perf_counter()
+    for words in pages:
+        # what the routes did: build the schema, fastapi validates and renders it
+        response = WordsResponse(
+            words=[WordResponse.from_db_model(word) for word in words]
+        )
+        schema_body = JSONResponse(
+            WordsResponse.model_validate(response).model_dump(mode="json")
+        ).body
+    schema = microseconds(started)
+
+    # encode every word once, as the first requests after a catalog load do
+    catalog.encode(range(1, WORDS + 1))
+    started = time.perf_counter()
+    for words in pages:
+        encoded_body = catalog.encode(word.id for word in words)
+    encoded = microseconds(started)
+
+    assert encoded_body == schema_body
+    print(
+        f"\n{PAGE} words per response: schema {schema:.0f}us, "
+        f"encoded words {encoded:.1f}us"
+    )
@@ -1,4 +1,7 @@
-from app.common.cache.states import UserProfile
+import pytest
+from sortedcontainers import SortedSet
+
+from app.common.cache.states import UserProfile, UsersStates
 
 
 def test_user_profile_create_different_instances():
@@ -20,3 +23,73 @@ def test_user_profile_create_different_instances():
     assert user_1.known_cards != user_2.known_cards
     assert user_1.master_cards != user_2.master_cards
     assert user_1.review_cards != user_2.review_cards
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def make_loader(loaded: list[int]):
+    async def loader(db, user_id: int) -> UserProfile:  # noqa: ARG001
+        loaded.append(user_id)
+        return UserProfile(created_cards=SortedSet([user_id]))
+
+    return loader
+
+
+@pytest.mark.asyncio
+async def test_users_states_without_loader_is_a_plain_cache():
+    states = UsersStates()
+    states[1] = UserProfile()
+
+    await states.load(2, db=None)
+
+    assert list(states) == [1]
+
+
+@pytest.mark.asyncio
+async def test_users_states_loads_on_first_access():
+    loaded: list[int] = []
+    states = UsersStates()
+    states.configure(loader=make_loader(loaded))
+
+    await states.load(7, db=None)
+    await states.load(7, db=None)
+
+    assert loaded == [7]
+    assert list(states[7].created_cards) == [7]
+
+
+@pytest.mark.asyncio
+async def test_users_states_evicts_least_recently_used():
+    loaded: list[int] = []
+    states = UsersStates()
+    states.configure(loader=make_loader(loaded), max_size=2)
+
+    await states.load(1, db=None)
+    await states.load(2, db=None)
+    await states.load(1, db=None)
+    await states.load(3, db=None)
+
+    assert list(states) == [1, 3]
+    await states.load(2, db=None)
+    assert loaded == [1, 2, 3, 2]
+
+
+@pytest.mark.asyncio
+async def test_users_states_evicts_idle_profiles():
+    clock = FakeClock()
+    states = UsersStates(clock=clock)
+    states.configure(loader=make_loader([]), max_idle=60)
+
+    await states.load(1, db=None)
+    clock.now = 30
+    await states.load(2, db=None)
+    clock.now = 70
+    await states.load(3, db=None)
+
+    assert list(states) == [2, 3]
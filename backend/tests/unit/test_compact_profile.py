@@ -0,0 +1,118 @@
+from datetime import datetime
+
+import pytest
+from sortedcontainers import SortedSet
+
+from app.common.cache.compact import (
+    CompactUserProfile,
+    WordArray,
+    WordBitmap,
+    WordSchedule,
+)
+from app.common.cache.schedule import ReviewSchedule
+from app.common.cache.snapshot import dump_states, load_states
+from app.common.cache.states import UserProfile
+
+
+def apply_operations(profile) -> None:
+    """Mutations WordCardHandler and StatesCreator perform on a profile"""
+    for word_id in (3, 1, 2, 900, 17):
+        profile.created_cards.add(word_id)
+    profile.known_cards.update([1, 17])
+    profile.known_cards.discard(17)
+    profile.master_cards.add(2)
+    profile.review_cards.extend([900, 3, 17])
+    profile.review_cards.append(2)
+    profile.review_cards.append(3)
+    profile.review_cards.remove(900)
+    profile.review_cards.move_to_end(3)
+    profile.review_cards.difference_update([2])
+    profile.waiting_cards.add(17, 1_700_000_500)
+    profile.waiting_cards.update([(1_700_000_000, 900), (1_700_000_000, 2)])
+    profile.waiting_cards.add(3, 1_700_000_900)
+    profile.waiting_cards.remove(3)
+    profile.waiting_cards.add(900, 1_700_000_700)
+    assert profile.waiting_cards.pop_due(1_700_000_600) == [2, 17]
+
+
+def test_compact_profile_matches_user_profile():
+    compact = CompactUserProfile()
+    regular = UserProfile()
+
+    apply_operations(compact)
+    apply_operations(regular)
+
+    assert compact == regular
+    assert compact.created_cards[-1] == regular.created_cards[-1] == 900
+    assert compact.created_cards[0] == regular.created_cards[0] == 1
+    assert 900 in compact.created_cards
+    assert len(compact.created_cards) == len(regular.created_cards)
+    assert compact.review_cards.first(1) == regular.review_cards.first(1) == [17]
+    assert compact.waiting_cards.items() == regular.waiting_cards.items()
+    assert compact.waiting_cards.first_due() == 1_700_000_700
+
+
+def test_compact_profile_from_sorted_containers():
+    compact = CompactUserProfile(
+        created_cards=SortedSet([5, 1]),
+        review_cards=[5],
+        waiting_cards=ReviewSchedule([(20, 1)]),
+    )
+
+    assert list(compact.created_cards) == [1, 5]
+    assert compact.review_cards == [5]
+    assert compact.waiting_cards.due_date(1) == 20
+
+
+def test_word_bitmap_positional_access():
+    bitmap = WordBitmap([10, 3, 64, 8])
+
+    assert [bitmap[i] for i in range(4)] == [3, 8, 10, 64]
+    assert bitmap[-2] == 10
+    with pytest.raises(IndexError):
+        WordBitmap()[-1]
+
+
+def test_word_schedule_keeps_cards_due_together():
+    schedule = WordSchedule([(10, 1)])
+    schedule.add(2, 10)
+    schedule.add(1, 5)
+
+    assert schedule.items() == [(5, 1), (10, 2)]
+    assert 2 in schedule
+    with pytest.raises(KeyError):
+        schedule.remove(3)
+
+
+def test_word_schedule_update_matches_adds():
+    entries = [(30, 4), (10, 1), (20, 2), (10, 3), (5, 2)]
+    added = WordSchedule([(40, 1), (15, 7)])
+    for review_date, word_id in entries:
+        added.add(word_id, review_date)
+
+    updated = WordSchedule([(40, 1), (15, 7)])
+    updated.update(entries)
+
+    assert (
+        updated.items() == added.items() == [(5, 2), (10, 1), (10, 3), (15, 7), (30, 4)]
+    )
+    assert updated == ReviewSchedule(entries + [(15, 7)])
+
+
+def test_word_array_slice_assignment():
+    words = WordArray([1, 2, 3])
+    words[:] = (w for w in words if w != 2)
+
+    assert words == [1, 3]
+
+
+def test_snapshot_restores_compact_profiles():
+    profile = CompactUserProfile()
+    apply_operations(profile)
+
+    _, states = load_states(
+        dump_states({1: profile}, datetime.now()), CompactUserProfile
+    )
+
+    assert isinstance(states[1], CompactUserProfile)
+    assert states[1] == profile
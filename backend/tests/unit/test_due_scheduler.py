@@ -0,0 +1,74 @@
+import pytest
+
+from app.common.cache.compact import CompactUserProfile
+from app.common.cache.schedule import ReviewSchedule
+from app.common.cache.scheduler import DueScheduler
+from app.common.cache.states import UserProfile
+
+
+def test_promote_due_moves_all_due_cards_in_order():
+    states = {
+        1: UserProfile(waiting_cards=ReviewSchedule([(10, 5), (20, 6), (30, 7)])),
+        2: UserProfile(waiting_cards=ReviewSchedule([(15, 8)])),
+    }
+    scheduler = DueScheduler(states)
+    scheduler.track_all()
+
+    assert scheduler.promote_due(now=25) == 3
+
+    assert states[1].review_cards == [5, 6]
+    assert states[1].waiting_cards.items() == [(30, 7)]
+    assert states[2].review_cards == [8]
+    assert scheduler.next_due(1) == 30
+    assert scheduler.next_due(2) is None
+    assert len(scheduler) == 1
+    assert scheduler.promoted == 3
+
+
+def test_promote_due_keeps_cards_due_now():
+    states = {1: UserProfile(waiting_cards=ReviewSchedule([(10, 5)]))}
+    scheduler = DueScheduler(states)
+    scheduler.track(1)
+
+    assert scheduler.promote_due(now=10) == 0
+    assert scheduler.promote_due(now=11) == 1
+
+
+def test_earlier_schedule_replaces_heap_entry():
+    states = {1: UserProfile(waiting_cards=ReviewSchedule([(100, 5)]))}
+    scheduler = DueScheduler(states)
+    scheduler.track(1)
+
+    states[1].waiting_cards.add(6, 10)
+    scheduler.schedule(1, 10)
+    # a later due time does not add another entry
+    scheduler.schedule(1, 200)
+
+    assert scheduler.promote_due(now=50) == 1
+    assert states[1].review_cards == [6]
+    assert scheduler.next_due(1) == 100
+    assert scheduler.promote_due(now=150) == 1
+    assert scheduler.promote_due(now=300) == 0
+
+
+def test_evicted_profile_is_skipped():
+    states = {1: UserProfile(waiting_cards=ReviewSchedule([(10, 5)]))}
+    scheduler = DueScheduler(states)
+    scheduler.track(1)
+
+    del states[1]
+
+    assert scheduler.promote_due(now=20) == 0
+    assert len(scheduler) == 0
+
+
+@pytest.mark.parametrize("factory", [UserProfile, CompactUserProfile])
+def test_promote_due_profile_implementations(factory):
+    profile = factory()
+    profile.waiting_cards.update([(10, 1), (10, 2), (11, 3)])
+    scheduler = DueScheduler({1: profile}, clock=lambda: 100)
+    scheduler.track(1)
+
+    assert scheduler.promote_due() == 3
+    assert list(profile.review_cards) == [1, 2, 3]
+    assert len(profile.waiting_cards) == 0
@@ -0,0 +1,98 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+from app.utils.scheduling import DueSmoothing, card_fractions
+
+REVIEW_DATE = datetime(2024, 1, 1, 12)
+DUE = REVIEW_DATE + timedelta(days=10)
+
+
+def test_card_fractions_are_fixed_per_card():
+    word_ids = np.arange(10_000)
+
+    fractions = card_fractions(1, word_ids, 3)
+
+    np.testing.assert_array_equal(fractions, card_fractions(1, word_ids, 3))
+    assert ((fractions >= 0) & (fractions < 1)).all()
+    # roughly uniform
+    assert np.histogram(fractions, bins=10)[0].min() > 900
+    assert card_fractions(1, 5, 3) != card_fractions(1, 5, 4)
+    assert card_fractions(1, 5, 3) != card_fractions(2, 5, 3)
+
+
+def test_jitter_stays_within_fuzz():
+    smoothing = DueSmoothing(fuzz=0.1)
+
+    due_dates = [
+        smoothing.jitter(1, word_id, 2, REVIEW_DATE, DUE) for word_id in range(500)
+    ]
+
+    assert all(
+        timedelta(days=9) <= due - REVIEW_DATE <= timedelta(days=11)
+        for due in due_dates
+    )
+    assert len(set(due_dates)) == 500
+    assert smoothing.jitter(1, 0, 2, REVIEW_DATE, DUE) == due_dates[0]
+
+
+def test_jitter_batch_matches_jitter():
+    smoothing = DueSmoothing(fuzz=0.05)
+    word_ids = list(range(100))
+
+    batch = smoothing.jitter_batch(
+        [7] * 100,
+        word_ids,
+        [3] * 100,
+        [REVIEW_DATE.timestamp()] * 100,
+        [DUE.timestamp()] * 100,
+    )
+
+    expected = [
+        smoothing.jitter(7, word_id, 3, REVIEW_DATE, DUE).timestamp()
+        for word_id in word_ids
+    ]
+    np.testing.assert_allclose(batch, expected)
+
+
+def test_no_fuzz_keeps_due_dates():
+    smoothing = DueSmoothing(fuzz=0)
+
+    assert smoothing.jitter(1, 1, 1, REVIEW_DATE, DUE) == DUE
+    assert smoothing.day_counts([DUE.timestamp()]) is None
+    assert smoothing.smooth(1, 1, 1, REVIEW_DATE, DUE) == DUE
+
+
+def test_cap_moves_cards_past_full_days():
+    smoothing = DueSmoothing(fuzz=0, daily_cap=2)
+    day_counts = smoothing.day_counts([DUE.timestamp()])
+
+    due_dates = [
+        smoothing.smooth(1, word_id, 1, REVIEW_DATE, DUE, day_counts)
+        for word_id in range(4)
+    ]
+
+    assert due_dates == [
+        DUE,
+        DUE + timedelta(days=1),
+        DUE + timedelta(days=1),
+        DUE + timedelta(days=2),
+    ]
+
+
+def test_cap_gives_up_after_max_shift_days():
+    smoothing = DueSmoothing(fuzz=0, daily_cap=1, max_shift_days=2)
+    day_counts = smoothing.day_counts(
+        (DUE + timedelta(days=days)).timestamp() for days in range(3)
+    )
+
+    due = smoothing.cap(DUE.timestamp(), day_counts)
+
+    assert datetime.fromtimestamp(due) == DUE + timedelta(days=2)
+
+
+@pytest.mark.parametrize("kwargs", [{"fuzz": -0.1}, {"fuzz": 1.0}, {"daily_cap": 0}])
+def test_invalid_smoothing(kwargs):
+    with pytest.raises(ValueError):
+        DueSmoothing(**kwargs)
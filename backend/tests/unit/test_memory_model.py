@@ -0,0 +1,110 @@
+from datetime import datetime
+
+import numpy as np
+import pytest
+
+from app.utils.memory_model import (
+    MemoryParams,
+    MemoryScheduler,
+    fit_memory_model,
+    fit_params,
+    log_loss_gradient,
+    recall_probability,
+    save_params,
+    stability,
+)
+
+TRUE_PARAMS = np.array([[np.log(1.5), 0.6], [np.log(0.3), 1.0]])
+
+
+def simulate_reviews(reviews: int, params: np.ndarray, seed: int = 0):
+    """Reviews of random groups with outcomes drawn from the memory model"""
+    rng = np.random.default_rng(seed)
+    groups = rng.integers(0, len(params), reviews)
+    views = rng.integers(1, 11, reviews)
+    stability_days = stability(views, params[groups])
+    elapsed_days = stability_days * np.exp(rng.uniform(-2, 2, reviews))
+    passed = rng.random(reviews) < recall_probability(elapsed_days, stability_days)
+    return groups, views, elapsed_days, passed
+
+
+def test_recall_is_ninety_percent_after_stability():
+    assert recall_probability(3.0, 3.0) == pytest.approx(0.9)
+
+
+def test_scheduler_reviews_when_recall_falls_to_retention():
+    review_date = datetime(2024, 1, 1)
+    params = MemoryParams(initial=0.0, growth=0.5)
+    scheduler = MemoryScheduler(params, retention=0.8)
+
+    intervals = [
+        (scheduler(checks, True, review_date) - review_date).total_seconds() / 86400
+        for checks in range(1, 6)
+    ]
+
+    assert intervals == sorted(intervals)
+    for checks, days in enumerate(intervals, start=1):
+        stability_days = stability(checks, np.array([params.initial, params.growth]))
+        assert recall_probability(days, stability_days) == pytest.approx(0.8)
+    # the review handler passes False for passed cards
+    assert scheduler(3, False, review_date) == scheduler(3, True, review_date)
+
+
+def test_scheduler_uses_user_params(tmp_path):
+    path = tmp_path / "model.json"
+    save_params(path, MemoryParams(0.0, 0.5), {7: MemoryParams(1.0, 0.5)})
+    scheduler = MemoryScheduler.load(path)
+    review_date = datetime(2024, 1, 1)
+
+    user_review = scheduler.for_user(7)(1, True, review_date)
+    other_review = scheduler.for_user(8)(1, True, review_date)
+
+    assert other_review == scheduler(1, True, review_date)
+    assert (user_review - review_date) / (other_review - review_date) == (
+        pytest.approx(np.e)
+    )
+
+
+def test_gradient_matches_finite_differences():
+    groups, views, elapsed_days, passed = simulate_reviews(200, TRUE_PARAMS)
+    params = np.array([[0.1, 0.7], [-0.5, 0.9]])
+    args = (groups, views.astype(float), elapsed_days, passed.astype(float))
+
+    _, gradient = log_loss_gradient(params, *args)
+
+    step = 1e-6
+    for index in np.ndindex(params.shape):
+        shifted = params.copy()
+        shifted[index] += step
+        numeric = (
+            log_loss_gradient(shifted, *args)[0] - log_loss_gradient(params, *args)[0]
+        ).sum() / step
+        assert gradient[index] == pytest.approx(numeric, rel=1e-3)
+
+
+def test_fit_recovers_group_params():
+    groups, views, elapsed_days, passed = simulate_reviews(50_000, TRUE_PARAMS)
+
+    fitted = fit_params(views, elapsed_days, passed, groups=groups, steps=300)
+
+    np.testing.assert_allclose(fitted, TRUE_PARAMS, atol=0.1)
+
+
+def test_fit_memory_model_fits_users_with_enough_reviews():
+    groups, views, elapsed_days, passed = simulate_reviews(20_000, TRUE_PARAMS)
+    user_ids = np.where(groups == 0, 100, 200)
+    # a user with too few reviews keeps the global parameters
+    user_ids[:10] = 300
+
+    global_params, user_params = fit_memory_model(
+        user_ids, views, elapsed_days * 86400, passed, steps=300
+    )
+
+    assert set(user_params) == {100, 200}
+    assert user_params[100].initial > global_params.initial > user_params[200].initial
+    assert user_params[100].initial == pytest.approx(TRUE_PARAMS[0, 0], abs=0.15)
+    assert user_params[200].growth == pytest.approx(TRUE_PARAMS[1, 1], abs=0.15)
+
+
+def test_fit_memory_model_without_reviews():
+    assert fit_memory_model([], [], [], []) == (MemoryParams(), {})
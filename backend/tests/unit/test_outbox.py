@@ -0,0 +1,268 @@
+import asyncio
+import time
+from collections.abc import AsyncIterator
+from unittest.mock import AsyncMock
+
+import pytest
+import pytest_asyncio
+from aiogram import Bot
+from aiogram.client.telegram import TelegramAPIServer
+from aiogram.types import Message, Update
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from app.api.bot.client import create_bot
+from app.api.bot.commands import start_command
+from app.api.bot.main import dispatcher
+from app.api.bot.outbox import (
+    MAX_MESSAGE_LENGTH,
+    Outbox,
+    Priority,
+    TokenBucket,
+    digest_messages,
+)
+
+
+class StubBotApi:
+    """Bot API answering sendMessage, with flood control for chosen chats"""
+
+    def __init__(self) -> None:
+        self.sent: list[tuple[int, str, float]] = []
+        self.flooded: set[int] = set()
+
+    async def handle(self, request: web.Request) -> web.Response:
+        data = await request.post()
+        chat_id = int(str(data["chat_id"]))
+        if chat_id in self.flooded:
+            self.flooded.discard(chat_id)
+            return web.json_response(
+                {
+                    "ok": False,
+                    "error_code": 429,
+                    "description": "Too Many Requests: retry after 1",
+                    "parameters": {"retry_after": 1},
+                },
+                status=429,
+            )
+        self.sent.append((chat_id, str(data["text"]), time.monotonic()))
+        return web.json_response(
+            {
+                "ok": True,
+                "result": {
+                    "message_id": len(self.sent),
+                    "date": 1700000000,
+                    "chat": {"id": chat_id, "type": "private"},
+                    "text": data["text"],
+                },
+            }
+        )
+
+    def texts(self, chat_id: int | None = None) -> list[str]:
+        return [text for chat, text, _ in self.sent if chat_id in (None, chat)]
+
+    def times(self, chat_id: int) -> list[float]:
+        return [sent_at for chat, _, sent_at in self.sent if chat == chat_id]
+
+
+@pytest_asyncio.fixture
+async def bot_api() -> AsyncIterator[tuple[StubBotApi, Bot]]:
+    api = StubBotApi()
+    app = web.Application()
+    app.router.add_post("/bot{token}/sendMessage", api.handle)
+    async with TestServer(app) as server:
+        base = str(server.make_url("")).rstrip("/")
+        bot = create_bot(token="42:TEST", api=TelegramAPIServer.from_base(base))
+        yield api, bot
+        await bot.session.close()
+
+
+def test_token_bucket():
+    bucket = TokenBucket(rate=2.0, burst=2)
+
+    bucket.take(0.0)
+    bucket.take(0.0)
+    assert bucket.wait_time(0.0) == pytest.approx(0.5)
+    assert bucket.wait_time(0.25) == pytest.approx(0.25)
+    assert bucket.wait_time(0.5) == 0.0
+    assert not bucket.full(0.5)
+    assert bucket.full(10.0)
+
+    bucket.pause(12.0)
+    assert bucket.wait_time(11.0) == pytest.approx(1.0)
+    assert bucket.wait_time(12.0) == 0.0
+
+
+def test_digest_messages_fit_message_length():
+    notifications = [f"{number:04}" + "x" * 995 for number in range(10)]
+
+    messages = digest_messages(notifications)
+
+    assert digest_messages(["one"]) == ["one"]
+    assert messages[0].startswith("10 notifications:\n0000")
+    assert all(len(message) <= MAX_MESSAGE_LENGTH for message in messages)
+    assert "\n".join(messages).split("\n")[1:] == notifications
+
+
+@pytest.mark.asyncio
+async def test_sends_at_once_when_not_running(bot_api):
+    api, bot = bot_api
+    outbox = Outbox()
+
+    await outbox.submit(bot, 1, "hello")
+    await outbox.notify(bot, 2, "registered")
+
+    assert api.texts() == ["hello", "registered"]
+    assert outbox.stats.queued == 0
+
+
+@pytest.mark.asyncio
+async def test_limits_chats_separately(bot_api):
+    api, bot = bot_api
+    outbox = Outbox(rate=1000, chat_rate=20, chat_burst=2)
+
+    async with outbox.run():
+        for number in range(5):
+            await outbox.submit(bot, 1, f"first {number}")
+        await outbox.submit(bot, 2, "second")
+
+    assert api.texts(1) == [f"first {number}" for number in range(5)]
+    # the second chat does not wait for the first one
+    assert api.texts().index("second") < 3
+    # a burst of two, then a message every 50ms
+    times = api.times(1)
+    assert times[1] - times[0] < 0.04
+    assert times[-1] - times[0] >= 0.14
+    assert (outbox.stats.sent, outbox.pending) == (6, 0)
+
+
+@pytest.mark.asyncio
+async def test_limits_bot(bot_api):
+    api, bot = bot_api
+    outbox = Outbox(rate=20, chat_rate=1000, chat_burst=10)
+
+    async with outbox.run():
+        for chat_id in range(10):
+            await outbox.submit(bot, chat_id, "news")
+
+    times = sorted(sent_at for _, _, sent_at in api.sent)
+    assert len(times) == 10
+    assert times[-1] - times[0] >= 0.4
+
+
+@pytest.mark.asyncio
+async def test_sends_higher_priority_first(bot_api):
+    api, bot = bot_api
+    outbox = Outbox(rate=10, chat_rate=1000)
+
+    async with outbox.run():
+        await outbox.submit(bot, 1, "broadcast", priority=Priority.LOW)
+        await outbox.submit(bot, 2, "notice")
+        await outbox.submit(bot, 3, "reply", priority=Priority.HIGH)
+
+    assert api.texts() == ["reply", "notice", "broadcast"]
+
+
+@pytest.mark.asyncio
+async def test_higher_priority_message_goes_ahead_in_its_chat(bot_api):
+    api, bot = bot_api
+    outbox = Outbox(rate=10, chat_rate=1000, chat_burst=10)
+
+    async with outbox.run():
+        await outbox.submit(bot, 1, "first")
+        await outbox.submit(bot, 2, "broadcast", priority=Priority.LOW)
+        await outbox.submit(bot, 3, "notice")
+        await outbox.submit(bot, 2, "reply", priority=Priority.HIGH)
+
+    assert api.texts() == ["reply", "first", "notice", "broadcast"]
+
+
+@pytest.mark.asyncio
+async def test_retries_after_flood_control(bot_api):
+    api, bot = bot_api
+    api.flooded.add(1)
+    outbox = Outbox(rate=1000, chat_rate=1000)
+
+    started = time.monotonic()
+    async with outbox.run():
+        await outbox.submit(bot, 1, "flooded")
+        await asyncio.sleep(0.1)
+        await outbox.submit(bot, 2, "other")
+        await asyncio.sleep(0.1)
+        # flood control holds back every chat
+        assert api.texts() == []
+
+    assert sorted(api.texts()) == ["flooded", "other"]
+    assert min(api.times(1)[0], api.times(2)[0]) - started >= 1.0
+    assert (outbox.stats.retried, outbox.stats.sent) == (1, 2)
+
+
+@pytest.mark.asyncio
+async def test_coalesces_notifications_into_digest(bot_api):
+    api, bot = bot_api
+    outbox = Outbox(chat_rate=1000, digest_interval=0.1)
+
+    async with outbox.run():
+        await outbox.notify(bot, 7, "first user")
+        await outbox.notify(bot, 7, "second user")
+        await asyncio.sleep(0.3)
+        await outbox.notify(bot, 7, "third user")
+
+    # the last notification is sent on exit
+    assert api.texts(7) == [
+        "2 notifications:\nfirst user\nsecond user",
+        "third user",
+    ]
+    assert (outbox.stats.notifications, outbox.stats.digests) == (3, 2)
+
+
+@pytest.mark.asyncio
+async def test_help_command_uses_outbox(bot_api, monkeypatch):
+    api, bot = bot_api
+    outbox = Outbox(chat_rate=1000)
+    monkeypatch.setitem(dispatcher.workflow_data, "outbox", outbox)
+    update = Update.model_validate(
+        {
+            "update_id": 1,
+            "message": {
+                "message_id": 1,
+                "from": {"id": 5, "is_bot": False, "first_name": "Test"},
+                "chat": {"id": 5, "first_name": "Test", "type": "private"},
+                "date": 1234567890,
+                "text": "/help",
+            },
+        },
+        context={"bot": bot},
+    )
+
+    async with outbox.run():
+        await dispatcher.feed_update(bot, update)
+        assert outbox.pending > 0
+
+    assert len(api.texts(5)) == outbox.stats.sent > 1
+
+
+@pytest.mark.asyncio
+async def test_start_command_replies_through_outbox(bot_api):
+    api, bot = bot_api
+    outbox = Outbox(rate=10, chat_rate=1000)
+    db = AsyncMock()
+    message = Message.model_validate(
+        {
+            "message_id": 1,
+            "from": {"id": 5, "is_bot": False, "first_name": "Test"},
+            "chat": {"id": 5, "first_name": "Test", "type": "private"},
+            "date": 1234567890,
+            "text": "/start",
+        },
+        context={"bot": bot},
+    )
+
+    async with outbox.run():
+        await outbox.submit(bot, 1, "first")
+        await outbox.submit(bot, 2, "broadcast", priority=Priority.LOW)
+        await start_command(message, db=db, bot=bot, outbox=outbox)
+
+    db.user.create.assert_awaited_once_with(user_name="User", telegram_id=5)
+    # the reply goes ahead of the queued messages
+    assert api.texts() == [*api.texts(5), "first", "broadcast"]
+    assert len(api.texts(5)) == 1
@@ -139,10 +139,11 @@ class TestGitWordParser:
                     parser.save_words_to_db()
 
                     # Assert results
-                    assert mock_session_instance.add.call_count == 2  # Two words added
-                    assert (
-                        mock_session_instance.commit.call_count == 2
-                    )  # Committed twice
+                    # Both words upserted by one statement
+                    assert mock_session_instance.execute.call_count == 1
+                    statement = mock_session_instance.execute.call_args.args[0]
+                    assert len(statement._multi_values[0]) == 2
+                    assert mock_session_instance.commit.call_count == 1
 
     def test_save_words_to_db_error(
         self, parser: GitWordParser, sample_yaml_data: LiteralString
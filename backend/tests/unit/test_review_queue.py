@@ -0,0 +1,61 @@
+import pytest
+
+from app.common.cache.compact import WordArray
+from app.common.cache.review_queue import ReviewQueue
+from app.common.cache.states import UserProfile
+
+QUEUES = [ReviewQueue, WordArray]
+
+
+@pytest.mark.parametrize("queue_class", QUEUES)
+def test_queue_deduplicates_words(queue_class):
+    queue = queue_class([1, 2, 1])
+    queue.append(2)
+    queue.extend([3, 1])
+
+    assert list(queue) == [1, 2, 3]
+    assert len(queue) == 3
+
+
+@pytest.mark.parametrize("queue_class", QUEUES)
+def test_queue_remove_and_move_to_end(queue_class):
+    queue = queue_class([1, 2, 3, 4])
+    queue.remove(2)
+    queue.move_to_end(1)
+    queue.discard(42)
+    queue.difference_update([3])
+
+    assert list(queue) == [4, 1]
+    assert 3 not in queue
+    with pytest.raises(ValueError):
+        queue.remove(42)
+    with pytest.raises(ValueError):
+        queue.move_to_end(42)
+
+
+@pytest.mark.parametrize("queue_class", QUEUES)
+def test_queue_first(queue_class):
+    queue = queue_class(range(10))
+
+    assert queue.first(3) == [0, 1, 2]
+    assert queue.first(20) == list(range(10))
+    assert queue.first(0) == []
+
+
+def test_review_queue_indexing():
+    queue = ReviewQueue([5, 6, 7])
+
+    assert queue[0:2] == [5, 6]
+    assert queue[:] == [5, 6, 7]
+    assert queue[1:] == [6, 7]
+    assert queue[1] == 6
+    assert queue[-1] == 7
+    assert queue == [5, 6, 7]
+    assert queue == WordArray([5, 6, 7])
+
+
+def test_user_profile_wraps_review_list():
+    profile = UserProfile(review_cards=[3, 3, 4])
+
+    assert isinstance(profile.review_cards, ReviewQueue)
+    assert profile.review_cards == [3, 4]
@@ -0,0 +1,87 @@
+import pytest
+from hypothesis import given, settings
+from hypothesis import strategies as st
+
+from app.common.cache.compact import WordSchedule
+from app.common.cache.schedule import ReviewSchedule
+
+SCHEDULES = [ReviewSchedule, WordSchedule]
+
+# few distinct due times, so many cards share the same second
+operations = st.lists(
+    st.one_of(
+        st.tuples(
+            st.just("add"),
+            st.integers(1, 200),
+            st.integers(1_700_000_000, 1_700_000_005),
+        ),
+        st.tuples(st.just("discard"), st.integers(1, 200), st.just(0)),
+        st.tuples(
+            st.just("pop_due"), st.just(0), st.integers(1_700_000_000, 1_700_000_006)
+        ),
+    ),
+    max_size=300,
+)
+
+
+@pytest.mark.parametrize("schedule_class", SCHEDULES)
+@settings(max_examples=200, deadline=None)
+@given(operations=operations)
+def test_schedule_loses_no_cards(schedule_class, operations):
+    """Every scheduled card is either still waiting or popped exactly once"""
+    schedule = schedule_class()
+    expected: dict[int, int] = {}
+    popped: list[int] = []
+
+    for operation, word_id, value in operations:
+        if operation == "add":
+            schedule.add(word_id, value)
+            expected[word_id] = value
+        elif operation == "discard":
+            schedule.discard(word_id)
+            expected.pop(word_id, None)
+        else:
+            due = schedule.pop_due(value)
+            assert due == [
+                word_id
+                for word_id, review_date in sorted(
+                    expected.items(), key=lambda item: (item[1], item[0])
+                )
+                if review_date < value
+            ]
+            for word_id in due:
+                del expected[word_id]
+            popped.extend(due)
+
+        assert len(schedule) == len(expected)
+
+    assert schedule.items() == sorted(
+        (review_date, word_id) for word_id, review_date in expected.items()
+    )
+    assert all(schedule.due_date(word_id) == due for word_id, due in expected.items())
+    assert schedule.first_due() == min(expected.values(), default=None)
+
+
+@pytest.mark.parametrize("schedule_class", SCHEDULES)
+def test_schedule_cards_due_same_second(schedule_class):
+    schedule = schedule_class()
+    for word_id in range(1, 1001):
+        schedule.add(word_id, 1_700_000_000)
+
+    assert len(schedule) == 1000
+    assert schedule.pop_due(1_700_000_001) == list(range(1, 1001))
+    assert len(schedule) == 0
+
+
+@pytest.mark.parametrize("schedule_class", SCHEDULES)
+def test_schedule_reschedules_word(schedule_class):
+    schedule = schedule_class([(20, 1), (10, 2)])
+    schedule.add(1, 5)
+
+    assert schedule.items() == [(5, 1), (10, 2)]
+    assert schedule.values() == [1, 2]
+    assert schedule.dates() == [5, 10]
+    assert 1 in schedule
+    assert 3 not in schedule
+    with pytest.raises(KeyError):
+        schedule.remove(3)
@@ -0,0 +1,67 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+from hypothesis import given
+from hypothesis import strategies as st
+
+from app.utils.review_algoritm import review_algorithm
+from app.utils.scheduling import HYDRATION_INTERVALS, REVIEW_INTERVALS, IntervalTable
+
+MINUTES = [20, 60, 120, 240, 480, 960, 1920, 3840, 7680, 15360]
+
+
+def expected_minutes(checks: int, passed: bool) -> int:
+    """Rules of the bot review intervals written out by count of views"""
+    if passed:
+        return MINUTES[min(checks + 1, 10) - 1]
+    if checks < 3:
+        return MINUTES[0]
+    return MINUTES[min(max(checks - 3, 1), 10) - 1]
+
+
+@pytest.mark.parametrize("passed", [True, False])
+@pytest.mark.parametrize("checks", range(0, 21))
+def test_review_algorithm_uses_table(checks, passed):
+    review_date = datetime(2023, 1, 1, 12, 0)
+
+    result = review_algorithm(checks, passed, review_date)
+
+    expected = review_date + timedelta(minutes=expected_minutes(checks, passed))
+    assert result == int(expected.timestamp())
+
+
+@pytest.mark.parametrize("table", [REVIEW_INTERVALS, HYDRATION_INTERVALS])
+@given(
+    cards=st.lists(
+        st.tuples(
+            st.integers(0, 30),
+            st.integers(1_600_000_000, 1_800_000_000),
+            st.booleans(),
+        ),
+        max_size=50,
+    )
+)
+def test_batch_matches_scalar(table, cards):
+    count_of_views = np.array([card[0] for card in cards], dtype=np.int64)
+    last_view = np.array([card[1] for card in cards], dtype=np.int64)
+    passed = np.array([card[2] for card in cards], dtype=bool)
+
+    result = table.next_review_batch(count_of_views, last_view, passed)
+
+    assert result.tolist() == [
+        timestamp + table.seconds(checks, flag) for checks, timestamp, flag in cards
+    ]
+
+
+def test_batch_keeps_float_timestamps():
+    table = IntervalTable({1: 1, 2: 2})
+
+    result = table.next_review_batch([0, 5], [10.5, 20.25], passed=True)
+
+    assert result.tolist() == [70.5, 140.25]
+
+
+def test_levels_must_start_from_one():
+    with pytest.raises(ValueError):
+        IntervalTable({2: 20, 3: 40})
@@ -3,12 +3,15 @@
 from unittest.mock import AsyncMock, patch
 
 import pytest
+from aiogram.client.telegram import TEST
 
+from app.api.bot.client import create_bot
 from app.scripts.set_up_bot import (
     delete_telegram_webhook,
     set_telegram_web_app_mini_url,
     set_telegram_web_app_url,
     set_telegram_webhook,
+    set_up_bot,
 )
 
 
@@ -146,3 +149,24 @@ async def test_set_telegram_web_app_mini_url_exception(mock_settings):
         mock_logger.exception.assert_called_once_with(
             "Error while setting Telegram web app URL"
         )
+
+
+@pytest.mark.asyncio
+async def test_set_up_bot_leaves_shared_bot_open(mock_settings):
+    bot = AsyncMock()
+    mock_settings.ENVIRONMENT = "production"
+    mock_settings.DOMAIN = "test.example.com"
+    with patch("app.scripts.set_up_bot.asyncio.sleep"):
+        await set_up_bot(mode="production", bot=bot)
+
+    bot.set_webhook.assert_awaited_once()
+    bot.set_chat_menu_button.assert_awaited_once()
+    bot.session.close.assert_not_awaited()
+
+
+def test_bot_session_keeps_connections_alive():
+    bot = create_bot(token="42:TEST", api=TEST)
+
+    assert bot.session.api is TEST
+    assert bot.session._connector_init["keepalive_timeout"] == 60.0
+    assert bot.session._connector_init["limit_per_host"] == 100
@@ -0,0 +1,78 @@
+from datetime import datetime
+
+import pytest
+from sortedcontainers import SortedSet
+
+from app.common.cache.schedule import ReviewSchedule
+from app.common.cache.snapshot import (
+    SnapshotError,
+    dump_states,
+    load_states,
+    read_snapshot,
+    write_snapshot,
+)
+from app.common.cache.states import UserProfile
+
+
+def make_states() -> dict[int, UserProfile]:
+    return {
+        123456789: UserProfile(
+            created_cards=SortedSet([1, 2, 3, 4, 5]),
+            known_cards=SortedSet([1]),
+            master_cards=SortedSet([2]),
+            review_cards=[4, 3],
+            # two cards due in the same second
+            waiting_cards=ReviewSchedule(
+                [(1_700_000_000, 5), (1_700_000_600, 2), (1_700_000_600, 3)]
+            ),
+        ),
+        5: UserProfile(),
+    }
+
+
+def test_snapshot_round_trip():
+    created_at = datetime(2025, 1, 1, 12, 30, 15)
+    states = make_states()
+
+    snapshot_time, restored = load_states(dump_states(states, created_at))
+
+    assert snapshot_time == created_at
+    assert restored == states
+
+
+def test_snapshot_file_round_trip(tmp_path):
+    path = tmp_path / "states" / "users.snapshot"
+    states = make_states()
+
+    write_snapshot(path, dump_states(states, datetime.now()))
+    _, restored = read_snapshot(path)
+
+    assert restored == states
+    assert not path.with_suffix(".snapshot.tmp").exists()
+
+
+def test_snapshot_is_compact():
+    states = {
+        user_id: UserProfile(created_cards=SortedSet(range(1, 1001)))
+        for user_id in range(100)
+    }
+
+    # 4 bytes per word id plus a fixed per-user header
+    assert len(dump_states(states, datetime.now())) < 100 * (1000 * 4 + 64)
+
+
+def test_snapshot_rejects_unknown_format():
+    with pytest.raises(SnapshotError):
+        load_states(b"JUNK" + bytes(20))
+
+
+def test_snapshot_rejects_truncated_body():
+    data = dump_states(make_states(), datetime.now())
+
+    with pytest.raises(SnapshotError):
+        load_states(data[:-3])
+
+
+def test_read_missing_snapshot(tmp_path):
+    with pytest.raises(SnapshotError):
+        read_snapshot(tmp_path / "missing.snapshot")
@@ -0,0 +1,153 @@
+import asyncio
+import datetime
+from typing import Any
+
+import fakeredis
+import pytest
+import pytest_asyncio
+from sortedcontainers import SortedSet
+
+from app.common.cache.backend import (
+    InMemoryStatesBackend,
+    RedisStatesBackend,
+    StatesBackend,
+)
+from app.common.cache.schedule import ReviewSchedule
+from app.common.cache.states import UserProfile
+
+USER_ID = 1
+
+
+def stored_profile() -> UserProfile:
+    past = int(datetime.datetime.now().timestamp()) - 60
+    future = past + 24 * 60 * 60
+    return UserProfile(
+        created_cards=SortedSet([1, 2, 3, 4]),
+        known_cards=SortedSet([1]),
+        review_cards=[2],
+        waiting_cards=ReviewSchedule([(past, 3), (future, 4)]),
+    )
+
+
+class FakeLoader:
+    def __init__(self) -> None:
+        self.calls = 0
+
+    async def __call__(self, db: Any, user_id: int) -> UserProfile:
+        self.calls += 1
+        return stored_profile()
+
+
+@pytest.fixture
+def redis_server() -> fakeredis.FakeServer:
+    return fakeredis.FakeServer()
+
+
+@pytest_asyncio.fixture(params=["memory", "redis"])
+async def backend(request, redis_server) -> StatesBackend:
+    if request.param == "memory":
+        backend: StatesBackend = InMemoryStatesBackend({USER_ID: stored_profile()})
+        await backend.ensure_user(USER_ID, db=None)
+        backend.scheduler.promote_due()
+    else:
+        redis = fakeredis.aioredis.FakeRedis(server=redis_server)
+        backend = RedisStatesBackend(redis, loader=FakeLoader(), ttl=60)
+        await backend.ensure_user(USER_ID, db=None)
+        # redis backend promotes due cards when the queue is read
+        await backend.review_count(USER_ID)
+    return backend
+
+
+@pytest.mark.asyncio
+async def test_backend_created_cards(backend):
+    assert await backend.is_created(USER_ID, 4)
+    assert not await backend.is_created(USER_ID, 5)
+    assert await backend.last_created(USER_ID) == 4
+
+    await backend.add_created(USER_ID, 5, known=False)
+    await backend.add_created(USER_ID, 6, known=True)
+
+    assert await backend.last_created(USER_ID) == 6
+    assert await backend.review_words(USER_ID, limit=20) == [2, 3, 5]
+
+
+@pytest.mark.asyncio
+async def test_backend_created_cards_batch(backend):
+    assert await backend.created_among(USER_ID, [5, 4, 1, 6]) == [4, 1]
+
+    await backend.add_created_many(USER_ID, [(7, False), (5, True), (6, False)])
+
+    assert await backend.created_among(USER_ID, [5, 6, 7, 8]) == [5, 6, 7]
+    assert await backend.last_created(USER_ID) == 7
+    assert await backend.review_words(USER_ID, limit=20) == [2, 3, 7, 6]
+
+
+@pytest.mark.asyncio
+async def test_backend_moves_due_cards_to_review(backend):
+    assert await backend.review_count(USER_ID) == 2
+    assert await backend.review_words(USER_ID, limit=1) == [2]
+    assert await backend.review_words(USER_ID, limit=0) == []
+
+
+@pytest.mark.asyncio
+async def test_backend_review_results(backend):
+    tomorrow = int(datetime.datetime.now().timestamp()) + 24 * 60 * 60
+    await backend.add_created(USER_ID, 5, known=False)
+
+    await backend.requeue_review(USER_ID, 2)
+    assert await backend.review_words(USER_ID, limit=20) == [3, 5, 2]
+
+    # failing the same card again does not queue it twice
+    await backend.requeue_review(USER_ID, 2)
+    assert await backend.review_count(USER_ID) == 3
+
+    scheduled = await backend.scheduled_dates(USER_ID)
+    await backend.schedule_review(USER_ID, 3, tomorrow + 1)
+    assert await backend.review_words(USER_ID, limit=20) == [5, 2]
+    assert await backend.review_count(USER_ID) == 2
+    assert len(scheduled) == 1
+    assert sorted(await backend.scheduled_dates(USER_ID)) == [
+        *scheduled,
+        tomorrow + 1,
+    ]
+
+    await backend.mark_known(USER_ID, 5)
+    assert await backend.review_words(USER_ID, limit=20) == [2]
+    assert len(await backend.scheduled_dates(USER_ID)) == 2
+
+
+@pytest.mark.asyncio
+async def test_redis_backend_shared_between_workers(redis_server):
+    """Two workers hydrate a user once and never queue a due card twice"""
+    loader = FakeLoader()
+    workers = [
+        RedisStatesBackend(
+            fakeredis.aioredis.FakeRedis(server=redis_server), loader=loader
+        )
+        for _ in range(2)
+    ]
+
+    for worker in workers:
+        await worker.ensure_user(USER_ID, db=None)
+    await asyncio.gather(*(worker.review_count(USER_ID) for worker in workers * 5))
+    await workers[0].add_created(USER_ID, 5, known=False)
+
+    assert loader.calls == 1
+    assert await workers[1].review_words(USER_ID, limit=20) == [2, 3, 5]
+
+
+@pytest.mark.asyncio
+async def test_redis_backend_expired_user_is_hydrated_again(redis_server):
+    redis = fakeredis.aioredis.FakeRedis(server=redis_server)
+    loader = FakeLoader()
+    backend = RedisStatesBackend(redis, loader=loader, ttl=60)
+
+    await backend.ensure_user(USER_ID, db=None)
+    await backend.add_created(USER_ID, 5, known=True)
+    assert 0 < await redis.ttl("states:1:known") <= 60
+
+    await redis.flushall()
+    await backend.ensure_user(USER_ID, db=None)
+
+    assert loader.calls == 2
+    assert not await backend.is_created(USER_ID, 5)
@@ -0,0 +1,71 @@
+import fakeredis
+import pytest
+
+from app.common.cache.updates import (
+    DedupStats,
+    RedisDeduplicator,
+    UpdateDeduplicator,
+    WindowDeduplicator,
+)
+
+
+async def dropped(deduplicator: UpdateDeduplicator, update_ids: list[int]) -> list[int]:
+    return [
+        update_id
+        for update_id in update_ids
+        if await deduplicator.is_duplicate(update_id)
+    ]
+
+
+def test_window_must_be_multiple_of_eight():
+    with pytest.raises(ValueError):
+        WindowDeduplicator(window=12)
+
+
+@pytest.mark.asyncio
+async def test_window_drops_replays():
+    deduplicator = WindowDeduplicator(window=16)
+
+    assert await dropped(deduplicator, [100, 101, 100, 102, 101, 103]) == [100, 101]
+    assert deduplicator.stats == DedupStats(accepted=4, duplicates=2)
+
+
+@pytest.mark.asyncio
+async def test_window_accepts_late_updates_once():
+    deduplicator = WindowDeduplicator(window=16)
+
+    # 101 and 102 arrive after 105, they are still in the window
+    assert await dropped(deduplicator, [100, 105, 102, 101, 102, 105]) == [102, 105]
+
+
+@pytest.mark.asyncio
+async def test_window_forgets_ids_it_moves_past():
+    deduplicator = WindowDeduplicator(window=16)
+    await dropped(deduplicator, list(range(100, 110)))
+
+    # 116 reuses the slot of 100, the window keeps 101 to 116
+    assert await dropped(deduplicator, [116, 109, 101, 110, 116]) == [109, 101, 116]
+    # a gap longer than the window clears everything
+    assert await dropped(deduplicator, [200, 199, 200]) == [200]
+
+
+@pytest.mark.asyncio
+async def test_window_restarts_far_behind():
+    deduplicator = WindowDeduplicator(window=16)
+    await dropped(deduplicator, [1000, 1001])
+
+    # Telegram picks a random next id after a week without updates
+    assert await dropped(deduplicator, [7, 8, 7]) == [7]
+    assert deduplicator.stats.restarts == 1
+
+
+@pytest.mark.asyncio
+async def test_redis_deduplicator_is_shared():
+    redis = fakeredis.FakeAsyncRedis()
+    first = RedisDeduplicator(redis, ttl=60)
+    second = RedisDeduplicator(redis, ttl=60)
+
+    assert await dropped(first, [1, 2]) == []
+    assert await dropped(second, [2, 3]) == [2]
+    assert second.stats == DedupStats(accepted=1, duplicates=1)
+    assert 0 < await redis.ttl("update:3") <= 60
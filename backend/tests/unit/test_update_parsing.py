@@ -0,0 +1,64 @@
+import json
+
+from aiogram import Bot, Dispatcher, Router
+from aiogram.types import Message, Update
+
+from app.api.bot.ingestion import UpdateTypeFilter, parse_update
+
+BOT = Bot("42:TEST")
+
+MESSAGE = {
+    "message_id": 1,
+    "from": {"id": 7, "is_bot": False, "first_name": "Test"},
+    "chat": {"id": 7, "first_name": "Test", "type": "private"},
+    "date": 1234567890,
+    "text": "/help",
+}
+
+
+def raw(update: dict) -> bytes:
+    return json.dumps(update).encode()
+
+
+def test_parse_update_binds_bot():
+    update = parse_update(raw({"update_id": 1, "message": MESSAGE}), BOT)
+
+    assert update.model_dump() == Update(update_id=1, message=MESSAGE).model_dump()
+    assert update.bot is BOT
+    assert update.message is not None
+    assert update.message.bot is BOT
+
+
+def test_filter_uses_dispatcher_handlers():
+    router = Router()
+
+    @router.message()
+    async def on_message(message: Message) -> None: ...
+
+    dispatcher = Dispatcher()
+    dispatcher.include_router(router)
+
+    assert UpdateTypeFilter.from_dispatcher(dispatcher).update_types == ("message",)
+
+
+def test_filter_skips_unhandled_types():
+    update_filter = UpdateTypeFilter(["message"])
+    poll = {"id": "1", "question": "?", "options": [], "total_voter_count": 0}
+
+    assert update_filter(raw({"update_id": 1, "message": MESSAGE}))
+    assert not update_filter(raw({"update_id": 2, "edited_message": MESSAGE}))
+    assert not update_filter(raw({"update_id": 3, "poll": poll}))
+    assert update_filter.skipped == 2
+
+
+def test_filter_passes_nested_type_names():
+    # a callback query carries the message it was sent with
+    update_filter = UpdateTypeFilter(["message"])
+    callback_query = {
+        "id": "1",
+        "from": MESSAGE["from"],
+        "chat_instance": "1",
+        "message": MESSAGE,
+    }
+
+    assert update_filter(raw({"update_id": 1, "callback_query": callback_query}))
@@ -0,0 +1,142 @@
+import asyncio
+import datetime
+import random
+from typing import Any
+
+import pytest
+from aiogram.types import CallbackQuery, Chat, Message, Update, User
+
+from app.api.bot.ingestion import UpdateQueue, chat_key
+
+BOT: Any = object()
+
+
+def message_update(update_id: int, chat_id: int) -> Update:
+    return Update(
+        update_id=update_id,
+        message=Message(
+            message_id=update_id,
+            date=datetime.datetime.now(),
+            chat=Chat(id=chat_id, type="private"),
+            text="text",
+        ),
+    )
+
+
+class SlowDispatcher:
+    """Records handled updates, a handler takes up to `delay` seconds"""
+
+    def __init__(
+        self, delay: float = 0.0, fail: int | None = None, jitter: bool = True
+    ) -> None:
+        self.delay = delay
+        self.fail = fail
+        self.jitter = jitter
+        self.handled: list[tuple[int, int]] = []
+        self.kwargs: list[dict[str, Any]] = []
+
+    async def feed_update(self, bot: Any, update: Update, **kwargs: Any) -> None:
+        await asyncio.sleep(self.delay * (random.random() if self.jitter else 1))
+        if update.update_id == self.fail:
+            raise ValueError("handler failed")
+        self.handled.append((chat_key(update), update.update_id))
+        self.kwargs.append(kwargs)
+
+
+def test_chat_key():
+    user = User(id=7, is_bot=False, first_name="Test")
+    callback = Update(
+        update_id=1,
+        callback_query=CallbackQuery(
+            id="1", from_user=user, chat_instance="1", data="data"
+        ),
+    )
+
+    assert chat_key(message_update(1, 42)) == 42
+    assert chat_key(callback) == 7
+
+
+@pytest.mark.asyncio
+async def test_updates_of_a_chat_keep_order():
+    dispatcher = SlowDispatcher(delay=0.005)
+    queue = UpdateQueue(dispatcher, workers=4, max_pending=100)
+
+    async with queue.run():
+        for update_id in range(60):
+            await queue.submit(BOT, message_update(update_id, chat_id=update_id % 6))
+
+    assert len(dispatcher.handled) == 60
+    for chat_id in range(6):
+        chat_updates = [
+            update for chat, update in dispatcher.handled if chat == chat_id
+        ]
+        assert chat_updates == sorted(chat_updates)
+    assert queue.stats.processed == 60
+    assert queue.pending == 0
+
+
+@pytest.mark.asyncio
+async def test_chats_are_handled_in_parallel():
+    dispatcher = SlowDispatcher(delay=0.1, jitter=False)
+    queue = UpdateQueue(dispatcher, workers=4, max_pending=8)
+
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    async with queue.run():
+        for chat_id in range(4):
+            await queue.submit(BOT, message_update(chat_id, chat_id))
+        submitted = loop.time() - started
+
+    assert submitted < 0.05
+    assert loop.time() - started < 0.3
+
+
+@pytest.mark.asyncio
+async def test_full_shard_blocks_submit():
+    dispatcher = SlowDispatcher(delay=0.02)
+    queue = UpdateQueue(dispatcher, workers=2, max_pending=4)
+
+    async with queue.run():
+        for update_id in range(10):
+            await queue.submit(BOT, message_update(update_id, chat_id=1), config=1)
+
+    assert queue.stats.accepted == queue.stats.processed == 10
+    assert queue.stats.blocked > 0
+    assert queue.stats.blocked_seconds > 0
+    # a shard holds 2 updates and its worker 1 more
+    assert queue.stats.max_pending == 3
+    assert dispatcher.kwargs[0] == {"config": 1}
+
+
+@pytest.mark.asyncio
+async def test_failed_update_does_not_stop_worker():
+    dispatcher = SlowDispatcher(fail=1)
+    queue = UpdateQueue(dispatcher, workers=1, max_pending=10)
+
+    async with queue.run():
+        for update_id in range(3):
+            await queue.submit(BOT, message_update(update_id, chat_id=1))
+
+    assert [update for _, update in dispatcher.handled] == [0, 2]
+    assert (queue.stats.processed, queue.stats.failed) == (2, 1)
+
+
+@pytest.mark.asyncio
+async def test_drain_timeout_drops_pending_updates():
+    dispatcher = SlowDispatcher(delay=10, jitter=False)
+    queue = UpdateQueue(dispatcher, workers=1, max_pending=10)
+
+    async with queue.run(drain_timeout=0.05):
+        await queue.submit(BOT, message_update(1, chat_id=1))
+        workers = list(queue._tasks)
+    assert not queue.running
+    assert dispatcher.handled == []
+    assert all(worker.cancelled() for worker in workers)
+
+    with pytest.raises(RuntimeError):
+        await queue.submit(BOT, message_update(2, chat_id=1))
+
+
+def test_invalid_queue():
+    with pytest.raises(ValueError):
+        UpdateQueue(SlowDispatcher(), workers=4, max_pending=2)
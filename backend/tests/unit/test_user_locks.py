@@ -0,0 +1,49 @@
+import asyncio
+
+import pytest
+
+from app.common.cache.locks import UserLocks
+
+
+@pytest.mark.asyncio
+async def test_user_locks_serialize_one_user():
+    locks = UserLocks()
+    events: list[str] = []
+
+    async def change(name: str) -> None:
+        async with locks(1):
+            events.append(f"{name} start")
+            await asyncio.sleep(0.01)
+            events.append(f"{name} end")
+
+    await asyncio.gather(change("a"), change("b"))
+
+    assert events == ["a start", "a end", "b start", "b end"]
+    assert len(locks) == 0
+
+
+@pytest.mark.asyncio
+async def test_user_locks_keep_users_concurrent():
+    locks = UserLocks()
+
+    async with locks(1):
+        # another user's change does not wait for the held lock
+        async def other_user() -> None:
+            async with locks(2):
+                pass
+
+        await asyncio.wait_for(other_user(), timeout=1)
+        assert len(locks) == 1
+
+
+@pytest.mark.asyncio
+async def test_user_locks_released_on_error():
+    locks = UserLocks()
+
+    with pytest.raises(RuntimeError):
+        async with locks(1):
+            raise RuntimeError
+
+    async with locks(1):
+        pass
+    assert len(locks) == 0
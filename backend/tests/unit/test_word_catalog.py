@@ -0,0 +1,113 @@
+import dataclasses
+
+import pytest
+from fastapi.responses import JSONResponse
+from hypothesis import given
+from hypothesis import strategies as st
+
+from app.common.shemas.words import WordResponse, WordsResponse
+from app.words.catalog import CatalogSentence, CatalogWord, WordCatalog
+
+
+def make_word(word_id: int, sentences: int = 0) -> CatalogWord:
+    return CatalogWord(
+        id=word_id,
+        latin_word=f"latin {word_id}",
+        native_word=f"native {word_id}",
+        cyrillic_word=f"cyrillic {word_id}",
+        legend=None,
+        image=None,
+        transcription=None,
+        voice_id=None,
+        sentences=tuple(
+            CatalogSentence(
+                id=word_id * 10 + number,
+                native_text="native",
+                cyrilic_text="cyrilic",
+                latin_text="latin",
+            )
+            for number in range(sentences)
+        ),
+    )
+
+
+@pytest.fixture
+def catalog() -> WordCatalog:
+    # ids with gaps, given out of order
+    return WordCatalog([make_word(word_id) for word_id in (7, 1, 3, 4, 9)])
+
+
+def test_new_words_after_last_word(catalog):
+    assert [word.id for word in catalog.get_new_words(0, limit=2)] == [1, 3]
+    assert [word.id for word in catalog.get_new_words(3, limit=5)] == [4, 7, 9]
+    assert [word.id for word in catalog.get_new_words(5, limit=5)] == [7, 9]
+    assert catalog.get_new_words(9) == []
+    assert catalog.get_new_words(0, limit=0) == []
+
+
+def test_get_many_keeps_requested_order(catalog):
+    assert [word.id for word in catalog.get_many([9, 2, 1, 7])] == [9, 1, 7]
+    assert 4 in catalog
+    assert 5 not in catalog
+    assert len(catalog) == 5
+
+
+def test_catalog_word_is_immutable(catalog):
+    word = catalog.get(1)
+    with pytest.raises(AttributeError):
+        word.latin_word = "changed"  # type: ignore[misc]
+
+
+def test_catalog_word_converts_to_response():
+    response = WordResponse.from_db_model(make_word(2, sentences=2))
+
+    assert response.word_id == 2
+    assert [sentence.id for sentence in response.sentences] == [20, 21]
+
+
+def test_word_without_cyrillic_spelling_converts_to_response():
+    word = dataclasses.replace(make_word(2), cyrillic_word=None)
+
+    assert WordResponse.from_db_model(word).cyrillic_word == ""
+
+
+# any text postgres can store: no NUL, no lone surrogates
+texts = st.text(
+    st.characters(blacklist_categories=("Cs",), blacklist_characters="\x00")
+)
+words = st.builds(
+    CatalogWord,
+    id=st.integers(1, 2**31),
+    latin_word=texts,
+    native_word=texts,
+    cyrillic_word=st.none() | texts,
+    legend=st.none() | texts,
+    image=st.none(),
+    transcription=st.none(),
+    voice_id=st.none(),
+    sentences=st.lists(
+        st.builds(
+            CatalogSentence,
+            id=st.integers(1, 2**31),
+            native_text=texts,
+            cyrilic_text=texts,
+            latin_text=texts,
+        ),
+        max_size=3,
+    ).map(tuple),
+)
+
+
+@given(words=st.lists(words, max_size=5, unique_by=lambda word: word.id))
+def test_encoded_words_match_response_schema(words):
+    catalog = WordCatalog(words)
+    word_ids = [word.id for word in words]
+    response = WordsResponse(words=[WordResponse.from_db_model(word) for word in words])
+
+    encoded = catalog.encode(word_ids)
+
+    # the body fastapi renders for a WordsResponse return value
+    assert encoded == JSONResponse(response.model_dump(mode="json")).body
+    assert encoded == response.model_dump_json().encode()
+    # served again from the encoded words
+    assert catalog.encode(word_ids) == encoded